@@ -0,0 +1,147 @@
+"""
+Variante asyncio de DBController y puente entre asyncio y el mainloop de Tk
+
+psycopg2 es bloqueante, así que AsyncDBController corre cada helper de un
+DBController (idealmente pooled=True) en un pool de hilos y lo expone como
+corrutina. TkAsyncBridge hace avanzar el event loop desde root.after, de modo
+que una vista puede hacer `await db.get_all_clients()` sin congelar la ventana:
+
+    bridge = TkAsyncBridge(root)
+    adb = AsyncDBController(db)
+
+    async def cargar():
+        rows = await adb.get_all_clients(tipo="Minorista")
+        ...  # acá ya estamos de vuelta en el hilo de Tk
+
+    bridge.spawn(cargar())
+"""
+
+import asyncio
+import functools
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+# Helpers de DBController que se exponen como corrutinas (misma firma)
+_ASYNC_METHODS = (
+    "execute", "fetchall", "fetchone", "fetchone_prepared",
+    "validate_admin", "insert_administrator",
+    "get_all_clients", "get_client_by_code", "search_clients", "get_clients_page",
+    "get_clients_by_codes", "count_clients",
+    "delete_client_by_code", "delete_clients",
+    "insert_minorista", "insert_mayorista", "insert_corporativo",
+    "insert_minorista_many", "insert_mayorista_many", "insert_corporativo_many",
+    "update_minorista", "update_mayorista", "update_corporativo",
+)
+
+
+def _offloaded(name):
+    async def method(self, *args, **kwargs):
+        return await self.run(getattr(self.db, name), *args, **kwargs)
+    method.__name__ = name
+    method.__doc__ = f"Versión corrutina de DBController.{name}."
+    return method
+
+
+class AsyncDBController:
+    """Envuelve un DBController: cada helper corre en un hilo y se espera con await."""
+
+    def __init__(self, db_controller, max_workers=None):
+        self.db = db_controller
+        if max_workers is None:
+            # con una sola conexión compartida no tiene sentido más de un hilo
+            max_workers = db_controller.pool.max_size if db_controller.pool else 1
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="async-db")
+
+    async def run(self, fn, *args, **kwargs):
+        """
+        Corre fn(*args, **kwargs) en el pool de hilos. Sirve para bloques que
+        necesitan varias llamadas en la misma transacción:
+
+            def alta(db):
+                with db.transaction():
+                    ...
+            await adb.run(alta, adb.db)
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+
+    async def iter_rows(self, query, params=None, itersize=2000, batch_size=1000):
+        """Como DBController.iter_rows (por lotes): cada lote se trae en un hilo."""
+        rows = self.db.iter_rows(query, params, itersize=itersize, batch_size=batch_size)
+        try:
+            while True:
+                batch = await self.run(next, rows, None)
+                if batch is None:
+                    return
+                yield batch
+        finally:
+            await self.run(rows.close)
+
+    async def close(self):
+        await self.run(self.db.close)
+        self._executor.shutdown(wait=False)
+
+    def shutdown(self, wait=False):
+        """Libera el pool de hilos sin cerrar el DBController (p.ej. al salir de la app)."""
+        self._executor.shutdown(wait=wait)
+
+
+for _name in _ASYNC_METHODS:
+    setattr(AsyncDBController, _name, _offloaded(_name))
+del _name
+
+
+class TkAsyncBridge:
+    """
+    Hace correr un event loop de asyncio "dentro" del mainloop de Tk: cada
+    `interval` ms procesa lo que esté listo en el loop y devuelve el control a
+    Tk. Las corrutinas lanzadas con spawn() se ejecutan en el hilo de Tk, así
+    que pueden tocar widgets directamente después de cada await.
+    """
+
+    def __init__(self, root, loop=None, interval=10):
+        self.root = root
+        self.loop = loop or asyncio.new_event_loop()
+        self.interval = interval
+        self._after_id = None
+        self._tick()
+
+    def _tick(self):
+        # una vuelta del loop: corre los callbacks listos (incluidos los de hilos que
+        # terminaron) y sale en cuanto procesa el stop que encolamos
+        self.loop.call_soon(self.loop.stop)
+        self.loop.run_forever()
+        self._after_id = self.root.after(self.interval, self._tick)
+
+    def spawn(self, coro, on_error=None):
+        """
+        Programa la corrutina y devuelve su Task (task.cancel() para abandonarla).
+        Si falla, se llama a on_error(exc) (por defecto se imprime el traceback).
+        """
+        task = self.loop.create_task(coro)
+
+        def done(t):
+            if t.cancelled():
+                return
+            exc = t.exception()
+            if exc is None:
+                return
+            if callable(on_error):
+                on_error(exc)
+            else:
+                traceback.print_exception(type(exc), exc, exc.__traceback__)
+        task.add_done_callback(done)
+        return task
+
+    def close(self):
+        if self._after_id is not None:
+            try:
+                self.root.after_cancel(self._after_id)
+            except Exception:
+                pass
+            self._after_id = None
+        for task in asyncio.all_tasks(self.loop):
+            task.cancel()
+        self.loop.call_soon(self.loop.stop)
+        self.loop.run_forever()
+        self.loop.close()
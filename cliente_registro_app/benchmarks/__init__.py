@@ -0,0 +1,10 @@
+"""
+Benchmarks de DBController y de las consultas de reportes
+
+Se ejecutan desde cliente_registro_app/ contra un Postgres local ya cargado:
+
+    python -m benchmarks.run --scale 10k --database registro_bench_10k
+    python -m benchmarks.run --scale 100k --database registro_bench_100k --baseline base_100k.json
+
+Ver benchmarks/run.py para las opciones.
+"""
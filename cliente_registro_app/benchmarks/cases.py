@@ -0,0 +1,151 @@
+"""
+Casos medidos: cada uno es (nombre, función(db, muestra)).
+
+La muestra (códigos y admin existentes) se toma una vez de la BD con sample();
+así los casos no dependen de qué datos haya cargados.
+"""
+
+import random
+
+from report_queries import REPORT_QUERIES
+from report_views import strip_row_number, view_query
+
+# Los casos de escritura insertan y borran clientes con códigos de un bloque
+# libre elegido al azar en 99000000-99999999: fuera de los rangos de datagen
+# (clientes 10000000-89999999, admins 90000000-98999999), sin tocar clientes
+# existentes y con poca chance de chocar con otra corrida en paralelo
+_BENCH_DNI_BASE = 99_000_000
+_BENCH_BLOCK = 1000
+# filas por caso de insert_*_many
+_BATCH_ROWS = 500
+
+
+def _ruc_bench(dni):
+    # RUC de persona natural (10 + DNI + dígito): se deriva del DNI reservado
+    return f"10{dni}0"
+
+
+def free_codes(db, size=_BENCH_BLOCK, tries=50):
+    """DNIs de un bloque sin clientes ni admins (y sin RUC 10<dni>0 tomados)."""
+    rnd = random.Random()
+    for _ in range(tries):
+        start = _BENCH_DNI_BASE + rnd.randrange(0, 1_000_000, size)
+        dnis = [str(start + i) for i in range(size)]
+        used = db.fetchone("""
+            SELECT EXISTS (SELECT 1 FROM ClienteMinorista WHERE DNI BETWEEN %(desde)s AND %(hasta)s)
+                OR EXISTS (SELECT 1 FROM Administrador WHERE DNI BETWEEN %(desde)s AND %(hasta)s)
+                OR EXISTS (SELECT 1 FROM ClienteMayorista WHERE RUC = ANY(%(rucs)s::bpchar[]))
+                OR EXISTS (SELECT 1 FROM ClienteCorporativo WHERE RUC = ANY(%(rucs)s::bpchar[])) AS usado
+        """, {"desde": dnis[0], "hasta": dnis[-1], "rucs": [_ruc_bench(d) for d in dnis]})["usado"]
+        if not used:
+            return dnis
+    raise RuntimeError("No se encontró un bloque libre de DNIs para los casos de escritura")
+
+
+def sample(db):
+    """Códigos de ejemplo de cada tipo, un admin y un término de búsqueda."""
+    def first(sql):
+        row = db.fetchone(sql)
+        return next(iter(row.values())) if row else None
+
+    admin = db.fetchone("SELECT DNI, Usuario, Contrasena FROM Administrador ORDER BY DNI LIMIT 1")
+    minorista = db.fetchone("SELECT DNI, Nombre_Apellido, Preferencias FROM ClienteMinorista ORDER BY DNI LIMIT 1")
+    nombre = (minorista or {}).get("nombre_apellido") or "a"
+    return {
+        "minorista": minorista["dni"] if minorista else None,
+        # update_minorista vuelve a escribir el mismo valor: no altera los datos
+        "preferencias": (minorista or {}).get("preferencias") or "",
+        "mayorista": first("SELECT RUC FROM ClienteMayorista ORDER BY RUC LIMIT 1"),
+        "corporativo": first("SELECT RUC FROM ClienteCorporativo ORDER BY RUC LIMIT 1"),
+        "admin": admin,
+        # una palabra de un nombre real: la búsqueda devuelve algo pero no todo
+        "termino": (nombre.split() or ["a"])[0][:5].lower(),
+        "libres": free_codes(db),
+    }
+
+
+def _delete_all(db, tipo, codes):
+    results = db.delete_clients((tipo, c) for c in codes)
+    failed = [c for c, (ok, _) in results.items() if not ok]
+    if failed:
+        raise RuntimeError(f"No se borraron los clientes de prueba: {failed[:5]}")
+
+
+def _insert_delete_minorista(db, s):
+    dni = s["libres"][0]
+    db.insert_minorista(dni, "Benchmark", "Av. Prueba 1 - Lima", "999999999",
+                        "bench@example.com", "Ninguna", s["admin"]["dni"])
+    _delete_all(db, "Minorista", [dni])
+
+
+def _check_inserted(result, expected):
+    inserted, errores = result
+    if inserted != expected:
+        raise RuntimeError(f"Se insertaron {inserted} de {expected} clientes de prueba: {errores[:3]}")
+
+
+def _insert_many_minorista(db, s):
+    dnis = s["libres"][:_BATCH_ROWS]
+    admin = s["admin"]["dni"]
+    _check_inserted(db.insert_minorista_many(
+        [(d, "Benchmark", "Av. Prueba 1 - Lima", "999999999", "bench@example.com", "Ninguna", admin)
+         for d in dnis]), len(dnis))
+    _delete_all(db, "Minorista", dnis)
+
+
+def _insert_many_mayorista(db, s):
+    rucs = [_ruc_bench(d) for d in s["libres"][:_BATCH_ROWS]]
+    admin = s["admin"]["dni"]
+    _check_inserted(db.insert_mayorista_many(
+        [(r, "Benchmark S.A.C.", "Av. Prueba 1 - Lima", admin, "999999999", "bench@example.com")
+         for r in rucs]), len(rucs))
+    _delete_all(db, "Mayorista", rucs)
+
+
+def _iter_rows_clients(db, s):
+    query, params = db._clients_query()
+    return sum(len(batch) for batch in db.iter_rows(query, params, batch_size=1000))
+
+
+def _report_case(info, use_view):
+    if use_view:
+        sql = view_query(info)
+        return lambda db, s: strip_row_number(db.fetchall(sql))
+    return lambda db, s: db.fetchall(info["query"])
+
+
+def build_cases(db, s, include_writes=True, include_views=True):
+    cases = [
+        ("get_all_clients", lambda db, s: db.get_all_clients()),
+        ("get_all_clients(tipo=Minorista)", lambda db, s: db.get_all_clients(tipo="Minorista")),
+        ("get_all_clients(limit=500)", lambda db, s: db.get_all_clients(limit=500)),
+        ("get_all_clients(term)", lambda db, s: db.get_all_clients(term=s["termino"])),
+        ("search_clients(term)", lambda db, s: db.search_clients(s["termino"])),
+        ("get_clients_page", lambda db, s: db.get_clients_page()),
+        ("iter_rows(clientes)", _iter_rows_clients),
+    ]
+    if s["mayorista"]:
+        # una página desde el medio: con keyset cuesta lo mismo que la primera
+        cases.append(("get_clients_page(after)",
+                      lambda db, s: db.get_clients_page(after=("Mayorista", s["mayorista"]))))
+    for tipo in ("minorista", "mayorista", "corporativo"):
+        if s[tipo]:
+            cases.append((f"get_client_by_code({tipo})", lambda db, s, t=tipo: db.get_client_by_code(s[t])))
+    if s["admin"]:
+        cases.append(("validate_admin", lambda db, s: db.validate_admin(s["admin"]["usuario"],
+                                                                         s["admin"]["contrasena"])))
+        if include_writes:
+            cases.append(("insert_minorista+delete_clients", _insert_delete_minorista))
+            cases.append((f"insert_minorista_many({_BATCH_ROWS})+delete_clients",
+                          _insert_many_minorista))
+            cases.append((f"insert_mayorista_many({_BATCH_ROWS})+delete_clients",
+                          _insert_many_mayorista))
+    if include_writes and s["minorista"]:
+        cases.append(("update_minorista", lambda db, s: db.update_minorista(s["minorista"], preferencias=s["preferencias"])))
+
+    has_views = include_views and db.fetchone("SELECT to_regclass('report_refresh_state') AS t")["t"]
+    for name, info in REPORT_QUERIES.items():
+        cases.append((f"Reporte {name}", _report_case(info, False)))
+        if has_views and info.get("view"):
+            cases.append((f"Reporte {name} [vista]", _report_case(info, True)))
+    return cases
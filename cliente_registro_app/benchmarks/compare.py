@@ -0,0 +1,50 @@
+"""
+Comparación de resultados contra una línea base guardada
+
+Un caso es una regresión si su mediana empeora más que `threshold` (relativo,
+0.10 = 10%) y además más que `min_delta_ms` (para no alarmar por ruido en
+consultas de fracciones de milisegundo). `overrides` permite un umbral por caso.
+"""
+
+import json
+
+
+def load(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(results, baseline, threshold=0.10, min_delta_ms=1.0, overrides=None):
+    """
+    Devuelve una lista de dicts (caso, base_ms, actual_ms, cambio, estado) con
+    estado 'regresion' | 'mejora' | 'igual' | 'nuevo'.
+    """
+    overrides = overrides or {}
+    base = baseline.get("resultados", {})
+    rows = []
+    for name, current in results["resultados"].items():
+        now = current["mediana_ms"]
+        if name not in base:
+            rows.append({"caso": name, "base_ms": None, "actual_ms": now, "cambio": None, "estado": "nuevo"})
+            continue
+        before = base[name]["mediana_ms"]
+        change = (now - before) / before if before else 0.0
+        limit = overrides.get(name, threshold)
+        if change > limit and now - before > min_delta_ms:
+            estado = "regresion"
+        elif change < -limit and before - now > min_delta_ms:
+            estado = "mejora"
+        else:
+            estado = "igual"
+        rows.append({"caso": name, "base_ms": before, "actual_ms": now, "cambio": change, "estado": estado})
+    return rows
+
+
+def format_table(rows):
+    lines = []
+    for r in rows:
+        base = f"{r['base_ms']:10.2f}" if r["base_ms"] is not None else " " * 10
+        cambio = f"{r['cambio']:+7.1%}" if r["cambio"] is not None else " " * 7
+        marca = {"regresion": "  << REGRESIÓN", "mejora": "  mejora", "nuevo": "  (nuevo)"}.get(r["estado"], "")
+        lines.append(f"{base} {r['actual_ms']:10.2f} {cambio}  {r['caso']}{marca}")
+    return "\n".join([f"{'base ms':>10} {'actual ms':>10} {'cambio':>7}  caso"] + lines)
@@ -0,0 +1,296 @@
+"""
+Generador determinista de datos sintéticos para el esquema de clientes
+
+    python -m benchmarks.datagen --scale 100k --database registro_bench_100k --truncate
+
+La misma semilla produce siempre los mismos datos. Las filas se generan sobre
+la marcha y se cargan con COPY (sin armar listas en memoria), en una sola
+transacción. Los códigos son válidos para la app: DNI de 8 dígitos y RUC de 11
+con prefijo 20 y dígito verificador. Las direcciones tienen la forma
+"Av. Calle 123 - Ciudad" que usan los reportes con SPLIT_PART(..., '-', 2).
+
+DNI_contacto queda en NULL: la tabla Contacto no es parte del esquema que maneja
+la app y no sabemos sus columnas.
+"""
+
+import argparse
+import io
+import itertools
+import random
+import time
+from datetime import date, timedelta
+
+SCALES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+# Fecha de referencia fija de los contratos (activos / vencidos): con la fecha del
+# día los datos cambiarían de una corrida a otra aunque la semilla sea la misma
+REFERENCE_DATE = date(2025, 6, 30)
+
+# Reparto de clientes por tipo
+MIX = {"minorista": 0.70, "mayorista": 0.15, "corporativo": 0.15}
+
+_NOMBRES = ("José", "María", "Luis", "Ana", "Carlos", "Rosa", "Jorge", "Carmen", "Juan", "Lucía",
+            "Miguel", "Elena", "Pedro", "Sofía", "Diego", "Valeria", "Raúl", "Patricia", "César", "Gabriela")
+_APELLIDOS = ("Quispe", "Flores", "Sánchez", "Rodríguez", "García", "Rojas", "Huamán", "Mamani", "Chávez",
+              "Vásquez", "Ramírez", "Torres", "Mendoza", "Castillo", "Díaz", "Pérez", "Gutiérrez", "Vargas")
+_RUBROS = ("Comercial", "Distribuidora", "Inversiones", "Servicios", "Importaciones", "Textil", "Agroindustrial",
+           "Constructora", "Logística", "Alimentos", "Minera", "Tecnología")
+_NOMBRES_EMPRESA = ("Andina", "del Pacífico", "Los Olivos", "Inca", "San Martín", "Amazonas", "El Sol",
+                    "Santa Rosa", "Nor Oriente", "Miraflores", "La Victoria", "Sur Andino", "Costa Verde")
+_SOCIEDADES = ("S.A.C.", "S.A.", "E.I.R.L.", "S.R.L.")
+_VIAS = ("Av.", "Jr.", "Calle", "Psje.")
+_CALLES = ("Los Pinos", "Grau", "Bolognesi", "Arequipa", "Brasil", "Tacna", "Larco", "Pardo", "Salaverry",
+           "Próceres", "Las Flores", "San Juan", "Primavera", "Colonial", "Industrial")
+# Ciudades con peso decreciente (Lima concentra la mayoría, como en los datos reales)
+_CIUDADES = ("Lima", "Arequipa", "Trujillo", "Chiclayo", "Piura", "Cusco", "Huancayo", "Iquitos", "Tacna",
+             "Ica", "Puno", "Cajamarca", "Ayacucho", "Tarapoto", "Huaraz")
+_CIUDAD_PESOS = [1 / (i + 1) ** 1.2 for i in range(len(_CIUDADES))]
+_PREFERENCIAS = ("Ropa", "Electrónica", "Hogar", "Alimentos", "Calzado", "Deportes", "Libros", "Juguetes",
+                 "Belleza", "Ninguna")
+_PREFERENCIA_PESOS = [1 / (i + 1) for i in range(len(_PREFERENCIAS))]
+_DOMINIOS = ("gmail.com", "hotmail.com", "outlook.com", "yahoo.com")
+_CONTRATOS = ("Suministro mensual", "Distribución regional", "Servicio de mantenimiento", "Licencia anual",
+              "Campaña navideña", "Consultoría", "Transporte de carga", "Arrendamiento de equipos")
+
+# Meses de inicio de contrato: picos en diciembre y enero (campaña festiva)
+_MES_PESOS = [14, 6, 5, 5, 6, 6, 7, 6, 6, 7, 9, 18]
+# Contratos por cliente corporativo: la mayoría 1-2, algunos sin contrato
+_CONTRATOS_POR_CLIENTE = (0, 1, 2, 3, 4, 6)
+_CONTRATOS_PESOS = (10, 40, 25, 12, 8, 5)
+
+
+# ---------- Códigos ----------
+
+def _permute(i, modulo, a=48271, b=12345):
+    """Biyección i -> (a*i + b) mod modulo (a coprimo con modulo): códigos únicos y dispersos."""
+    return (a * i + b) % modulo
+
+
+def dni(i):
+    """i-ésimo DNI (10000000-89999999, único para i < 80 millones)."""
+    return str(10_000_000 + _permute(i, 80_000_000))
+
+
+def ruc(i):
+    """i-ésimo RUC de empresa: 20 + 8 dígitos + dígito verificador (módulo 11)."""
+    base = "20" + f"{_permute(i, 100_000_000):08d}"
+    total = sum(int(d) * w for d, w in zip(base, (5, 4, 3, 2, 7, 6, 5, 4, 3, 2)))
+    check = 11 - total % 11
+    return base + str({10: 0, 11: 1}.get(check, check))
+
+
+def admin_dni(i):
+    # rango aparte de los clientes (90000000-98999999)
+    return str(90_000_000 + i)
+
+
+# ---------- Generadores de filas (tuplas en el orden de columnas de COPY) ----------
+
+def _telefono(rnd):
+    return "9" + f"{rnd.randrange(100_000_000):08d}"
+
+
+def _direccion(rnd):
+    ciudad = rnd.choices(_CIUDADES, _CIUDAD_PESOS)[0]
+    return f"{rnd.choice(_VIAS)} {rnd.choice(_CALLES)} {rnd.randrange(1, 2000)} - {ciudad}"
+
+
+def _persona(rnd):
+    return f"{rnd.choice(_NOMBRES)} {rnd.choice(_APELLIDOS)} {rnd.choice(_APELLIDOS)}"
+
+
+def _empresa(rnd):
+    return f"{rnd.choice(_RUBROS)} {rnd.choice(_NOMBRES_EMPRESA)} {rnd.choice(_SOCIEDADES)}"
+
+
+def _correo(rnd, nombre, i):
+    usuario = nombre.split()[0].lower().encode("ascii", "ignore").decode() or "cliente"
+    return f"{usuario}{i}@{rnd.choice(_DOMINIOS)}"
+
+
+def admin_rows(n, seed):
+    rnd = random.Random(f"{seed}-admin")
+    for i in range(n):
+        nombre = _persona(rnd)
+        yield (admin_dni(i), nombre, f"admin{i:05d}", f"clave{i:05d}", _telefono(rnd), f"admin{i}@empresa.pe")
+
+
+def minorista_rows(n, admins, seed):
+    rnd = random.Random(f"{seed}-minorista")
+    for i in range(n):
+        nombre = _persona(rnd)
+        correo = _correo(rnd, nombre, i) if rnd.random() < 0.85 else None
+        preferencia = rnd.choices(_PREFERENCIAS, _PREFERENCIA_PESOS)[0]
+        yield (dni(i), nombre, _direccion(rnd), _telefono(rnd), correo, preferencia,
+               admin_dni(rnd.randrange(admins)))
+
+
+def mayorista_rows(n, admins, seed):
+    """(fila ClienteMayorista, fila DatosClienteMayorista o None)."""
+    rnd = random.Random(f"{seed}-mayorista")
+    for i in range(n):
+        codigo = ruc(i)
+        nombre = _empresa(rnd)
+        datos = None
+        if rnd.random() < 0.9:
+            datos = (codigo, _telefono(rnd) if rnd.random() < 0.9 else None,
+                     f"ventas{i}@{nombre.split()[0].lower().encode('ascii', 'ignore').decode()}.pe"
+                     if rnd.random() < 0.8 else None)
+        yield (codigo, nombre, _direccion(rnd), admin_dni(rnd.randrange(admins))), datos
+
+
+def corporativo_rows(n, offset, admins, seed, today):
+    """(fila ClienteCorporativo, fila DatosClienteCorporativo o None, [filas Contrato])."""
+    rnd = random.Random(f"{seed}-corporativo")
+    for i in range(n):
+        codigo = ruc(offset + i)   # a continuación de los RUC mayoristas: no se pisan
+        nombre = _empresa(rnd)
+        fila = (codigo, nombre, f"contacto{i}@corp.pe", None, admin_dni(rnd.randrange(admins)))
+        datos = None
+        if rnd.random() < 0.85:
+            datos = (codigo, _telefono(rnd) if rnd.random() < 0.9 else None,
+                     _direccion(rnd) if rnd.random() < 0.95 else None)
+        contratos = []
+        for _ in range(rnd.choices(_CONTRATOS_POR_CLIENTE, _CONTRATOS_PESOS)[0]):
+            # más contratos recientes que antiguos
+            anio = today.year - min(int(rnd.expovariate(0.5)), 9)
+            mes = rnd.choices(range(1, 13), _MES_PESOS)[0]
+            inicio = date(anio, mes, rnd.randrange(1, 29))
+            fin = inicio + timedelta(days=365 * rnd.choice((1, 1, 2, 3)))
+            # vencidos: casi siempre inactivos; vigentes: mayormente activos
+            activo = rnd.random() < (0.1 if fin < today else 0.8)
+            contratos.append((rnd.choice(_CONTRATOS), inicio, fin, "Activo" if activo else "Inactivo", codigo))
+        yield fila, datos, contratos
+
+
+# ---------- Carga con COPY ----------
+
+def _copy_value(v):
+    if v is None:
+        return "\\N"
+    return str(v).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+class _CopyStream(io.RawIOBase):
+    """Archivo de sólo lectura que produce formato texto de COPY a partir de un iterador de tuplas."""
+
+    def __init__(self, rows):
+        self._rows = iter(rows)
+        self._buffer = b""
+        self.count = 0
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            lines = ["\t".join(_copy_value(v) for v in row) + "\n"
+                     for row in itertools.islice(self._rows, 1000)]
+            if not lines:
+                break
+            self.count += len(lines)
+            self._buffer += "".join(lines).encode("utf-8")
+        if size < 0:
+            size = len(self._buffer)
+        chunk, self._buffer = self._buffer[:size], self._buffer[size:]
+        return chunk
+
+
+def _copy(cur, table, columns, rows):
+    stream = _CopyStream(rows)
+    cur.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", stream)
+    return stream.count
+
+
+_TABLES = ("Contrato", "DatosClienteCorporativo", "ClienteCorporativo", "DatosClienteMayorista",
+           "ClienteMayorista", "ClienteMinorista", "Administrador")
+
+
+def generate(db, clientes, seed=42, admins=None, truncate=False, today=REFERENCE_DATE, log=print):
+    """
+    Carga `clientes` clientes (repartidos según MIX) con sus datos y contratos.
+    truncate=True vacía antes las tablas de clientes y administradores.
+    Devuelve {tabla: filas cargadas}.
+    """
+    admins = admins or max(5, clientes // 2000)
+    n_min = int(clientes * MIX["minorista"])
+    n_may = int(clientes * MIX["mayorista"])
+    n_corp = clientes - n_min - n_may
+
+    # los generadores de dos tablas (cliente + datos/contratos) se recorren una vez
+    # por tabla: con la misma semilla producen las mismas filas, así cada COPY
+    # consume su parte sobre la marcha en lugar de guardar las dependientes en listas
+    def mayoristas():
+        return mayorista_rows(n_may, admins, seed)
+
+    def corporativos():
+        return corporativo_rows(n_corp, n_may, admins, seed, today)
+
+    counts = {}
+    start = time.perf_counter()
+    slow_ms, db.stats.slow_ms = db.stats.slow_ms, None   # cada COPY es "lento" a propósito
+    try:
+        with db.connection() as conn:
+            with conn.cursor() as cur:
+                if truncate:
+                    cur.execute(f"TRUNCATE {', '.join(_TABLES)} CASCADE")
+                steps = [
+                    ("Administrador", ("DNI", "Nombre_Apellido", "Usuario", "Contrasena", "Telefono", "Correo"),
+                     lambda: admin_rows(admins, seed)),
+                    ("ClienteMinorista", ("DNI", "Nombre_Apellido", "Direccion", "Telefono", "Correo", "Preferencias",
+                                          "DNI_administrador"), lambda: minorista_rows(n_min, admins, seed)),
+                    ("ClienteMayorista", ("RUC", "Razon_Social", "Direccion_Fiscal", "DNI_administrador"),
+                     lambda: (fila for fila, _ in mayoristas())),
+                    ("DatosClienteMayorista", ("RUC_Mayorista", "Telefono", "Correo"),
+                     lambda: (datos for _, datos in mayoristas() if datos)),
+                    ("ClienteCorporativo", ("RUC", "Razon_Social", "Correo", "DNI_contacto", "DNI_administrador"),
+                     lambda: (fila for fila, _, _ in corporativos())),
+                    ("DatosClienteCorporativo", ("RUC_Corporativo", "Telefono", "Direccion_Fiscal"),
+                     lambda: (datos for _, datos, _ in corporativos() if datos)),
+                    ("Contrato", ("Descripcion", "Fecha_inicio", "Fecha_vencimiento", "Estado", "RUC_Corporativo"),
+                     lambda: (c for _, _, cts in corporativos() for c in cts)),
+                ]
+                for table, columns, rows in steps:
+                    counts[table] = _copy(cur, table, columns, rows())
+                    log(f"{table}: {counts[table]:,} filas ({time.perf_counter() - start:.1f} s)")
+            conn.commit()
+            with conn.cursor() as cur:
+                for table in _TABLES:
+                    cur.execute(f"ANALYZE {table}")
+            conn.commit()
+    finally:
+        db.stats.slow_ms = slow_ms
+    # la carga no pasa por execute(): avisar a la caché de resultados
+    db.invalidate_cache()
+    return counts
+
+
+def main(argv=None):
+    from db_cli import add_connection_args, db_from_args
+
+    parser = argparse.ArgumentParser(description="Genera y carga clientes sintéticos (COPY).")
+    size = parser.add_mutually_exclusive_group(required=True)
+    size.add_argument("--scale", choices=SCALES)
+    size.add_argument("--clientes", type=int)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--admins", type=int, help="por defecto uno cada 2000 clientes (mínimo 5)")
+    parser.add_argument("--truncate", action="store_true",
+                        help="vaciar antes las tablas (¡borra todos los clientes!)")
+    add_connection_args(parser)
+    args = parser.parse_args(argv)
+
+    clientes = SCALES[args.scale] if args.scale else args.clientes
+    db = db_from_args(args)
+    try:
+        start = time.perf_counter()
+        counts = generate(db, clientes, seed=args.seed, admins=args.admins, truncate=args.truncate)
+        elapsed = time.perf_counter() - start
+        total = sum(counts.values())
+        print(f"{total:,} filas en {elapsed:.1f} s ({total / elapsed * 60:,.0f} filas/min)")
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,138 @@
+"""
+Corre los casos de benchmarks/cases.py y guarda los tiempos en JSON.
+
+    python -m benchmarks.run --scale 10k --database registro_bench_10k --generate
+    python -m benchmarks.run --scale 1m --database registro_bench_1m \\
+        --baseline bench_1m_base.json --threshold 0.15 --threshold-case "get_all_clients=0.3"
+
+Sale con código 1 si hay regresiones respecto de --baseline. La caché de
+resultados de DBController se deja apagada: se mide la BD, no la caché.
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+
+from db_cli import add_connection_args, db_from_args
+
+from benchmarks.cases import build_cases, sample
+from benchmarks.compare import compare, format_table, load
+from benchmarks.datagen import SCALES, generate
+
+
+def time_case(fn, db, s, warmup=2, reps=10):
+    """Milisegundos de cada repetición (las de calentamiento se descartan)."""
+    for _ in range(warmup):
+        fn(db, s)
+    times = []
+    for _ in range(reps):
+        start = time.perf_counter()
+        fn(db, s)
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def summarize(times):
+    ordered = sorted(times)
+    return {
+        "reps": len(times),
+        "min_ms": round(ordered[0], 3),
+        "mediana_ms": round(statistics.median(ordered), 3),
+        "media_ms": round(statistics.fmean(ordered), 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        "max_ms": round(ordered[-1], 3),
+        "desvio_ms": round(statistics.pstdev(ordered), 3),
+    }
+
+
+def table_counts(db):
+    tables = ("Administrador", "ClienteMinorista", "ClienteMayorista", "DatosClienteMayorista",
+              "ClienteCorporativo", "DatosClienteCorporativo", "Contrato")
+    return {t: db.fetchone(f"SELECT COUNT(*) AS n FROM {t}")["n"] for t in tables}
+
+
+def run(db, scale, warmup=2, reps=10, only=None, include_writes=True, log=print):
+    s = sample(db)
+    counts = table_counts(db)
+    results = {
+        "meta": {
+            "fecha": datetime.now().isoformat(timespec="seconds"),
+            "escala": scale,
+            "clientes": counts["ClienteMinorista"] + counts["ClienteMayorista"] + counts["ClienteCorporativo"],
+            "tablas": counts,
+            "postgres": db.fetchone("SHOW server_version")["server_version"],
+            "python": platform.python_version(),
+            "warmup": warmup,
+            "reps": reps,
+        },
+        "resultados": {},
+    }
+    for name, fn in build_cases(db, s, include_writes=include_writes):
+        if only and not any(o.lower() in name.lower() for o in only):
+            continue
+        stats = summarize(time_case(fn, db, s, warmup, reps))
+        results["resultados"][name] = stats
+        log(f"{stats['mediana_ms']:10.2f} ms  (p95 {stats['p95_ms']:.2f})  {name}")
+    return results
+
+
+def _parse_overrides(values):
+    overrides = {}
+    for v in values or []:
+        name, _, limit = v.rpartition("=")
+        overrides[name] = float(limit)
+    return overrides
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de DBController y reportes.")
+    parser.add_argument("--scale", choices=SCALES, required=True,
+                        help="tamaño cargado en la BD (se registra en el resultado)")
+    parser.add_argument("--generate", action="store_true",
+                        help="vaciar la BD y cargar datos sintéticos de la escala antes de medir")
+    parser.add_argument("--seed", type=int, default=42, help="semilla de --generate")
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--reps", type=int, default=10)
+    parser.add_argument("--only", action="append", help="sólo casos cuyo nombre contenga este texto")
+    parser.add_argument("--no-writes", action="store_true", help="omitir los casos que escriben")
+    parser.add_argument("--output", help="archivo JSON de salida (por defecto bench_<escala>.json)")
+    parser.add_argument("--baseline", help="JSON de una corrida anterior para comparar")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="empeoramiento relativo de la mediana tolerado (0.10 = 10%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0,
+                        help="diferencia absoluta mínima para considerar regresión")
+    parser.add_argument("--threshold-case", action="append", metavar="CASO=UMBRAL",
+                        help="umbral propio para un caso (repetible)")
+    add_connection_args(parser)
+    args = parser.parse_args(argv)
+
+    db = db_from_args(args, pooled=False)
+    try:
+        if args.generate:
+            generate(db, SCALES[args.scale], seed=args.seed, truncate=True)
+        results = run(db, args.scale, args.warmup, args.reps, args.only, not args.no_writes)
+    finally:
+        db.close()
+
+    output = args.output or f"bench_{args.scale}.json"
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"Resultados en {output}")
+
+    if args.baseline:
+        rows = compare(results, load(args.baseline), args.threshold, args.min_delta_ms,
+                       _parse_overrides(args.threshold_case))
+        print(format_table(rows))
+        regresiones = [r for r in rows if r["estado"] == "regresion"]
+        if regresiones:
+            print(f"{len(regresiones)} regresiones", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
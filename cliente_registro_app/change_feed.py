@@ -0,0 +1,190 @@
+"""
+Aviso inmediato de cambios de clientes (LISTEN/NOTIFY)
+
+La migración 006 hace que el trigger de cliente_cambios (client_changes.py)
+además avise por el canal CHANNEL, con un JSON por sentencia:
+
+    {"tabla": "clienteminorista", "tipo": "Minorista", "op": "UPDATE",
+     "codigos": ["12345678", ...]}
+
+"codigos" es null en un TRUNCATE o si la sentencia tocó más de MAX_CODES
+clientes (el mensaje de NOTIFY tiene un tope de 8000 bytes): quien escucha
+recarga ese tipo entero. Postgres entrega los avisos recién al confirmar la
+transacción, así que nunca llegan cambios que después se deshacen.
+
+ClientChangeFeed escucha en una conexión propia desde un hilo que espera en
+select() sobre el socket (no consulta la BD periódicamente) y entrega cada
+tanda de avisos en el hilo de Tk a través del loop de TkAsyncBridge.
+"""
+
+import json
+import logging
+import select
+import threading
+
+import psycopg2
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "cliente_cambios"
+
+# Códigos por aviso; más que esto y el aviso va sin códigos (recargar el tipo)
+MAX_CODES = 200
+
+# Igual que en la migración 005, pero junta los códigos anotados y los avisa
+_NOTIFY_FN = f"""
+CREATE OR REPLACE FUNCTION registrar_cambios_clientes() RETURNS trigger AS $$
+DECLARE
+    codigos text[];
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        WITH c AS (
+            INSERT INTO cliente_cambios (tipo, codigo, op)
+            SELECT DISTINCT TG_ARGV[0], to_jsonb(n) ->> TG_ARGV[1], TG_OP FROM nuevas n
+            RETURNING codigo)
+        SELECT array_agg(codigo) INTO codigos FROM c;
+    ELSIF TG_OP = 'UPDATE' THEN
+        WITH c AS (
+            INSERT INTO cliente_cambios (tipo, codigo, op)
+            SELECT TG_ARGV[0], codigo, CASE WHEN bool_or(nueva) THEN 'UPDATE' ELSE 'DELETE' END
+            FROM (SELECT to_jsonb(n) ->> TG_ARGV[1] AS codigo, true AS nueva FROM nuevas n
+                  UNION ALL
+                  SELECT to_jsonb(v) ->> TG_ARGV[1], false FROM viejas v) c
+            GROUP BY codigo
+            RETURNING codigo)
+        SELECT array_agg(codigo) INTO codigos FROM c;
+    ELSIF TG_OP = 'DELETE' THEN
+        WITH c AS (
+            INSERT INTO cliente_cambios (tipo, codigo, op)
+            SELECT DISTINCT TG_ARGV[0], to_jsonb(v) ->> TG_ARGV[1], TG_OP FROM viejas v
+            RETURNING codigo)
+        SELECT array_agg(codigo) INTO codigos FROM c;
+    ELSE
+        INSERT INTO cliente_cambios (tipo, codigo, op) VALUES (TG_ARGV[0], '', TG_OP);
+    END IF;
+    IF TG_OP = 'TRUNCATE' OR codigos IS NOT NULL THEN
+        PERFORM pg_notify('{CHANNEL}', json_build_object(
+            'tabla', TG_TABLE_NAME, 'tipo', TG_ARGV[0], 'op', TG_OP,
+            'codigos', CASE WHEN cardinality(codigos) <= {MAX_CODES} THEN codigos END)::text);
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+
+def migration_statements():
+    """Sentencias de la migración que agrega el NOTIFY al registro de cambios."""
+    return [_NOTIFY_FN]
+
+
+def changed_tables(changes):
+    """Tablas tocadas por una tanda de avisos (None = no se sabe, todas)."""
+    tables = set()
+    for change in changes:
+        if not change.get("tabla"):
+            return None
+        tables.add(change["tabla"])
+    return tables
+
+
+class ClientChangeFeed:
+    """
+    Escucha CHANNEL y llama a los listeners con la lista de avisos (dicts como
+    el del encabezado) en el hilo de Tk. Antes de avisar descarta de la caché
+    de resultados del DBController lo que leía las tablas cambiadas.
+
+    Si la conexión se cae se reconecta; los cambios del intervalo se perdieron,
+    así que se avisa [RESYNC] (tabla/tipo/codigos en None: recargar todo).
+    """
+
+    RESYNC = {"tabla": None, "tipo": None, "op": None, "codigos": None}
+
+    def __init__(self, db, bridge, timeout=5, retry_delay=5):
+        self.db = db
+        self.bridge = bridge
+        self.timeout = timeout          # cada cuánto se mira si hay que parar
+        self.retry_delay = retry_delay
+        self._listeners = []
+        self._stop = threading.Event()
+        self._thread = None
+        self._conn = None
+
+    def add_listener(self, callback):
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _dispatch(self, changes):
+        """En el hilo de Tk (loop del bridge)."""
+        tables = changed_tables(changes)
+        self.db.invalidate_cache(tables)
+        for callback in list(self._listeners):
+            try:
+                callback(changes)
+            except Exception:
+                logger.exception("Error al aplicar cambios de clientes")
+
+    def _deliver(self, changes):
+        self.bridge.loop.call_soon_threadsafe(self._dispatch, changes)
+
+    def _listen(self):
+        conn = self.db._connect()
+        conn.set_session(autocommit=True)
+        with conn.cursor() as cur:
+            cur.execute(f"LISTEN {CHANNEL}")
+        return conn
+
+    def _close_conn(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+    def _loop(self):
+        lost = False
+        while not self._stop.is_set():
+            try:
+                if self._conn is None:
+                    self._conn = self._listen()
+                    if lost:
+                        self._deliver([dict(self.RESYNC)])
+                        lost = False
+                if select.select([self._conn], [], [], self.timeout) == ([], [], []):
+                    continue
+                self._conn.poll()
+                changes = []
+                while self._conn.notifies:
+                    notify = self._conn.notifies.pop(0)
+                    try:
+                        changes.append(json.loads(notify.payload))
+                    except ValueError:
+                        changes.append(dict(self.RESYNC))
+                if changes:
+                    self._deliver(changes)
+            except (psycopg2.Error, OSError) as e:
+                if self._stop.is_set():
+                    break
+                logger.warning("Se perdió la escucha de cambios de clientes, se reintenta en %ss: %s",
+                               self.retry_delay, e)
+                self._close_conn()
+                lost = True
+                self._stop.wait(self.retry_delay)
+        self._close_conn()
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="cambios-clientes", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(self.timeout + 1 if timeout is None else timeout)
+            self._thread = None
@@ -0,0 +1,112 @@
+"""
+Registro de cambios de clientes (para la sincronización incremental)
+
+Los triggers de las tablas de clientes anotan en cliente_cambios el tipo y el
+código de cada cliente insertado, modificado o borrado, junto con el xid de la
+transacción que lo hizo. Quien guarda una copia del listado (local_cache.py)
+pide sólo los cambios desde su última sincronización y vuelve a leer esos
+clientes.
+
+La marca de sincronización es el xmin del snapshot (no el último seq): un seq
+menor puede confirmarse después que uno mayor, pero toda transacción con xid
+menor que xmin ya terminó. Los cambios de transacciones con xid >= xmin se
+vuelven a leer en la sincronización siguiente (releer un cliente no hace daño).
+"""
+
+# tabla -> (tipo de cliente, columna con el código)
+CLIENT_TABLES = {
+    "clienteminorista": ("Minorista", "dni"),
+    "clientemayorista": ("Mayorista", "ruc"),
+    "datosclientemayorista": ("Mayorista", "ruc_mayorista"),
+    "clientecorporativo": ("Corporativo", "ruc"),
+    "datosclientecorporativo": ("Corporativo", "ruc_corporativo"),
+}
+
+_LOG_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS cliente_cambios (
+        seq bigserial PRIMARY KEY,
+        tipo text NOT NULL,
+        codigo text NOT NULL,
+        op text NOT NULL,
+        xid bigint NOT NULL DEFAULT txid_current(),
+        cambiado_en timestamptz NOT NULL DEFAULT now()
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_cliente_cambios_xid ON cliente_cambios (xid)",
+]
+
+# Un trigger por sentencia con tablas de transición: una carga masiva escribe
+# una fila por cliente sin disparar un trigger por fila. TG_ARGV = (tipo, columna).
+# En un UPDATE que cambia el código, el código viejo queda como DELETE.
+# TRUNCATE no tiene filas: se anota con código '' y obliga a recargar todo.
+_TRIGGER_FN = """
+CREATE OR REPLACE FUNCTION registrar_cambios_clientes() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO cliente_cambios (tipo, codigo, op)
+        SELECT DISTINCT TG_ARGV[0], to_jsonb(n) ->> TG_ARGV[1], TG_OP FROM nuevas n;
+    ELSIF TG_OP = 'UPDATE' THEN
+        INSERT INTO cliente_cambios (tipo, codigo, op)
+        SELECT TG_ARGV[0], codigo, CASE WHEN bool_or(nueva) THEN 'UPDATE' ELSE 'DELETE' END
+        FROM (SELECT to_jsonb(n) ->> TG_ARGV[1] AS codigo, true AS nueva FROM nuevas n
+              UNION ALL
+              SELECT to_jsonb(v) ->> TG_ARGV[1], false FROM viejas v) c
+        GROUP BY codigo;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO cliente_cambios (tipo, codigo, op)
+        SELECT DISTINCT TG_ARGV[0], to_jsonb(v) ->> TG_ARGV[1], TG_OP FROM viejas v;
+    ELSE
+        INSERT INTO cliente_cambios (tipo, codigo, op) VALUES (TG_ARGV[0], '', TG_OP);
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+_TRIGGERS = {
+    "ins": "AFTER INSERT ON {table} REFERENCING NEW TABLE AS nuevas",
+    "upd": "AFTER UPDATE ON {table} REFERENCING OLD TABLE AS viejas NEW TABLE AS nuevas",
+    "del": "AFTER DELETE ON {table} REFERENCING OLD TABLE AS viejas",
+    "trunc": "AFTER TRUNCATE ON {table}",
+}
+
+
+def migration_statements():
+    """Sentencias de la migración que crea cliente_cambios y sus triggers."""
+    statements = _LOG_DDL + [_TRIGGER_FN]
+    for table, (tipo, column) in CLIENT_TABLES.items():
+        for suffix, event in _TRIGGERS.items():
+            name = f"trg_cambios_{suffix}"
+            statements += [
+                f"DROP TRIGGER IF EXISTS {name} ON {table}",
+                f"CREATE TRIGGER {name} {event.format(table=table)} "
+                f"FOR EACH STATEMENT EXECUTE FUNCTION registrar_cambios_clientes('{tipo}', '{column}')",
+            ]
+    return statements
+
+
+def current_xmin(db):
+    """Marca de sincronización: toda transacción con xid menor ya terminó."""
+    return db.fetchone("SELECT txid_snapshot_xmin(txid_current_snapshot()) AS xmin")["xmin"]
+
+
+def changes_since(db, xmin):
+    """
+    Clientes cambiados por transacciones con xid >= xmin: lista de (tipo, codigo)
+    y si hubo un TRUNCATE (entonces hay que recargar todo).
+    """
+    rows = db.fetchall(
+        "SELECT DISTINCT tipo, codigo, op = 'TRUNCATE' AS truncado FROM cliente_cambios WHERE xid >= %s",
+        (xmin,))
+    truncated = any(r["truncado"] for r in rows)
+    return [(r["tipo"], r["codigo"]) for r in rows if not r["truncado"]], truncated
+
+
+def prune(db, days=60):
+    """
+    Borra los cambios de más de `days` días (quien sincronice después de eso
+    recarga todo). La app lo corre al iniciar y una vez por día en el TaskRunner;
+    también está `python migrations.py prune-changes`.
+    """
+    db.execute("DELETE FROM cliente_cambios WHERE cambiado_en < now() - make_interval(days => %s)", (days,))
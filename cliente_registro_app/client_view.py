@@ -1,8 +1,14 @@
+import bisect
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
 from datetime import datetime
 from db_controller import DBController
+from import_view import ImportView
+from search_index import SearchIndex, normalize
+from virtual_tree import VirtualTreeview
 from styles import Colors, Fonts
+from task_runner import run_task
+from validators import validar_codigo, validar_dni_admin, validar_dni_contacto
 
 # Normalizamos los tipos que usará la UI/DB
 CLIENT_TYPES = {
@@ -12,12 +18,83 @@ CLIENT_TYPES = {
     "TODOS": "Todos"
 }
 
+SEARCH_PLACEHOLDER = "Búsqueda R"
+
+
+def _client_pair(c):
+    """(tipo, código): el mismo RUC puede ser cliente mayorista y corporativo."""
+    return (c['tipo'], str(c['codigo']))
+
+
+def _client_key(c):
+    return "|".join(_client_pair(c))
+
+
+def merge_clients(rows, changed, fresh, term="", until=None):
+    """
+    rows con los clientes de `changed` (pares (tipo, código)) reemplazados por
+    sus filas de `fresh`; los que no vienen, se borraron. Las altas se ubican
+    por (tipo, codigo) como el listado paginado, sin pasar de `until` (última
+    fila de la última página cargada); con término de búsqueda van al final si
+    lo contienen.
+    """
+    pending = {}
+    for r in fresh:
+        pending.setdefault(_client_pair(r), []).append(r)
+    merged = []
+    replaced = set()
+    for r in rows:
+        pair = _client_pair(r)
+        if pair in changed:
+            # la fila puede venir repetida (LEFT JOIN): se reemplazan todas juntas
+            if pair not in replaced:
+                replaced.add(pair)
+                merged.extend(pending.pop(pair, ()))
+            continue
+        merged.append(r)
+    added = [r for pair in sorted(pending) for r in pending[pair]]
+    if term:
+        term = normalize(term)
+        return merged + [r for r in added if term in normalize(r['codigo']) or term in normalize(r['nombre'])]
+    keys = [_client_pair(r) for r in merged]
+    for r in added:
+        k = _client_pair(r)
+        if until is not None and k > (until[0], str(until[1])):
+            continue   # llega con su página
+        i = bisect.bisect(keys, k)
+        keys.insert(i, k)
+        merged.insert(i, r)
+    return merged
+
 
 class ClientView:
-    def __init__(self, parent, db: DBController, admin_dni=None):
+    def __init__(self, parent, db: DBController, admin_dni=None, tasks=None, local_search=False,
+                 client_cache=None, change_feed=None):
         self.parent = parent
         self.db = db
         self.admin_dni = admin_dni
+        self.tasks = tasks   # TaskRunner de la app (None = consultas en el hilo de Tk)
+        # local_search: se trae el listado completo una vez y la búsqueda se resuelve
+        # en memoria (SearchIndex) sin volver a la BD en cada tecla
+        self.local_search = local_search
+        self._index = None
+        # copia local del listado (LocalClientCache): se muestra al instante y se
+        # sincroniza en segundo plano
+        self.client_cache = client_cache
+        # avisos de cambios de otras sesiones (ClientChangeFeed): se releen sólo
+        # los clientes cambiados; _changed_codes = pares (tipo, código) pedidos y aún sin aplicar
+        self.change_feed = change_feed
+        self._changed_codes = set()
+        # pipeline de búsqueda: after pendiente (debounce), término ya pedido y
+        # número de la última carga (sólo se muestra el resultado de ésa)
+        self._search_after = None
+        self._applied_term = None
+        self._load_seq = 0
+        # listado sin búsqueda por páginas: (tipo, codigo) desde donde sigue la
+        # página siguiente (None = no hay más) y filtro con el que se paginó
+        self._next_after = None
+        self._page_loading = False
+        self._paged_filter = None
         self.client_type = tk.StringVar(value="")   # valores: 'minorista','mayorista','corporativo'
         self.selected_filter = "Todos"
         self.search_term = tk.StringVar()
@@ -30,6 +107,11 @@ class ClientView:
         # Crear widgets de la UI
         self.create_widgets()
 
+        if self.change_feed is not None:
+            self.change_feed.add_listener(self._on_client_changes)
+            self.main_frame.bind(
+                '<Destroy>', lambda e: self.change_feed.remove_listener(self._on_client_changes), add="+")
+
         # Cargar datos iniciales
         self.load_data_from_db()
 
@@ -74,9 +156,12 @@ class ClientView:
         )
         self.search_entry.pack(side=tk.LEFT, padx=(5, 0))
         # placeholder simple
-        self.search_entry.insert(0, "Búsqueda R")
-        self.search_entry.bind('<FocusIn>', lambda e: self.clear_placeholder(e, "Búsqueda R"))
-        self.search_entry.bind('<KeyRelease>', lambda e: self.load_data_from_db())
+        self.search_entry.insert(0, SEARCH_PLACEHOLDER)
+        self.search_entry.bind('<FocusIn>', lambda e: self.clear_placeholder(e, SEARCH_PLACEHOLDER))
+        self.search_entry.bind('<KeyRelease>', self.on_search_key)
+        self.search_entry.bind('<Destroy>', lambda e: self._cancel_pending_search(), add="+")
+        if self.tasks is not None:
+            self.tasks.busy_indicator(search_frame).pack(side=tk.LEFT, padx=(5, 0))
 
         # Botón Nuevo
         new_btn = tk.Button(
@@ -126,6 +211,22 @@ class ClientView:
         )
         delete_btn.pack(side=tk.LEFT, padx=5)
 
+        # Botón Importar (carga masiva desde CSV/XLSX)
+        import_btn = tk.Button(
+            controls_frame,
+            text="Importar",
+            font=Fonts.BUTTON,
+            bg=Colors.BACKGROUND,
+            fg=Colors.TEXT,
+            relief=tk.RAISED,
+            bd=0,
+            padx=15,
+            pady=5,
+            cursor="hand2",
+            command=self.show_import_window
+        )
+        import_btn.pack(side=tk.LEFT, padx=5)
+
         # Panel izquierdo para filtro de tipo
         content_frame = tk.Frame(self.main_frame, bg=Colors.SURFACE)
         content_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
@@ -181,8 +282,12 @@ class ClientView:
         table_frame.pack(fill=tk.BOTH, expand=True)
 
         columns = ('codigo', 'nombre', 'tipo', 'telefono', 'correo')
-        self.tree = ttk.Treeview(
+        # sólo se crean items para las filas visibles (ver virtual_tree.py)
+        self.tree = VirtualTreeview(
             table_frame,
+            values=self._client_values,
+            key=_client_key,
+            on_near_end=self._load_next_page,
             columns=columns,
             show='headings',
             height=15
@@ -225,43 +330,224 @@ class ClientView:
     # ------------------- CRUD -------------------
     def load_data_from_db(self):
         """Carga clientes desde BD y muestra en la tabla"""
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        self._cancel_pending_search()
+        term = self._search_text()
+        self._applied_term = term
+        self._load_seq += 1
+        seq = self._load_seq
+        on_error = lambda e: messagebox.showerror("Error BD", f"No se pudo obtener clientes: {e}")
+        self._next_after = None
+        self._page_loading = False
+        if self.tasks is not None:
+            self.tasks.cancel("clientes_pagina")
+
+        if self.local_search:
+            self._paged_filter = None
+            run_task(self.tasks, "clientes", self._load_index, self.selected_filter,
+                     on_done=lambda index: self._set_index(seq, index), on_error=on_error)
+            return
 
-        try:
-            clients = self.db.get_all_clients()
-        except Exception as e:
-            messagebox.showerror("Error BD", f"No se pudo obtener clientes: {e}")
+        # filtro por tipo y búsqueda se resuelven en la BD; una carga nueva
+        # reemplaza a la que siga en curso (p.ej. al seguir tecleando).
+        if not term:
+            # sin búsqueda: la primera página y las demás al acercarse al final. Al
+            # recargar el mismo listado se piden tantas filas como había cargadas,
+            # para no perder la posición
+            limit = self.db.CLIENT_PAGE_SIZE
+            if self._paged_filter == self.selected_filter:
+                limit = max(limit, len(self.tree.source))
+            self._request_page(seq, None, limit, on_error)
+            if self.client_cache is not None:
+                self._sync_cache(seq)
             return
 
-        term = self.search_term.get().strip().lower()
+        # con término, la búsqueda aproximada (sin acentos, ordenada por parecido)
+        self._paged_filter = None
+        run_task(self.tasks, "clientes", self.db.search_clients, term=term, tipo=self.selected_filter,
+                 on_done=lambda clients: self._show_if_current(seq, clients), on_error=on_error)
 
-        for c in clients:
-            tipo = c.get('tipo', '')
-            codigo = str(c.get('codigo', '') or '')
-            nombre = c.get('nombre', '')
-            correo = c.get('correo', '') or ''
-            telefono = c.get('telefono', '') or ''
+    def _page_source(self):
+        """
+        get_clients_page de la copia local si ya se sincronizó alguna vez (las
+        páginas salen del archivo, sin ir a la BD) y si no, de la BD. Las dos
+        ordenan por (tipo, codigo), así que se puede seguir paginando de una a otra.
+        """
+        if self.client_cache is not None and self.client_cache.synced_at() is not None:
+            return self.client_cache.load_page
+        return self.db.get_clients_page
+
+    def _request_page(self, seq, after, limit, on_error):
+        def failed(e):
+            if seq == self._load_seq:
+                self._page_loading = False
+                on_error(e)
+
+        self._page_loading = True
+        # la primera página reemplaza a cualquier carga en curso; las siguientes
+        # van con otra clave para no cancelar una recarga
+        run_task(self.tasks, "clientes" if after is None else "clientes_pagina",
+                 self._page_source(), after, limit, self.selected_filter,
+                 on_done=lambda rows: self._show_page(seq, after, limit, rows), on_error=failed)
+
+    def _show_page(self, seq, after, limit, rows):
+        if seq != self._load_seq:
+            return
+        self._page_loading = False
+        self._next_after = (rows[-1]['tipo'], rows[-1]['codigo']) if len(rows) == limit else None
+        if after is None:
+            self._paged_filter = self.selected_filter
+            self._show_clients(rows)
+        else:
+            self.tree.append_rows(rows)
 
-            # filtro por tipo si se seleccionó algo distinto de "Todos"
-            if self.selected_filter != "Todos" and tipo.lower() != self.selected_filter.lower():
-                continue
+    def _sync_cache(self, seq):
+        """
+        Sincroniza la copia local en segundo plano; si cambió algo se vuelven a
+        pedir (ya de la copia) las páginas cargadas, sin perder la posición.
+        """
+        def synced(result):
+            if seq != self._load_seq:
+                return
+            if result["completa"] or result["cambiados"] or result["borrados"]:
+                if self.tasks is not None:
+                    self.tasks.cancel("clientes_pagina")
+                limit = max(self.db.CLIENT_PAGE_SIZE, len(self.tree.source))
+                # si falla (p.ej. archivo bloqueado) sigue lo que ya se mostraba
+                self._request_page(seq, None, limit, on_error=lambda e: None)
+
+        # si falla (p.ej. sin conexión) se sigue mostrando la copia local
+        run_task(self.tasks, "sync_clientes", self.client_cache.sync, on_done=synced, on_error=lambda e: None)
+
+    def _load_next_page(self):
+        """on_near_end de la tabla: pide la página siguiente si hay y no se está pidiendo."""
+        if self._next_after is None or self._page_loading:
+            return
+        self._request_page(self._load_seq, self._next_after, self.db.CLIENT_PAGE_SIZE,
+                           lambda e: messagebox.showerror("Error BD", f"No se pudo obtener clientes: {e}"))
 
-            if term:
-                if term not in codigo.lower() and term not in (nombre or '').lower():
-                    continue
+    def _load_index(self, tipo):
+        """Listado completo del tipo + su índice (corre en el TaskRunner)."""
+        if self.client_cache is not None:
+            try:
+                self.client_cache.sync()
+            except Exception:
+                if self.client_cache.synced_at() is None:
+                    raise
+            return SearchIndex(self.client_cache.load(tipo))
+        return SearchIndex(self.db.get_all_clients(tipo=tipo))
+
+    def _set_index(self, seq, index):
+        if seq != self._load_seq:
+            return
+        self._index = index
+        # se filtra con el término actual: el usuario pudo seguir tecleando mientras cargaba
+        self._applied_term = self._search_text()
+        self._show_clients(index.search(self._applied_term))
+
+    def _show_if_current(self, seq, clients):
+        """Descarta resultados de cargas ya reemplazadas por otra más nueva."""
+        if seq == self._load_seq:
+            self._show_clients(clients)
+
+    # ------------------- CAMBIOS DE OTRAS SESIONES -------------------
+    def _shows_tipo(self, tipo):
+        return self.selected_filter.lower() in ("todos", str(tipo).lower())
+
+    def _on_client_changes(self, changes):
+        """Avisos del ChangeFeed: relee sólo los clientes cambiados y los mezcla en la tabla."""
+        changes = [c for c in changes if c.get("tipo") is None or self._shows_tipo(c["tipo"])]
+        if not changes:
+            return
+        if any(c.get("codigos") is None for c in changes):
+            # TRUNCATE, carga masiva o escucha reconectada: no se sabe qué cambió
+            self.load_data_from_db()
+            return
+        for c in changes:
+            self._changed_codes.update((c["tipo"], str(codigo)) for codigo in c["codigos"])
+        seq = self._load_seq
+        changed = set(self._changed_codes)
+        # un aviso nuevo reemplaza al pedido en curso y relee también sus códigos
+        run_task(self.tasks, "clientes_cambios", self.db.get_clients_by_codes, {codigo for _, codigo in changed},
+                 on_done=lambda rows: self._apply_client_changes(seq, changed, rows),
+                 on_error=lambda e: None)
+
+    def _apply_client_changes(self, seq, changed, rows):
+        self._changed_codes -= changed
+        if seq != self._load_seq:
+            return   # una carga posterior ya trae los cambios
+        # el mismo RUC puede ser de otro tipo: sólo cuentan los (tipo, código) avisados
+        fresh = [r for r in rows if _client_pair(r) in changed and self._shows_tipo(r['tipo'])]
+        if self.local_search:
+            if self._index is None:
+                return
+            merged = merge_clients(self._index.rows, changed, fresh)
+            run_task(self.tasks, "clientes", SearchIndex, merged,
+                     on_done=lambda index: self._set_index(seq, index), on_error=lambda e: None)
+            return
+        self._show_clients(merge_clients(self.tree.source.rows, changed, fresh, self._applied_term,
+                                         until=self._next_after))
+
+    # ------------------- BÚSQUEDA -------------------
+    # Milisegundos sin teclear antes de buscar (en memoria alcanza una pausa menor)
+    SEARCH_DEBOUNCE_MS = 250
+    LOCAL_SEARCH_DEBOUNCE_MS = 60
+
+    def _search_text(self):
+        """Término de búsqueda (vacío mientras se muestra el placeholder)."""
+        term = self.search_term.get().strip()
+        return "" if term == SEARCH_PLACEHOLDER else term
+
+    def _cancel_pending_search(self):
+        if self._search_after is not None:
+            try:
+                self.search_entry.after_cancel(self._search_after)
+            except tk.TclError:
+                pass
+            self._search_after = None
 
-            self.tree.insert("", "end", values=(codigo, nombre, tipo.capitalize(), telefono, correo))
+    def on_search_key(self, event=None):
+        """
+        KeyRelease de la caja de búsqueda: las teclas que no cambian el texto
+        (flechas, Shift, Tab...) se ignoran; las demás reprograman la búsqueda
+        para cuando el usuario deje de teclear.
+        """
+        self._cancel_pending_search()
+        if self._search_text() == self._applied_term:
+            return
+        local = self.local_search and self._index is not None
+        delay = self.LOCAL_SEARCH_DEBOUNCE_MS if local else self.SEARCH_DEBOUNCE_MS
+        self._search_after = self.search_entry.after(delay, self.on_search_changed)
+
+    def on_search_changed(self):
+        """Nuevo término de búsqueda: filtra en memoria o consulta la BD."""
+        self._search_after = None
+        term = self._search_text()
+        if self.local_search and self._index is not None:
+            self._applied_term = term
+            self._show_clients(self._index.search(term))
+        else:
+            self.load_data_from_db()
+
+    @staticmethod
+    def _client_values(c):
+        """Fila de get_all_clients -> celdas de la tabla."""
+        tipo = c.get('tipo', '') or ''
+        codigo = str(c.get('codigo', '') or '')
+        nombre = c.get('nombre', '')
+        correo = c.get('correo', '') or ''
+        telefono = c.get('telefono', '') or ''
+        return (codigo, nombre, tipo.capitalize(), telefono, correo)
+
+    def _show_clients(self, clients):
+        # por código: al recargar sólo cambian los items de los clientes que
+        # cambiaron y se conservan desplazamiento y selección
+        self.tree.update_rows(clients)
 
     def on_tree_double_click(self, event):
-        sel = self.tree.selection()
+        sel = self.tree.selected_rows()
         if not sel:
             return
-        item = sel[0]
-        data = self.tree.item(item, "values")
-        if not data:
-            return
-        client_code = data[0]
+        client_code = str(sel[0]['codigo'])
         try:
             client_data = self.db.get_client_by_code(client_code)
         except Exception as e:
@@ -271,6 +557,9 @@ class ClientView:
             self.show_edit_client_form(client_data)
 
     # ------------------- FORMULARIOS -------------------
+    def show_import_window(self):
+        ImportView(self.parent, self.db, admin_dni=self.admin_dni, on_finished=self.load_data_from_db)
+
     def show_new_client_form(self):
         self.client_vars = {}
         self.choose_client_type()
@@ -538,14 +827,12 @@ class ClientView:
     # ------------------- GUARDAR CLIENTE -------------------
     def edit_selected_client(self):
         """Editar el cliente seleccionado en la tabla"""
-        selected = self.tree.selection()
+        selected = self.tree.selected_rows()
         if not selected:
             messagebox.showwarning("Actualizar", "No ha seleccionado ningún cliente")
             return
 
-        item = selected[0]
-        values = self.tree.item(item, "values")
-        codigo = values[0]
+        codigo = str(selected[0]['codigo'])
 
         try:
             client_data = self.db.get_client_by_code(codigo)
@@ -560,7 +847,7 @@ class ClientView:
 
     def delete_selected_clients(self):
         """Eliminar cliente(s) seleccionados"""
-        selected = self.tree.selection()
+        selected = self.tree.selected_rows()
         if not selected:
             messagebox.showwarning("Eliminar", "No ha seleccionado ningún cliente")
             return
@@ -569,17 +856,32 @@ class ClientView:
         if not confirm:
             return
 
-        for item in selected:
-            values = self.tree.item(item, "values")
-            codigo = values[0]  # asumimos que el primer valor es el código
-            try:
-                result, msg = self.db.delete_client_by_code(codigo)
-                if result == 1:
-                    self.tree.delete(item)
-                else:
-                    messagebox.showerror("Error BD", msg)
-            except Exception as e:
-                messagebox.showerror("Error BD", f"No se pudo eliminar cliente: {e}")
+        # por (tipo, código): el mismo RUC puede ser mayorista y corporativo
+        try:
+            results = self.db.delete_clients(_client_pair(r) for r in selected)
+        except Exception as e:
+            messagebox.showerror("Error BD", f"No se pudo eliminar cliente: {e}")
+            return
+
+        errors = []
+        deleted = {}   # tipo|codigo -> (tipo, codigo)
+        for (tipo, codigo), (ok, msg) in results.items():
+            if ok:
+                deleted["|".join((tipo, codigo))] = (tipo, codigo)
+            else:
+                errors.append(f"{codigo} ({tipo}): {msg}")
+        if deleted:
+            remaining = [r for r in self.tree.source.rows if _client_key(r) not in deleted]
+            self.tree.set_rows(remaining, keep_position=True)
+            if self._index is not None:
+                # la búsqueda en memoria filtra el índice: sin esto los borrados
+                # volverían con la próxima tecla
+                self._index = SearchIndex([r for r in self._index.rows if _client_key(r) not in deleted])
+            if self.client_cache is not None:
+                run_task(self.tasks, "cache_borrados", self.client_cache.remove, list(deleted.values()),
+                         on_done=lambda result: None, on_error=lambda e: None)
+        if errors:
+            messagebox.showerror("Error BD", "\n".join(errors[:20]) + (f"\n... y {len(errors) - 20} más" if len(errors) > 20 else ""))
 
     def save_client(self, window, is_update=False, original_code=None):
         try:
@@ -612,32 +914,26 @@ class ClientView:
 
             tipo = self.client_type.get()
 
-            # Validaciones según tipo
+            # Validaciones según tipo (las mismas que usa el importador masivo)
             if tipo == CLIENT_TYPES["MINORISTA"]:
-                dni = data.get("DNI", "").strip()
-                if len(dni) != 8 or not dni.isdigit():
-                    messagebox.showwarning("Validación", "El DNI debe tener 8 dígitos numéricos")
-                    return
+                error = validar_codigo(tipo, data.get("DNI", ""))
             elif tipo in [CLIENT_TYPES["MAYORISTA"], CLIENT_TYPES["CORPORATIVO"]]:
-                ruc = data.get("RUC", "").strip()
-                if len(ruc) != 11 or not ruc.isdigit():
-                    messagebox.showwarning("Validación", "El RUC debe tener 11 dígitos numéricos")
-                    return
-            if tipo == CLIENT_TYPES["CORPORATIVO"]:
-                dni_contacto = data.get("DNI Contacto", "").strip()
-                if dni_contacto and (len(dni_contacto) != 8 or not dni_contacto.isdigit()):
-                    messagebox.showwarning("Validación", "El DNI del contacto debe tener 8 dígitos")
-                    return
+                error = validar_codigo(tipo, data.get("RUC", ""))
+            else:
+                error = None
+            if not error and tipo == CLIENT_TYPES["CORPORATIVO"]:
+                error = validar_dni_contacto(data.get("DNI Contacto", ""))
+            if error:
+                messagebox.showwarning("Validación", error)
+                return
 
             # DNI administrador (si no se pasó al constructor)
             dni_admin = self.admin_dni
             if not dni_admin:
                 dni_admin = simpledialog.askstring("Administrador", "Ingrese DNI del administrador (8 dígitos):", parent=window)
-            if not dni_admin:
-                messagebox.showwarning("Validación", "Debe proporcionar DNI del administrador")
-                return
-            if len(dni_admin.strip()) != 8 or not dni_admin.strip().isdigit():
-                messagebox.showwarning("Validación", "DNI administrador inválido (8 dígitos)")
+            error = validar_dni_admin(dni_admin)
+            if error:
+                messagebox.showwarning("Validación", error)
                 return
 
             # ------------------------------------------------
@@ -2,8 +2,9 @@
 Vista del Módulo de Configuración
 """
 
+import time
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 from styles import Colors, Fonts
 
 class ConfigView:
@@ -197,26 +198,106 @@ class ConfigView:
             event.widget.delete(0, tk.END)
     
     def show_statistics(self):
-        """Mostrar estadísticas"""
+        """Mostrar estadísticas de consultas (se actualizan cada segundo)"""
         self.clear_right_panel()
         
         title = tk.Label(
             self.right_panel,
-            text="Estadísticas",
+            text="Estadísticas de consultas",
             font=Fonts.HEADING,
             bg=Colors.SURFACE,
             fg=Colors.TEXT
         )
-        title.pack(pady=20)
+        title.pack(pady=(0, 10))
         
-        info = tk.Label(
-            self.right_panel,
-            text="Módulo de estadísticas en desarrollo",
-            font=Fonts.BODY,
-            bg=Colors.SURFACE,
-            fg=Colors.TEXT_SECONDARY
-        )
-        info.pack(pady=50)
+        # Resumen (caché y sentencias preparadas) + botones
+        top_frame = tk.Frame(self.right_panel, bg=Colors.SURFACE)
+        top_frame.pack(fill=tk.X)
+        self.stats_summary = tk.Label(top_frame, text="", font=Fonts.SMALL,
+                                      bg=Colors.SURFACE, fg=Colors.TEXT_SECONDARY, anchor=tk.W)
+        self.stats_summary.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        tk.Button(top_frame, text="Exportar JSON", font=Fonts.SMALL, cursor="hand2",
+                  command=self.export_statistics).pack(side=tk.RIGHT, padx=(5, 0))
+        tk.Button(top_frame, text="Reiniciar", font=Fonts.SMALL, cursor="hand2",
+                  command=self.reset_statistics).pack(side=tk.RIGHT)
+        
+        # Tabla por consulta
+        columns = ("llamadas", "filas", "media_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms", "consulta")
+        headings = ("Llamadas", "Filas", "Media ms", "p50 ms", "p95 ms", "p99 ms", "Máx ms", "Consulta")
+        table_frame = tk.Frame(self.right_panel, bg=Colors.SURFACE)
+        table_frame.pack(fill=tk.BOTH, expand=True, pady=10)
+        self.stats_tree = ttk.Treeview(table_frame, columns=columns, show="headings", height=12)
+        for col, text in zip(columns, headings):
+            self.stats_tree.heading(col, text=text)
+            self.stats_tree.column(col, width=70, anchor=tk.E, stretch=False)
+        self.stats_tree.column("consulta", width=500, anchor=tk.W, stretch=True)
+        vsb = ttk.Scrollbar(table_frame, orient=tk.VERTICAL, command=self.stats_tree.yview)
+        self.stats_tree.configure(yscrollcommand=vsb.set)
+        self.stats_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        vsb.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        # Consultas lentas
+        tk.Label(self.right_panel, text=f"Consultas lentas (>= {self.db.stats.slow_ms} ms)", font=Fonts.BODY,
+                 bg=Colors.SURFACE, fg=Colors.TEXT, anchor=tk.W).pack(fill=tk.X)
+        self.slow_list = tk.Listbox(self.right_panel, font=Fonts.SMALL, height=6)
+        self.slow_list.pack(fill=tk.X, pady=(5, 0))
+        self._slow_shown = None
+        
+        self._refresh_statistics()
+    
+    def _refresh_statistics(self, tree=None):
+        tree = tree or self.stats_tree
+        if tree is not self.stats_tree or not tree.winfo_exists():
+            return   # se cambió de panel (o se volvió a abrir): este ciclo termina
+        rows = self.db.stats.snapshot()
+        # actualizar en su lugar (iid = id de la huella) para no perder selección ni scroll
+        for r in rows:
+            values = tuple(r[c] for c in self.stats_tree["columns"])
+            iid = str(r["id"])
+            if self.stats_tree.exists(iid):
+                self.stats_tree.item(iid, values=values)
+            else:
+                self.stats_tree.insert("", tk.END, iid=iid, values=values)
+        for i, r in enumerate(rows):
+            self.stats_tree.move(str(r["id"]), "", i)
+        live = {str(r["id"]) for r in rows}
+        for iid in self.stats_tree.get_children():
+            if iid not in live:
+                self.stats_tree.delete(iid)
+        
+        slow = self.db.stats.slow_queries()
+        shown = (len(slow), slow[-1]["cuando"] if slow else None)
+        if shown != getattr(self, "_slow_shown", None):
+            self._slow_shown = shown
+            self.slow_list.delete(0, tk.END)
+            for q in reversed(slow):
+                when = time.strftime("%H:%M:%S", time.localtime(q["cuando"]))
+                self.slow_list.insert(tk.END, f"{when}  {q['ms']:.0f} ms  {q['sql'][:200]}")
+        
+        summary = f"{sum(r['llamadas'] for r in rows):,} sentencias, {len(rows)} consultas distintas"
+        if self.db.cache is not None:
+            c = self.db.cache.stats()
+            summary += f" | caché: {c['hits']:,} aciertos, {c['misses']:,} fallos, {c['entradas']} entradas"
+        p = self.db.prepared_stats
+        summary += f" | preparadas: {p['hits']:,} reusos, {p['prepares']:,} PREPARE"
+        self.stats_summary.config(text=summary)
+        tree.after(1000, lambda: self._refresh_statistics(tree))
+    
+    def reset_statistics(self):
+        self.db.stats.reset()   # el próximo refresco (en menos de 1 s) vacía la tabla
+    
+    def export_statistics(self):
+        path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON", "*.json")])
+        if not path:
+            return
+        extra = {"preparadas": dict(self.db.prepared_stats)}
+        if self.db.cache is not None:
+            extra["cache"] = self.db.cache.stats()
+        try:
+            self.db.stats.export_json(path, extra)
+            messagebox.showinfo("Estadísticas", f"Estadísticas guardadas en:\n{path}")
+        except Exception as e:
+            messagebox.showerror("Error", f"No se pudo exportar: {e}")
     
     def show_notifications(self):
         """Mostrar notificaciones"""
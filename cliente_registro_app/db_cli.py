@@ -0,0 +1,21 @@
+"""
+Opciones de conexión comunes para las herramientas de línea de comandos
+"""
+
+from db_controller import DBController
+
+
+def add_connection_args(parser):
+    """Agrega --host/--database/--user/--password/--port (mismos defaults que DBController)."""
+    group = parser.add_argument_group("conexión")
+    group.add_argument("--host", default="localhost")
+    group.add_argument("--database", default="registro_clientes")
+    group.add_argument("--user", default="postgres")
+    group.add_argument("--password", default="jhon")
+    group.add_argument("--port", default="5432")
+    return parser
+
+
+def db_from_args(args, **kwargs):
+    return DBController(host=args.host, database=args.database, user=args.user,
+                        password=args.password, port=args.port, **kwargs)
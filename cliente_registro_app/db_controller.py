@@ -1,175 +1,725 @@
+import functools
+import itertools
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import date
+
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2 import errors, extensions
+from psycopg2.extras import RealDictCursor, execute_values
+
+from db_pool import ConnectionPool
+from query_cache import QueryCache, tables_in
+from query_stats import QueryStats
+from validators import validar_codigo
+
+# Plantillas multi-fila (execute_values) para la carga por lotes
+_BATCH_INSERTS = {
+    "minorista": "INSERT INTO ClienteMinorista (DNI, Nombre_Apellido, Direccion, Telefono, Correo, Preferencias, DNI_administrador) VALUES %s",
+    "mayorista": "INSERT INTO ClienteMayorista (RUC, Razon_Social, Direccion_Fiscal, DNI_administrador) VALUES %s",
+    "datos_mayorista": "INSERT INTO DatosClienteMayorista (RUC_Mayorista, Telefono, Correo) VALUES %s",
+    "corporativo": "INSERT INTO ClienteCorporativo (RUC, Razon_Social, Correo, DNI_contacto, DNI_administrador) VALUES %s",
+    "datos_corporativo": "INSERT INTO DatosClienteCorporativo (RUC_Corporativo, Telefono, Direccion_Fiscal) VALUES %s",
+    "contrato": "INSERT INTO Contrato (Descripcion, Fecha_inicio, Fecha_vencimiento, Estado, RUC_Corporativo) VALUES %s",
+}
+
+# SQLSTATE -> etiqueta usada en el reporte de errores por fila
+_INTEGRITY_LABELS = {"23505": "PK", "23503": "FK"}
+
+# Borrar un cliente borra en cascada sus tablas dependientes: también invalidan la caché
+_CASCADES = {
+    "clientemayorista": {"datosclientemayorista"},
+    "clientecorporativo": {"datosclientecorporativo", "contrato"},
+}
+
+# Errores que indican que la conexión se cayó (socket cerrado, servidor reiniciado...)
+_CONNECTION_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError)
+
+
+class _TimedCursor:
+    """
+    Mezcla para cursores: mide cada execute/copy_expert en connection.stats.
+    Con record=False (ver _Connection.cursor) no se registra nada: así las
+    sentencias internas (chequeo del pool, PREPARE, SAVEPOINT) no cuentan
+    como consultas de la app.
+    """
+
+    record = True
+
+    def execute(self, query, vars=None):
+        start = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            self._record(query, start)
+
+    def copy_expert(self, sql, file, size=8192):
+        start = time.perf_counter()
+        try:
+            return super().copy_expert(sql, file, size)
+        finally:
+            self._record(sql, start)
+
+    def _record(self, query, start):
+        stats = self.connection.stats
+        if stats is not None and self.record:
+            stats.record(query, time.perf_counter() - start, self.rowcount)
+
+
+@functools.lru_cache(maxsize=None)
+def _timed(cursor_class):
+    return type("Timed" + cursor_class.__name__, (_TimedCursor, cursor_class), {})
+
+
+class _Connection(extensions.connection):
+    """
+    Conexión que recuerda qué sentencias preparadas (PREPARE) ya existen en su
+    sesión y cuyos cursores registran la latencia de cada sentencia en `stats`.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = set()
+        self.stats = None   # QueryStats del DBController dueño
+
+    def cursor(self, *args, record=True, **kwargs):
+        factory = kwargs.get("cursor_factory") or self.cursor_factory or extensions.cursor
+        kwargs["cursor_factory"] = _timed(factory)
+        cur = super().cursor(*args, **kwargs)
+        cur.record = record
+        return cur
+
+
+class _Transaction:
+    """Estado de un db.transaction() activo en un hilo."""
+
+    def __init__(self, conn, pipeline):
+        self.conn = conn
+        self.pipeline = pipeline
+        self.pending = []   # sentencias ya interpoladas (bytes) a la espera de enviarse
+        self.touched = set()  # tablas escritas: se invalidan en la caché tras el commit
+
 
 class DBController:
+    # Consultas fijas que se preparan en el servidor (PREPARE/EXECUTE) una vez por conexión
+    _PREPARED_QUERIES = {
+        "validar_admin": "SELECT DNI, Usuario FROM Administrador WHERE Usuario = $1 AND Contrasena = $2",
+        "cliente_minorista": """
+            SELECT 
+                DNI AS codigo,
+                Nombre_Apellido AS nombre,
+                Direccion,
+                Telefono,
+                Correo,
+                Preferencias,
+                DNI_administrador,
+                'minorista' AS tipo
+            FROM ClienteMinorista
+            WHERE DNI = $1
+        """,
+        # Un RUC puede ser mayorista o corporativo: se resuelve el tipo y el detalle
+        # en una sola sentencia; los contratos vuelven agregados (más reciente primero).
+        "cliente_ruc": """
+            SELECT
+                CASE WHEN cm.RUC IS NOT NULL THEN 'mayorista' ELSE 'corporativo' END AS tipo,
+                COALESCE(cm.RUC, cc.RUC) AS codigo,
+                COALESCE(cm.Razon_Social, cc.Razon_Social) AS nombre,
+                COALESCE(cm.Direccion_Fiscal, dcc.Direccion_Fiscal) AS Direccion_Fiscal,
+                COALESCE(cm.DNI_administrador, cc.DNI_administrador) AS DNI_administrador,
+                CASE WHEN cm.RUC IS NOT NULL THEN dcm.Telefono ELSE dcc.Telefono END AS Telefono,
+                CASE WHEN cm.RUC IS NOT NULL THEN dcm.Correo ELSE cc.Correo END AS Correo,
+                cc.DNI_contacto,
+                ct.contratos
+            FROM (SELECT 1) AS k
+            LEFT JOIN ClienteMayorista cm ON cm.RUC = $1
+            LEFT JOIN DatosClienteMayorista dcm ON dcm.RUC_Mayorista = cm.RUC
+            LEFT JOIN ClienteCorporativo cc ON cc.RUC = $1 AND cm.RUC IS NULL
+            LEFT JOIN DatosClienteCorporativo dcc ON dcc.RUC_Corporativo = cc.RUC
+            LEFT JOIN LATERAL (
+                SELECT json_agg(json_build_object(
+                           'id_contrato', c.Id_contrato,
+                           'descripcion', c.Descripcion,
+                           'fecha_inicio', c.Fecha_inicio,
+                           'fecha_vencimiento', c.Fecha_vencimiento,
+                           'estado', c.Estado
+                       ) ORDER BY c.Fecha_inicio DESC NULLS LAST, c.Id_contrato DESC) AS contratos
+                FROM Contrato c
+                WHERE c.RUC_Corporativo = cc.RUC
+            ) ct ON TRUE
+            WHERE cm.RUC IS NOT NULL OR cc.RUC IS NOT NULL
+            LIMIT 1
+        """,
+        "existe_minorista": "SELECT 1 FROM ClienteMinorista WHERE DNI = $1",
+        "existe_mayorista": "SELECT 1 FROM ClienteMayorista WHERE RUC = $1",
+        "existe_corporativo": "SELECT 1 FROM ClienteCorporativo WHERE RUC = $1",
+    }
+
     def __init__(self,
                  host="localhost",
                  database="registro_clientes",
                  user="postgres",
                  password="jhon",
-                 port="5432"):
+                 port="5432",
+                 pooled=False,
+                 min_size=1,
+                 max_size=10,
+                 max_idle=300,
+                 health_check_after=30,
+                 connect_retries=5,
+                 retry_backoff=0.5,
+                 cache_size=0,
+                 cache_ttl=30,
+                 slow_query_ms=500):
+        """
+        pooled=False conserva el comportamiento clásico (una conexión compartida).
+        pooled=True usa un ConnectionPool thread-safe: execute/fetchall/fetchone
+        piden prestada una conexión por llamada, así vistas y workers en segundo
+        plano pueden consultar a la vez.
+        cache_size > 0 activa la caché de resultados (ver fetchall(cache_ttl=...)).
+        slow_query_ms: umbral del registro de consultas lentas de self.stats.
+        """
+        self._connect_kwargs = dict(host=host, database=database, user=user,
+                                    password=password, port=port)
+        self.connect_retries = connect_retries
+        self.retry_backoff = retry_backoff
+        self.pool = None
         self.conn = None
-        try:
-            self.conn = psycopg2.connect(
-                host=host,
-                database=database,
-                user=user,
-                password=password,
-                port=port
-            )
-            # Use RealDictCursor when fetching rows for convenience
-        except Exception as e:
-            # Note: don't import tkinter here; let callers handle UI messages.
-            raise
+        # hits = EXECUTE sobre una sentencia ya preparada; prepares = PREPARE enviados
+        self.prepared_stats = {"hits": 0, "prepares": 0}
+        self._stats_lock = threading.Lock()
+        self._local = threading.local()   # transacción activa (por hilo)
+        self.cache = QueryCache(cache_size, cache_ttl) if cache_size else None
+        # latencia por huella de consulta de todas las sentencias (ver query_stats.py)
+        self.stats = QueryStats(slow_ms=slow_query_ms)
+        # False si la BD no tiene normalizar_busqueda()/pg_trgm (search_clients usa ILIKE)
+        self._trigram_search = True
+        # Note: don't import tkinter here; let callers handle UI messages.
+        if pooled:
+            self.pool = ConnectionPool(self._connect, min_size=min_size, max_size=max_size,
+                                       max_idle=max_idle, health_check_after=health_check_after)
+        else:
+            self.conn = self._connect()
+
+    def _connect(self):
+        """Abre una conexión nueva reintentando con backoff exponencial."""
+        delay = self.retry_backoff
+        for attempt in range(self.connect_retries):
+            try:
+                conn = psycopg2.connect(connection_factory=_Connection, **self._connect_kwargs)
+                conn.stats = self.stats
+                return conn
+            except psycopg2.OperationalError:
+                if attempt == self.connect_retries - 1:
+                    raise
+                time.sleep(delay)
+                delay = min(delay * 2, 10)
 
     def close(self):
+        if self.pool:
+            self.pool.closeall()
         if self.conn:
             self.conn.close()
 
-    # Generic execute (no fetch)
-    def execute(self, query, params=None):
-        with self.conn.cursor() as cur:
-            cur.execute(query, params or ())
+    # ---------- Préstamo de conexiones ----------
+
+    def _acquire(self):
+        if self.pool:
+            return self.pool.getconn()
+        if self.conn is None or self.conn.closed:
+            self.conn = self._connect()  # reconexión transparente en modo simple
+        return self.conn
+
+    def _release(self, conn, discard=False):
+        if self.pool:
+            self.pool.putconn(conn, discard=discard)
+        elif discard:
             try:
-                self.conn.commit()
+                conn.close()
             except Exception:
-                self.conn.rollback()
-                raise
+                pass
+
+    @contextmanager
+    def connection(self):
+        """
+        Presta una conexión (del pool o la compartida) durante el bloque with.
+        Dentro de un db.transaction() devuelve siempre la conexión de la transacción.
+        """
+        tx = self._current_tx()
+        if tx is not None:
+            self._flush(tx)
+            yield tx.conn
+            return
+
+        conn = self._acquire()
+        discard = False
+        try:
+            yield conn
+        except _CONNECTION_ERRORS:
+            discard = bool(conn.closed)
+            raise
+        except BaseException:
+            # incluye GeneratorExit: un iter_rows abandonado también libera la conexión
+            if not conn.closed:
+                conn.rollback()
+            raise
+        finally:
+            self._release(conn, discard=discard)
+
+    def _run(self, work):
+        """
+        Ejecuta work(conn) con una conexión prestada. Si la conexión resultó
+        estar caída, se descarta y se reintenta una vez con una conexión nueva
+        (salvo dentro de una transacción, donde reintentar perdería lo anterior).
+        """
+        attempts = 1 if self._current_tx() else 2
+        for attempt in range(attempts):
+            conn = None
+            try:
+                with self.connection() as conn:
+                    return work(conn)
+            except _CONNECTION_ERRORS:
+                if attempt + 1 == attempts or conn is None or not conn.closed:
+                    raise
+
+    # ---------- Transacciones ----------
+
+    def _current_tx(self):
+        return getattr(self._local, "tx", None)
+
+    def _commit(self, conn):
+        """Commit, salvo que estemos dentro de db.transaction() (ahí confirma el bloque)."""
+        if self._current_tx() is None:
+            conn.commit()
+
+    def _flush(self, tx):
+        """Envía las sentencias encoladas de la transacción en un solo viaje."""
+        if tx.pending:
+            batch = b";\n".join(tx.pending)
+            tx.pending = []
+            with tx.conn.cursor() as cur:
+                cur.execute(batch)
+
+    @contextmanager
+    def transaction(self, pipeline=True):
+        """
+        with db.transaction(): ... agrupa todas las sentencias del bloque (de este
+        hilo) en una sola transacción con un único commit; si algo falla se hace
+        rollback de todo. Con pipeline=True los execute() se encolan y se envían
+        juntos en un solo viaje antes de la siguiente lectura o del commit.
+        Un transaction() anidado se une a la transacción exterior.
+        """
+        if self._current_tx() is not None:
+            yield
+            return
+
+        with self.connection() as conn:
+            tx = self._local.tx = _Transaction(conn, pipeline)
+            try:
+                yield
+                self._flush(tx)
+            finally:
+                self._local.tx = None
+            conn.commit()
+        if self.cache is not None:
+            self.cache.invalidate(tx.touched)
+
+    # ---------- Caché de resultados ----------
+
+    def invalidate_cache(self, tables=None):
+        """
+        Descarta los resultados en caché que leen `tables` (None = todos). Dentro
+        de db.transaction() se posterga hasta el commit.
+        """
+        if self.cache is None:
+            return
+        if tables is None:
+            self.cache.clear()
+            return
+        tables = {t.lower() for t in tables}
+        for t in list(tables):
+            tables |= _CASCADES.get(t, set())
+        tx = self._current_tx()
+        if tx is not None:
+            tx.touched |= tables
+        else:
+            self.cache.invalidate(tables)
+
+    # Generic execute (no fetch)
+    def execute(self, query, params=None):
+        tx = self._current_tx()
+        if tx is not None and tx.pipeline:
+            with tx.conn.cursor() as cur:
+                tx.pending.append(cur.mogrify(query, params or ()))
+            if self.cache is not None:
+                self.invalidate_cache(tables_in(query))
+            return
+
+        def work(conn):
+            with conn.cursor() as cur:
+                cur.execute(query, params or ())
+            self._commit(conn)
+        self._run(work)
+        if self.cache is not None:
+            self.invalidate_cache(tables_in(query))
 
     # Generic fetchall returning list of dicts
-    def fetchall(self, query, params=None):
-        with self.conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute(query, params or ())
-            rows = cur.fetchall()
+    def fetchall(self, query, params=None, cache_ttl=None):
+        """
+        cache_ttl: segundos que puede reutilizarse el resultado (sólo si la caché
+        está activa y fuera de una transacción, que debe ver sus propias escrituras).
+        """
+        cached = self.cache is not None and cache_ttl is not None and self._current_tx() is None
+        if cached:
+            key = (query, repr(params))
+            hit, rows = self.cache.get(key)
+            if hit:
+                return [dict(r) for r in rows]
+            since = self.cache.generation()
+
+        def work(conn):
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                cur.execute(query, params or ())
+                rows = cur.fetchall()
             return [dict(r) for r in rows]
+        rows = self._run(work)
+        if cached:
+            # se guarda una copia: quien llama puede modificar sus dicts
+            self.cache.put(key, [dict(r) for r in rows], tables_in(query), cache_ttl, since=since)
+        return rows
 
     def fetchone(self, query, params=None):
-        with self.conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute(query, params or ())
-            row = cur.fetchone()
+        def work(conn):
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                cur.execute(query, params or ())
+                row = cur.fetchone()
+            return dict(row) if row else None
+        return self._run(work)
+
+    def iter_rows(self, query, params=None, itersize=2000, batch_size=None):
+        """
+        Recorre el resultado con un cursor con nombre (server-side): Postgres
+        envía las filas de a `itersize`, así la memoria no depende del tamaño
+        del resultado. Sin batch_size produce un dict por fila; con batch_size
+        produce listas de hasta batch_size dicts.
+
+        La conexión queda prestada hasta agotar (o cerrar) el generador.
+        """
+        with self.connection() as conn:
+            # en modo de conexión compartida otro execute() puede hacer commit
+            # mientras iteramos: WITH HOLD mantiene vivo el cursor
+            with conn.cursor(name=f"iter_rows_{uuid.uuid4().hex}",
+                             cursor_factory=RealDictCursor,
+                             withhold=self.pool is None) as cur:
+                cur.itersize = itersize
+                cur.execute(query, params or ())
+                if batch_size:
+                    while True:
+                        rows = cur.fetchmany(batch_size)
+                        if not rows:
+                            break
+                        yield [dict(r) for r in rows]
+                else:
+                    for row in cur:
+                        yield dict(row)
+            self._commit(conn)
+
+    # ---------- Sentencias preparadas ----------
+
+    def _count_prepared(self, key):
+        with self._stats_lock:
+            self.prepared_stats[key] += 1
+
+    def _execute_prepared(self, cur, name, params):
+        """
+        EXECUTE de una consulta de _PREPARED_QUERIES, preparándola antes si esta
+        conexión aún no la tiene (p.ej. tras una reconexión la conexión es nueva).
+        """
+        conn = cur.connection
+        placeholders = ", ".join(["%s"] * len(params))
+        for attempt in range(2):
+            if name not in conn.prepared:
+                with conn.cursor(record=False) as prep:
+                    prep.execute(f"PREPARE {name} AS {self._PREPARED_QUERIES[name]}")
+                conn.prepared.add(name)
+                self._count_prepared("prepares")
+            else:
+                self._count_prepared("hits")
+            try:
+                cur.execute(f"EXECUTE {name} ({placeholders})", params)
+                return
+            except errors.InvalidSqlStatementName:
+                # la sesión perdió la sentencia (DISCARD ALL, pooler externo...): re-preparar.
+                # Dentro de una transacción no podemos hacer rollback sin perder lo anterior.
+                if self._current_tx() is not None:
+                    raise
+                conn.rollback()
+                conn.prepared.discard(name)
+                if attempt:
+                    raise
+
+    def fetchone_prepared(self, name, params):
+        def work(conn):
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                self._execute_prepared(cur, name, params)
+                row = cur.fetchone()
             return dict(row) if row else None
+        return self._run(work)
 
     # ---------- App specific helpers ----------
 
     def validate_admin(self, usuario, contrasena):
-        q = "SELECT DNI, Usuario FROM Administrador WHERE Usuario = %s AND Contrasena = %s"
-        row = self.fetchone(q, (usuario, contrasena))
+        row = self.fetchone_prepared("validar_admin", (usuario, contrasena))
         return row
 
     def insert_administrator(self, dni, nombre, usuario, contrasena, telefono, correo):
-        q = """
-        INSERT INTO Administrador (DNI, Nombre_Apellido, Usuario, Contrasena, Telefono, Correo)
-        VALUES (%s, %s, %s, %s, %s, %s)
+        with self.transaction():
+            q = """
+            INSERT INTO Administrador (DNI, Nombre_Apellido, Usuario, Contrasena, Telefono, Correo)
+            VALUES (%s, %s, %s, %s, %s, %s)
+            """
+            self.execute(q, (dni, nombre, usuario, contrasena, telefono, correo))
+
+    # Una rama por tipo de cliente; todas devuelven las mismas columnas para el UNION ALL
+    _CLIENT_LIST_BRANCHES = {
+        "Minorista": """
+            SELECT 'Minorista' AS tipo, DNI AS codigo, Nombre_Apellido AS nombre,
+                   Telefono AS telefono, Correo AS correo
+            FROM ClienteMinorista
+        """,
+        "Mayorista": """
+            SELECT 'Mayorista' AS tipo, cm.RUC AS codigo, cm.Razon_Social AS nombre,
+                   dcm.Telefono AS telefono, dcm.Correo AS correo
+            FROM ClienteMayorista cm
+            LEFT JOIN DatosClienteMayorista dcm ON dcm.RUC_Mayorista = cm.RUC
+        """,
+        "Corporativo": """
+            SELECT 'Corporativo' AS tipo, cc.RUC AS codigo, cc.Razon_Social AS nombre,
+                   dcc.Telefono AS telefono, cc.Correo AS correo
+            FROM ClienteCorporativo cc
+            LEFT JOIN DatosClienteCorporativo dcc ON dcc.RUC_Corporativo = cc.RUC
+        """,
+    }
+
+    def _clients_query(self, tipo=None, term=None, limit=None):
+        """Arma el SELECT ... UNION ALL del listado de clientes y sus parámetros."""
+        if tipo and tipo.lower() != "todos":
+            branches = [b for t, b in self._CLIENT_LIST_BRANCHES.items() if t.lower() == tipo.lower()]
+        else:
+            branches = list(self._CLIENT_LIST_BRANCHES.values())
+        if not branches:
+            raise ValueError(f"Tipo de cliente desconocido: {tipo}")
+
+        q = "SELECT codigo, nombre, telefono, correo, tipo FROM (" + " UNION ALL ".join(branches) + ") clientes"
+        params = []
+        if term:
+            # mismo criterio que la UI: subcadena sin distinguir mayúsculas en código o nombre
+            pattern = "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            q += " WHERE codigo ILIKE %s OR nombre ILIKE %s"
+            params += [pattern, pattern]
+        if limit:
+            q += " LIMIT %s"
+            params.append(limit)
+        return q, tuple(params)
+
+    # Segundos que se reutiliza el listado de clientes si la caché está activa
+    CLIENT_LIST_TTL = 30
+
+    def get_all_clients(self, tipo=None, term=None, limit=None, cache=True):
+        """
+        Listado de clientes en un solo viaje a la BD.
+        tipo: 'Minorista' | 'Mayorista' | 'Corporativo' (None o 'Todos' = todos)
+        term: texto a buscar en código o nombre; limit: máximo de filas.
+        cache=False lee siempre de la BD (p.ej. para sincronizar una copia local).
+        Cada fila: {'codigo', 'nombre', 'telefono', 'correo', 'tipo'}.
         """
-        self.execute(q, (dni, nombre, usuario, contrasena, telefono, correo))
+        q, params = self._clients_query(tipo, term, limit)
+        return self.fetchall(q, params, cache_ttl=self.CLIENT_LIST_TTL if cache else None)
 
-    def get_all_clients(self):
-        
-        results = []
+    def count_clients(self):
+        """Cantidad total de clientes (los tres tipos)."""
+        return self.fetchone("""
+            SELECT (SELECT count(*) FROM ClienteMinorista)
+                 + (SELECT count(*) FROM ClienteMayorista)
+                 + (SELECT count(*) FROM ClienteCorporativo) AS total
+        """)["total"]
 
-        # Minorista
-        q1 = "SELECT DNI AS codigo, Nombre_Apellido AS nombre, Telefono AS telefono, Correo AS correo FROM ClienteMinorista"
-        try:
-            rows = self.fetchall(q1)
-            for r in rows:
-                r['tipo'] = 'Minorista'
-                results.append(r)
-        except Exception:
-            # table may be empty or missing; ignore
-            pass
-
-        # Mayorista (join with DatosClienteMayorista for phone/email)
-        q2 = """
-        SELECT  cm.RUC AS codigo, 
-                cm.Razon_Social AS nombre, 
-                dcm.Telefono AS telefono,
-                dcm.Correo AS correo
-        FROM ClienteMayorista cm
-        LEFT JOIN DatosClienteMayorista dcm ON dcm.RUC_Mayorista = cm.RUC
+    def get_clients_by_codes(self, codes):
         """
-        try:
-            rows = self.fetchall(q2)
-            for r in rows:
-                r['tipo'] = 'Mayorista'
-                results.append(r)
-        except Exception:
-            pass
-
-        # Corporativo (join DatosClienteCorporativo)
-        q3 = """
-        SELECT cc.RUC AS codigo, cc.Razon_Social AS nombre, dcc.Telefono AS telefono, cc.Correo AS correo
-        FROM ClienteCorporativo cc
-        LEFT JOIN DatosClienteCorporativo dcc ON dcc.RUC_Corporativo = cc.RUC
+        Filas del listado (mismas columnas que get_all_clients) de los códigos
+        dados; los que no existen no vienen en el resultado.
         """
-        try:
-            rows = self.fetchall(q3)
-            for r in rows:
-                r['tipo'] = 'Corporativo'
-                results.append(r)
-        except Exception:
-            pass
-
-        return results
+        codes = sorted({str(c) for c in codes})
+        if not codes:
+            return []
+        # ::bpchar[] para comparar con las PK char(n) sin convertirlas a text (usa el índice)
+        branches = [f"{branch} WHERE {self._CLIENT_SEARCH_COLUMNS[t][0]} = ANY(%s::bpchar[])"
+                    for t, branch in self._CLIENT_LIST_BRANCHES.items()]
+        q = "SELECT codigo, nombre, telefono, correo, tipo FROM (" + " UNION ALL ".join(branches) + ") clientes"
+        return self.fetchall(q, (codes,) * len(branches))
+
+    # Filas por página del listado paginado (get_clients_page)
+    CLIENT_PAGE_SIZE = 500
+
+    def _clients_page_query(self, after=None, limit=CLIENT_PAGE_SIZE, tipo=None, term=None):
+        """
+        SELECT de get_clients_page y sus parámetros (None si no queda nada que
+        leer). La condición de keyset se arma por rama: cada tipo es constante
+        en su rama, así que (tipo, codigo) > (t, c) queda en "codigo > c" para
+        la rama t, todo para los tipos mayores y nada para los menores; cada
+        rama recorre su PK en orden y corta en `limit`.
+        """
+        if tipo and tipo.lower() != "todos":
+            tipos = [t for t in self._CLIENT_SEARCH_COLUMNS if t.lower() == tipo.lower()]
+        else:
+            tipos = list(self._CLIENT_SEARCH_COLUMNS)
+        if not tipos:
+            raise ValueError(f"Tipo de cliente desconocido: {tipo}")
+
+        pattern = None
+        if term:
+            pattern = "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        branches, params = [], []
+        for t in sorted(tipos):
+            code_col, name_col = self._CLIENT_SEARCH_COLUMNS[t]
+            conds = []
+            if after is not None:
+                after_tipo, after_code = after
+                if t < after_tipo:
+                    continue
+                if t == after_tipo:
+                    conds.append(f"{code_col} > %s")
+                    params.append(after_code)
+            if pattern:
+                conds.append(f"({code_col} ILIKE %s OR {name_col} ILIKE %s)")
+                params += [pattern, pattern]
+            where = " WHERE " + " AND ".join(conds) if conds else ""
+            branches.append(f"({self._CLIENT_LIST_BRANCHES[t]}{where} ORDER BY {code_col} LIMIT %s)")
+            params.append(limit)
+        if not branches:
+            return None, ()
+        q = ("SELECT codigo, nombre, telefono, correo, tipo FROM ("
+             + " UNION ALL ".join(branches) + ") clientes ORDER BY tipo, codigo LIMIT %s")
+        params.append(limit)
+        return q, tuple(params)
+
+    def get_clients_page(self, after=None, limit=CLIENT_PAGE_SIZE, tipo=None, term=None):
+        """
+        Una página del listado de clientes ordenado por (tipo, codigo).
+        after: (tipo, codigo) de la última fila de la página anterior (None = la
+        primera). Paginación por keyset (no OFFSET): cada página cuesta lo mismo
+        sin importar cuán adentro esté. tipo/term como en get_all_clients.
+        Si vuelven menos de `limit` filas no hay más páginas.
+        """
+        q, params = self._clients_page_query(after, limit, tipo, term)
+        if q is None:
+            return []
+        return self.fetchall(q, params, cache_ttl=self.CLIENT_LIST_TTL)
+
+    # Columnas (código, nombre) de cada rama de _CLIENT_LIST_BRANCHES para la búsqueda
+    _CLIENT_SEARCH_COLUMNS = {
+        "Minorista": ("DNI", "Nombre_Apellido"),
+        "Mayorista": ("cm.RUC", "cm.Razon_Social"),
+        "Corporativo": ("cc.RUC", "cc.Razon_Social"),
+    }
+
+    # Máximo de filas que devuelve search_clients por defecto
+    SEARCH_LIMIT = 200
+
+    def _search_query(self, term, tipo=None, limit=SEARCH_LIMIT):
+        """
+        SELECT de search_clients y sus parámetros. Cada rama filtra con la misma
+        expresión de los índices GIN de la migración 004 (normalizar_busqueda(col))
+        para que Postgres los use; el código se compara por prefijo.
+        """
+        if tipo and tipo.lower() != "todos":
+            tipos = [t for t in self._CLIENT_SEARCH_COLUMNS if t.lower() == tipo.lower()]
+        else:
+            tipos = list(self._CLIENT_SEARCH_COLUMNS)
+        if not tipos:
+            raise ValueError(f"Tipo de cliente desconocido: {tipo}")
+
+        branches = []
+        for t in tipos:
+            code_col, name_col = self._CLIENT_SEARCH_COLUMNS[t]
+            name = f"normalizar_busqueda({name_col})"
+            branches.append(
+                self._CLIENT_LIST_BRANCHES[t]
+                + f" WHERE {name} LIKE '%%' || normalizar_busqueda(%(escapado)s) || '%%'"
+                + f" OR normalizar_busqueda(%(termino)s) <%% {name}"
+                + f" OR {code_col} LIKE %(prefijo)s"
+            )
+        # primero los códigos que empiezan con el término, luego por parecido del nombre
+        # (word_similarity: el término contra la palabra más parecida, no el nombre entero)
+        q = ("SELECT codigo, nombre, telefono, correo, tipo FROM ("
+             + " UNION ALL ".join(branches) + ") clientes"
+             " ORDER BY codigo LIKE %(prefijo)s DESC,"
+             " word_similarity(normalizar_busqueda(%(termino)s), normalizar_busqueda(nombre)) DESC,"
+             " nombre, codigo"
+             " LIMIT %(limite)s")
+        escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        params = {"termino": term, "escapado": escaped, "prefijo": escaped + "%", "limite": limit}
+        return q, params
+
+    def search_clients(self, term, tipo=None, limit=SEARCH_LIMIT):
+        """
+        Búsqueda aproximada de clientes en la BD: sin distinguir mayúsculas ni
+        acentos ("perez" encuentra "Pérez"), tolera errores de tipeo (pg_trgm) y
+        ordena por parecido. Devuelve como máximo `limit` filas con las mismas
+        columnas que get_all_clients.
+        Si la BD no tiene la migración 004 (pg_trgm/unaccent), usa el ILIKE de
+        get_all_clients.
+        """
+        term = (term or "").strip()
+        if not term:
+            return self.get_all_clients(tipo, limit=limit)
+        if self._trigram_search:
+            q, params = self._search_query(term, tipo, limit)
+            try:
+                return self.fetchall(q, params, cache_ttl=self.CLIENT_LIST_TTL)
+            except errors.UndefinedFunction:
+                if self._current_tx() is not None:
+                    raise
+                self._trigram_search = False
+        return self.get_all_clients(tipo, term, limit)
     
     def get_client_by_code(self, code):
         # ---------- Cliente Minorista ----------
         if len(code) == 8:  # DNI
-            q = """
-            SELECT 
-                DNI AS codigo,
-                Nombre_Apellido AS nombre,
-                Direccion,
-                Telefono,
-                Correo,
-                Preferencias,
-                DNI_administrador,
-                'minorista' AS tipo
-            FROM ClienteMinorista
-            WHERE DNI = %s
-            """
-            return self.fetchone(q, (code,))
+            return self.fetchone_prepared("cliente_minorista", (code,))
 
-    # ---------- Cliente Mayorista ----------
-        elif len(code) == 11:  # RUC
-        # Intentar mayorista primero
-            q1 = """
-            SELECT 
-                cm.RUC AS codigo,
-                cm.Razon_Social AS nombre,
-                cm.Direccion_Fiscal,
-                cm.DNI_administrador,
-                dcm.Telefono,
-                dcm.Correo,
-                'mayorista' AS tipo
-            FROM ClienteMayorista cm
-            LEFT JOIN DatosClienteMayorista dcm ON dcm.RUC_Mayorista = cm.RUC
-            WHERE cm.RUC = %s
-            """
-            result = self.fetchone(q1, (code,))
-            if result:
-                return result
+        elif len(code) == 11:  # RUC (mayorista o corporativo, una sola consulta)
+            row = self.fetchone_prepared("cliente_ruc", (code,))
+            if not row:
+                return None
+            if row["tipo"] == "mayorista":
+                return {k: row[k] for k in ("codigo", "nombre", "direccion_fiscal", "dni_administrador",
+                                            "telefono", "correo", "tipo")}
 
-        # ---------- Cliente Corporativo ----------
-            q2 = """
-            SELECT 
-                cc.RUC AS codigo,
-                cc.Razon_Social AS nombre,
-                cc.Correo,
-                cc.DNI_contacto,
-                cc.DNI_administrador,
-                dcc.Telefono,
-                dcc.Direccion_Fiscal,
-                c.Descripcion,
-                c.Fecha_inicio,
-                c.Fecha_vencimiento,
-                c.Estado,
-                'corporativo' AS tipo
-            FROM ClienteCorporativo cc
-            LEFT JOIN DatosClienteCorporativo dcc ON dcc.RUC_Corporativo = cc.RUC
-            LEFT JOIN Contrato c ON c.RUC_Corporativo = cc.RUC
-            WHERE cc.RUC = %s
-            """
-            return self.fetchone(q2, (code,))
+            # ---------- Cliente Corporativo ----------
+            contratos = row["contratos"] or []
+            for c in contratos:
+                for k in ("fecha_inicio", "fecha_vencimiento"):
+                    if c.get(k):
+                        c[k] = date.fromisoformat(c[k])
+            # los campos de contrato "planos" (que usa el formulario) son los del más reciente
+            actual = contratos[0] if contratos else {}
+            return {
+                "codigo": row["codigo"],
+                "nombre": row["nombre"],
+                "correo": row["correo"],
+                "dni_contacto": row["dni_contacto"],
+                "dni_administrador": row["dni_administrador"],
+                "telefono": row["telefono"],
+                "direccion_fiscal": row["direccion_fiscal"],
+                "descripcion": actual.get("descripcion"),
+                "fecha_inicio": actual.get("fecha_inicio"),
+                "fecha_vencimiento": actual.get("fecha_vencimiento"),
+                "estado": actual.get("estado"),
+                "tipo": "corporativo",
+                "contratos": contratos,
+            }
         else:
             return None
 
@@ -178,10 +728,7 @@ class DBController:
         try:
             if len(code) == 8:
                 # Cliente Minorista
-                exists = self.fetchone(
-                    "SELECT 1 FROM ClienteMinorista WHERE DNI = %s",
-                    (code,)
-                )
+                exists = self.fetchone_prepared("existe_minorista", (code,))
                 if exists:
                     self.execute("DELETE FROM ClienteMinorista WHERE DNI = %s", (code,))
                     return True, "Cliente minorista eliminado correctamente."
@@ -190,15 +737,9 @@ class DBController:
             
             elif len(code) == 11:
                 # Verificar si es Mayorista
-                mayorista = self.fetchone(
-                    "SELECT 1 FROM ClienteMayorista WHERE RUC = %s",
-                    (code,)
-                )
+                mayorista = self.fetchone_prepared("existe_mayorista", (code,))
                 # Verificar si es Corporativo
-                corporativo = self.fetchone(
-                    "SELECT 1 FROM ClienteCorporativo WHERE RUC = %s",
-                    (code,)
-                )
+                corporativo = self.fetchone_prepared("existe_corporativo", (code,))
                 
                 if mayorista:
                     self.execute("DELETE FROM ClienteMayorista WHERE RUC = %s", (code,))
@@ -218,150 +759,309 @@ class DBController:
             return False, f"Error al eliminar: {str(e)}"
 
 
+    # Tabla y PK de cada tipo de cliente (delete_clients)
+    _CLIENT_TABLES = {
+        "minorista": ("ClienteMinorista", "DNI"),
+        "mayorista": ("ClienteMayorista", "RUC"),
+        "corporativo": ("ClienteCorporativo", "RUC"),
+    }
+
+    def delete_clients(self, clients):
+        """
+        Elimina varios clientes en una sola transacción con un DELETE ... = ANY(...)
+        por tipo, cada uno en la tabla de su tipo (el mismo RUC puede ser cliente
+        mayorista y corporativo). clients: pares (tipo, codigo) como los del
+        listado. Devuelve un dict (tipo, codigo) -> (ok, mensaje) en el mismo orden.
+        """
+        clients = list(dict.fromkeys((tipo, str(codigo)) for tipo, codigo in clients))
+        results = {}
+        groups = {}   # tipo en minúsculas -> códigos a borrar
+        for tipo, codigo in clients:
+            error = validar_codigo(str(tipo).lower(), codigo)
+            if error:
+                results[(tipo, codigo)] = (False, error)
+            else:
+                groups.setdefault(str(tipo).lower(), []).append(codigo)
+
+        deleted = set()
+        try:
+            with self.transaction():
+                self.invalidate_cache([self._CLIENT_TABLES[t][0] for t in groups])
+                for t, codes in groups.items():
+                    table, pk = self._CLIENT_TABLES[t]
+                    # ::bpchar[] para comparar con la PK char(n) sin convertirla a text (usa el índice)
+                    rows = self.fetchall(f"DELETE FROM {table} WHERE {pk} = ANY(%s::bpchar[]) RETURNING {pk} AS codigo",
+                                         (codes,))
+                    deleted.update((t, r["codigo"]) for r in rows)
+        except Exception as e:
+            for tipo, codigo in clients:
+                results.setdefault((tipo, codigo), (False, f"Error al eliminar: {str(e)}"))
+            return {c: results[c] for c in clients}
+
+        for tipo, codigo in clients:
+            t = str(tipo).lower()
+            if (tipo, codigo) in results:
+                continue
+            if (t, codigo) in deleted:
+                results[(tipo, codigo)] = (True, f"Cliente {t} eliminado correctamente.")
+            else:
+                results[(tipo, codigo)] = (False, f"El {self._CLIENT_TABLES[t][1]} no pertenece a un cliente {t}.")
+        return {c: results[c] for c in clients}
+
     # Minimal insert helpers (may raise FK errors if admin/contact missing)
     def insert_minorista(self, dni, nombre, direccion, telefono, correo, preferencias, dni_admin):
-        q = """
-        INSERT INTO ClienteMinorista (DNI, Nombre_Apellido, Direccion, Telefono, Correo, Preferencias, DNI_administrador)
-        VALUES (%s,%s,%s,%s,%s,%s,%s)
-        """
-        self.execute(q, (dni, nombre, direccion, telefono, correo, preferencias, dni_admin))
+        with self.transaction():
+            q = """
+            INSERT INTO ClienteMinorista (DNI, Nombre_Apellido, Direccion, Telefono, Correo, Preferencias, DNI_administrador)
+            VALUES (%s,%s,%s,%s,%s,%s,%s)
+            """
+            self.execute(q, (dni, nombre, direccion, telefono, correo, preferencias, dni_admin))
 
     def insert_mayorista(self, ruc, razon_social, direccion_fiscal, dni_admin, telefono=None, correo=None):
-        q1 = "INSERT INTO ClienteMayorista (RUC, Razon_Social, Direccion_Fiscal, DNI_administrador) VALUES (%s,%s,%s,%s)"
-        self.execute(q1, (ruc, razon_social, direccion_fiscal, dni_admin))
-        if telefono or correo:
-            q2 = "INSERT INTO DatosClienteMayorista (RUC_Mayorista, Telefono, Correo) VALUES (%s,%s,%s)"
-            self.execute(q2, (ruc, telefono, correo))
+        with self.transaction():
+            q1 = "INSERT INTO ClienteMayorista (RUC, Razon_Social, Direccion_Fiscal, DNI_administrador) VALUES (%s,%s,%s,%s)"
+            self.execute(q1, (ruc, razon_social, direccion_fiscal, dni_admin))
+            if telefono or correo:
+                q2 = "INSERT INTO DatosClienteMayorista (RUC_Mayorista, Telefono, Correo) VALUES (%s,%s,%s)"
+                self.execute(q2, (ruc, telefono, correo))
 
     def insert_corporativo(self, ruc, razon_social, correo, dni_contacto, dni_admin,
                            telefono=None, direccion_fiscal=None, descripcion=None, fecha_inicio=None, fecha_venc=None, estado=None):
-        q1 = "INSERT INTO ClienteCorporativo (RUC, Razon_Social, Correo, DNI_contacto, DNI_administrador) VALUES (%s,%s,%s,%s,%s)"
-        self.execute(q1, (ruc, razon_social, correo, dni_contacto, dni_admin))
+        with self.transaction():
+            q1 = "INSERT INTO ClienteCorporativo (RUC, Razon_Social, Correo, DNI_contacto, DNI_administrador) VALUES (%s,%s,%s,%s,%s)"
+            self.execute(q1, (ruc, razon_social, correo, dni_contacto, dni_admin))
+            if telefono or direccion_fiscal:
+                q2 = "INSERT INTO DatosClienteCorporativo (RUC_Corporativo, Telefono, Direccion_Fiscal) VALUES (%s,%s,%s)"
+                self.execute(q2, (ruc, telefono, direccion_fiscal))
+            if descripcion or fecha_inicio or fecha_venc or estado:
+                q3 = "INSERT INTO Contrato (Descripcion, Fecha_inicio, Fecha_vencimiento, Estado, RUC_Corporativo) VALUES (%s,%s,%s,%s,%s)"
+                self.execute(q3, (descripcion, fecha_inicio, fecha_venc, estado, ruc))
+
+    # ---------- Inserción por lotes ----------
+    # Cada registro se convierte en (codigo, [(plantilla, fila), ...]): la fila del
+    # cliente primero y luego sus tablas dependientes, igual que en insert_*.
+
+    @staticmethod
+    def _minorista_rows(dni, nombre, direccion, telefono, correo, preferencias, dni_admin):
+        return dni, [("minorista", (dni, nombre, direccion, telefono, correo, preferencias, dni_admin))]
+
+    @staticmethod
+    def _mayorista_rows(ruc, razon_social, direccion_fiscal, dni_admin, telefono=None, correo=None):
+        rows = [("mayorista", (ruc, razon_social, direccion_fiscal, dni_admin))]
+        if telefono or correo:
+            rows.append(("datos_mayorista", (ruc, telefono, correo)))
+        return ruc, rows
+
+    @staticmethod
+    def _corporativo_rows(ruc, razon_social, correo, dni_contacto, dni_admin,
+                          telefono=None, direccion_fiscal=None, descripcion=None, fecha_inicio=None, fecha_venc=None, estado=None):
+        rows = [("corporativo", (ruc, razon_social, correo, dni_contacto, dni_admin))]
         if telefono or direccion_fiscal:
-            q2 = "INSERT INTO DatosClienteCorporativo (RUC_Corporativo, Telefono, Direccion_Fiscal) VALUES (%s,%s,%s)"
-            self.execute(q2, (ruc, telefono, direccion_fiscal))
+            rows.append(("datos_corporativo", (ruc, telefono, direccion_fiscal)))
         if descripcion or fecha_inicio or fecha_venc or estado:
-            q3 = "INSERT INTO Contrato (Descripcion, Fecha_inicio, Fecha_vencimiento, Estado, RUC_Corporativo) VALUES (%s,%s,%s,%s,%s)"
-            self.execute(q3, (descripcion, fecha_inicio, fecha_venc, estado, ruc))
+            rows.append(("contrato", (descripcion, fecha_inicio, fecha_venc, estado, ruc)))
+        return ruc, rows
+
+    def _insert_many(self, records, to_rows, batch_size):
+        """
+        Inserta los registros en lotes multi-fila dentro de UNA transacción.
+        Si un lote choca con una restricción se reintenta fila por fila (cada una
+        con su SAVEPOINT) para aislar las filas culpables sin abortar el resto.
+        Devuelve (insertados, errores); cada error es un dict con
+        fila (índice en records), codigo, tipo ('PK' | 'FK' | 'otro') y mensaje.
+        """
+        inserted = 0
+        errores = []
+
+        def report(index, codigo, exc):
+            tipo = _INTEGRITY_LABELS.get(getattr(exc, "pgcode", None), "otro")
+            msg = (getattr(exc, "pgerror", None) or str(exc)).strip()
+            errores.append({"fila": index, "codigo": codigo, "tipo": tipo, "mensaje": msg})
+
+        with self.connection() as conn:
+            # los SAVEPOINT van por un cursor sin medir: no son consultas de la app
+            with conn.cursor() as cur, conn.cursor(record=False) as sp:
+                it = enumerate(records)
+                while True:
+                    chunk = []
+                    for index, record in itertools.islice(it, batch_size):
+                        try:
+                            codigo, rows = to_rows(**record) if isinstance(record, dict) else to_rows(*record)
+                        except TypeError as e:
+                            report(index, None, e)  # registro con campos de más/de menos
+                            continue
+                        chunk.append((index, codigo, rows))
+                    if not chunk:
+                        break
+
+                    # Intento rápido: una sentencia multi-fila por tabla
+                    by_table = {}
+                    for _, _, rows in chunk:
+                        for table, row in rows:
+                            by_table.setdefault(table, []).append(row)
+                    sp.execute("SAVEPOINT lote")
+                    try:
+                        for table, rows in by_table.items():
+                            execute_values(cur, _BATCH_INSERTS[table], rows, page_size=len(rows))
+                        sp.execute("RELEASE SAVEPOINT lote")
+                        inserted += len(chunk)
+                        continue
+                    except _CONNECTION_ERRORS:
+                        raise
+                    except psycopg2.Error:
+                        sp.execute("ROLLBACK TO SAVEPOINT lote")
+
+                    # Lote con errores: fila por fila para saber cuáles fallan
+                    for index, codigo, rows in chunk:
+                        sp.execute("SAVEPOINT fila")
+                        try:
+                            for table, row in rows:
+                                execute_values(cur, _BATCH_INSERTS[table], [row])
+                            sp.execute("RELEASE SAVEPOINT fila")
+                            inserted += 1
+                        except _CONNECTION_ERRORS:
+                            raise
+                        except psycopg2.Error as e:
+                            sp.execute("ROLLBACK TO SAVEPOINT fila")
+                            report(index, codigo, e)
+            self._commit(conn)
+        if inserted:
+            self.invalidate_cache(tables_in(" ".join(_BATCH_INSERTS.values())))
+        return inserted, errores
+
+    def insert_minorista_many(self, records, batch_size=1000):
+        """records: tuplas con los argumentos de insert_minorista (o dicts con sus nombres)."""
+        return self._insert_many(records, self._minorista_rows, batch_size)
+
+    def insert_mayorista_many(self, records, batch_size=1000):
+        """records: tuplas con los argumentos de insert_mayorista (o dicts con sus nombres)."""
+        return self._insert_many(records, self._mayorista_rows, batch_size)
+
+    def insert_corporativo_many(self, records, batch_size=1000):
+        """records: tuplas con los argumentos de insert_corporativo (o dicts con sus nombres)."""
+        return self._insert_many(records, self._corporativo_rows, batch_size)
 
     # ---------- Update helpers ----------
     def update_minorista(self, dni, nombre=None, direccion=None, telefono=None, correo=None, preferencias=None, dni_admin=None):
-        fields = []
-        params = []
-        if nombre is not None:
-            fields.append("Nombre_Apellido=%s")
-            params.append(nombre)
-        if direccion is not None:
-            fields.append("Direccion=%s")
-            params.append(direccion)
-        if telefono is not None:
-            fields.append("Telefono=%s")
-            params.append(telefono)
-        if correo is not None:
-            fields.append("Correo=%s")
-            params.append(correo)
-        if preferencias is not None:
-            fields.append("Preferencias=%s")
-            params.append(preferencias)
-        if dni_admin is not None:
-            fields.append("DNI_administrador=%s")
-            params.append(dni_admin)
+        with self.transaction():
+            fields = []
+            params = []
+            if nombre is not None:
+                fields.append("Nombre_Apellido=%s")
+                params.append(nombre)
+            if direccion is not None:
+                fields.append("Direccion=%s")
+                params.append(direccion)
+            if telefono is not None:
+                fields.append("Telefono=%s")
+                params.append(telefono)
+            if correo is not None:
+                fields.append("Correo=%s")
+                params.append(correo)
+            if preferencias is not None:
+                fields.append("Preferencias=%s")
+                params.append(preferencias)
+            if dni_admin is not None:
+                fields.append("DNI_administrador=%s")
+                params.append(dni_admin)
         
-        if not fields:
-            return  # nada que actualizar
-        q = f"UPDATE ClienteMinorista SET {', '.join(fields)} WHERE DNI=%s"
-        params.append(dni)
-        self.execute(q, tuple(params))
+            if not fields:
+                return  # nada que actualizar
+            q = f"UPDATE ClienteMinorista SET {', '.join(fields)} WHERE DNI=%s"
+            params.append(dni)
+            self.execute(q, tuple(params))
 
     def update_mayorista(self, ruc, razon_social=None, direccion_fiscal=None, telefono=None, correo=None, dni_admin=None):
-        fields = []
-        params = []
-        if razon_social is not None:
-            fields.append("Razon_Social=%s")
-            params.append(razon_social)
-        if direccion_fiscal is not None:
-            fields.append("Direccion_Fiscal=%s")
-            params.append(direccion_fiscal)
-        if dni_admin is not None:
-            fields.append("DNI_administrador=%s")
-            params.append(dni_admin)
+        with self.transaction():
+            fields = []
+            params = []
+            if razon_social is not None:
+                fields.append("Razon_Social=%s")
+                params.append(razon_social)
+            if direccion_fiscal is not None:
+                fields.append("Direccion_Fiscal=%s")
+                params.append(direccion_fiscal)
+            if dni_admin is not None:
+                fields.append("DNI_administrador=%s")
+                params.append(dni_admin)
         
-        if fields:
-            q = f"UPDATE ClienteMayorista SET {', '.join(fields)} WHERE RUC=%s"
-            params.append(ruc)
-            self.execute(q, tuple(params))
+            if fields:
+                q = f"UPDATE ClienteMayorista SET {', '.join(fields)} WHERE RUC=%s"
+                params.append(ruc)
+                self.execute(q, tuple(params))
         
-        contact_fields = []
-        contact_params = []
+            contact_fields = []
+            contact_params = []
         
-        if telefono is not None:
-            contact_fields.append("Telefono=%s")
-            contact_params.append(telefono)
-        if correo is not None:
-            contact_fields.append("Correo=%s")
-            contact_params.append(correo)
-        if contact_fields:
-            q2 = f"UPDATE DatosClienteMayorista SET {', '.join(contact_fields)} WHERE RUC_Mayorista=%s"
-            contact_params.append(ruc)
-            self.execute(q2, tuple(contact_params))
+            if telefono is not None:
+                contact_fields.append("Telefono=%s")
+                contact_params.append(telefono)
+            if correo is not None:
+                contact_fields.append("Correo=%s")
+                contact_params.append(correo)
+            if contact_fields:
+                q2 = f"UPDATE DatosClienteMayorista SET {', '.join(contact_fields)} WHERE RUC_Mayorista=%s"
+                contact_params.append(ruc)
+                self.execute(q2, tuple(contact_params))
     
     def update_corporativo(self, ruc, razon_social=None, correo=None, dni_contacto=None, dni_admin=None,
                        telefono=None, direccion_fiscal=None, descripcion=None,
                        fecha_inicio=None, fecha_venc=None, estado=None):
-        fields = []
-        params = []
+        with self.transaction():
+            fields = []
+            params = []
         
-        if razon_social is not None:
-            fields.append("Razon_Social=%s")
-            params.append(razon_social)
-        if correo is not None:
-            fields.append("Correo=%s")
-            params.append(correo)
-        if dni_contacto is not None:
-            fields.append("DNI_contacto=%s")
-            params.append(dni_contacto)
-        if dni_admin is not None:
-            fields.append("DNI_administrador=%s")
-            params.append(dni_admin)
+            if razon_social is not None:
+                fields.append("Razon_Social=%s")
+                params.append(razon_social)
+            if correo is not None:
+                fields.append("Correo=%s")
+                params.append(correo)
+            if dni_contacto is not None:
+                fields.append("DNI_contacto=%s")
+                params.append(dni_contacto)
+            if dni_admin is not None:
+                fields.append("DNI_administrador=%s")
+                params.append(dni_admin)
         
-        if fields:
-            q = f"UPDATE ClienteCorporativo SET {', '.join(fields)} WHERE RUC=%s"
-            params.append(ruc)
-            self.execute(q, tuple(params))
+            if fields:
+                q = f"UPDATE ClienteCorporativo SET {', '.join(fields)} WHERE RUC=%s"
+                params.append(ruc)
+                self.execute(q, tuple(params))
         
-        contact_fields = []
-        contact_params = []
+            contact_fields = []
+            contact_params = []
         
-        if telefono is not None:
-            contact_fields.append("Telefono=%s")
-            contact_params.append(telefono)
-        if direccion_fiscal is not None:
-            contact_fields.append("Direccion_Fiscal=%s")
-            contact_params.append(direccion_fiscal)
+            if telefono is not None:
+                contact_fields.append("Telefono=%s")
+                contact_params.append(telefono)
+            if direccion_fiscal is not None:
+                contact_fields.append("Direccion_Fiscal=%s")
+                contact_params.append(direccion_fiscal)
         
-        if contact_fields:
-            q2 = f"UPDATE DatosClienteCorporativo SET {', '.join(contact_fields)} WHERE RUC_Corporativo=%s"
-            contact_params.append(ruc)
-            self.execute(q2, tuple(contact_params))
+            if contact_fields:
+                q2 = f"UPDATE DatosClienteCorporativo SET {', '.join(contact_fields)} WHERE RUC_Corporativo=%s"
+                contact_params.append(ruc)
+                self.execute(q2, tuple(contact_params))
         
-        if any([descripcion, fecha_inicio, fecha_venc, estado]):
-            fields_contract = []
-            params_contract = []
+            if any([descripcion, fecha_inicio, fecha_venc, estado]):
+                fields_contract = []
+                params_contract = []
             
-            if descripcion is not None:
-                fields_contract.append("Descripcion=%s")
-                params_contract.append(descripcion)
-            if fecha_inicio is not None:
-                fields_contract.append("Fecha_inicio=%s")
-                params_contract.append(fecha_inicio)
-            if fecha_venc is not None:
-                fields_contract.append("Fecha_vencimiento=%s")
-                params_contract.append(fecha_venc)
-            if estado is not None:
-                fields_contract.append("Estado=%s")
-                params_contract.append(estado)
+                if descripcion is not None:
+                    fields_contract.append("Descripcion=%s")
+                    params_contract.append(descripcion)
+                if fecha_inicio is not None:
+                    fields_contract.append("Fecha_inicio=%s")
+                    params_contract.append(fecha_inicio)
+                if fecha_venc is not None:
+                    fields_contract.append("Fecha_vencimiento=%s")
+                    params_contract.append(fecha_venc)
+                if estado is not None:
+                    fields_contract.append("Estado=%s")
+                    params_contract.append(estado)
             
-            if fields_contract:
-                q3 = f"UPDATE Contrato SET {', '.join(fields_contract)} WHERE RUC_Corporativo=%s"
-                params_contract.append(ruc)
-                self.execute(q3, tuple(params_contract))
+                if fields_contract:
+                    q3 = f"UPDATE Contrato SET {', '.join(fields_contract)} WHERE RUC_Corporativo=%s"
+                    params_contract.append(ruc)
+                    self.execute(q3, tuple(params_contract))
@@ -0,0 +1,179 @@
+"""
+Pool de conexiones thread-safe para DBController
+"""
+
+import threading
+import time
+from collections import deque
+
+import psycopg2
+from psycopg2 import extensions
+
+
+def _untimed_cursor(conn):
+    """Cursor que no registra sus sentencias en QueryStats (el SELECT 1 no es una consulta de la app)."""
+    try:
+        return conn.cursor(record=False)   # conexiones de DBController (_Connection)
+    except TypeError:
+        return conn.cursor()
+
+
+class PoolTimeout(Exception):
+    """No se obtuvo una conexión libre dentro del tiempo de espera."""
+
+
+class ConnectionPool:
+    """
+    Pool de conexiones con tamaño mínimo/máximo, reciclaje de conexiones
+    ociosas y verificación de vida (SELECT 1) al entregarlas. Un hilo propio
+    cierra cada `recycle_interval` segundos (por defecto max_idle) las ociosas
+    vencidas, aunque nadie pida conexiones; recycle_interval=0 lo desactiva.
+
+    connect_fn: función sin argumentos que devuelve una conexión nueva
+    (DBController le pasa su _connect, que ya reintenta con backoff).
+    """
+
+    def __init__(self, connect_fn, min_size=1, max_size=10, max_idle=300,
+                 health_check_after=30, timeout=30, recycle_interval=None):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Tamaños de pool inválidos (0 <= min_size <= max_size, max_size >= 1)")
+        self._connect = connect_fn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_idle = max_idle                      # segundos antes de reciclar una conexión ociosa
+        self.health_check_after = health_check_after  # segundos ociosa antes de hacer SELECT 1
+        self.timeout = timeout
+
+        self._cond = threading.Condition()
+        self._idle = deque()     # (conn, instante en que se devolvió)
+        self._size = 0           # conexiones abiertas (ociosas + prestadas)
+        self._closed = False
+
+        for _ in range(min_size):
+            self._idle.append((self._open(), time.monotonic()))
+
+        self.recycle_interval = max_idle if recycle_interval is None else recycle_interval
+        self._stop = threading.Event()
+        if self.recycle_interval:
+            threading.Thread(target=self._recycle_loop, name="db-pool-recycle", daemon=True).start()
+
+    def _recycle_loop(self):
+        while not self._stop.wait(self.recycle_interval):
+            self.recycle_idle()
+
+    def _open(self):
+        conn = self._connect()
+        self._size += 1
+        return conn
+
+    def _discard(self, conn):
+        self._size -= 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _is_alive(self, conn):
+        if conn.closed:
+            return False
+        try:
+            with _untimed_cursor(conn) as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            return False
+
+    # ---------- API ----------
+
+    def getconn(self):
+        """Presta una conexión viva; abre una nueva si hay cupo o espera a que se libere."""
+        deadline = time.monotonic() + self.timeout
+        while True:
+            conn, check = self._take(deadline)
+            if conn is None:
+                break
+            # el SELECT 1 va fuera del lock: una conexión lenta o caída no frena a
+            # los demás; mientras tanto cuenta como prestada
+            if not check or self._is_alive(conn):
+                return conn
+            with self._cond:
+                self._discard(conn)
+                self._cond.notify()
+
+        try:
+            return self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+    def _take(self, deadline):
+        """
+        (conexión ociosa, hay que verificarla) o (None, False) si se reservó el
+        cupo para abrir una nueva; espera si el pool está lleno.
+        """
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise psycopg2.InterfaceError("El pool de conexiones está cerrado")
+
+                while self._idle:
+                    conn, since = self._idle.pop()  # LIFO: la más reciente suele estar "caliente"
+                    idle_for = time.monotonic() - since
+                    if conn.closed or idle_for > self.max_idle:
+                        self._discard(conn)
+                        continue
+                    return conn, idle_for > self.health_check_after
+
+                if self._size < self.max_size:
+                    # reservamos el cupo antes de conectar (fuera del lock)
+                    self._size += 1
+                    return None, False
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeout(f"No hay conexiones libres tras {self.timeout}s (max_size={self.max_size})")
+                self._cond.wait(remaining)
+
+    def putconn(self, conn, discard=False):
+        """Devuelve una conexión al pool; si está rota (o discard=True) se cierra."""
+        if not discard and not conn.closed:
+            try:
+                if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                discard = True
+
+        with self._cond:
+            if discard or conn.closed or self._closed:
+                self._discard(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def recycle_idle(self):
+        """Cierra las conexiones ociosas que superaron max_idle, respetando min_size."""
+        now = time.monotonic()
+        with self._cond:
+            keep = deque()
+            for conn, since in self._idle:
+                if (conn.closed or now - since > self.max_idle) and self._size > self.min_size:
+                    self._discard(conn)
+                else:
+                    keep.append((conn, since))
+            self._idle = keep
+
+    def closeall(self):
+        self._stop.set()
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                conn, _ = self._idle.pop()
+                self._discard(conn)
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {"abiertas": self._size, "ociosas": len(self._idle), "max_size": self.max_size}
@@ -199,12 +199,18 @@ class HomeView:
     def show_clients(self):
         self.clear_content()
         from client_view import ClientView
-        self.current_view = ClientView(self.content_area, self.db, admin_dni=self.app.current_admin_dni)
+        self.current_view = ClientView(self.content_area, self.db, admin_dni=self.app.current_admin_dni,
+                                       tasks=self.app.tasks, local_search=self.app.local_client_search,
+                                       client_cache=self.app.client_cache,
+                                       change_feed=self.app.change_feed)
 
     def show_reports(self):
         self.clear_content()
         from reports_view import ReportsView
-        self.current_view = ReportsView(self.content_area, self.db, back_callback=self.show_inicio)
+        self.current_view = ReportsView(self.content_area, self.db, back_callback=self.show_inicio,
+                                        refresher=self.app.report_refresher,
+                                        async_db=self.app.async_db, bridge=self.app.async_bridge,
+                                        tasks=self.app.tasks, change_feed=self.app.change_feed)
 
     def show_config(self):
         self.clear_content()
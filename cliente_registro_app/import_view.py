@@ -0,0 +1,131 @@
+"""
+Ventana de importación masiva de clientes (CSV/XLSX)
+"""
+
+import queue
+import threading
+import tkinter as tk
+from tkinter import filedialog, messagebox
+
+from importer import COLUMNS, import_file
+from styles import Colors, Fonts
+
+
+class ImportView:
+    """Diálogo que ejecuta importer.import_file en un hilo y muestra el progreso."""
+
+    def __init__(self, parent, db_controller, admin_dni=None, on_finished=None):
+        self.parent = parent
+        self.db = db_controller
+        self.on_finished = on_finished
+        self._events = queue.Queue()   # mensajes del hilo de importación -> hilo de Tk
+        self._worker = None
+
+        self.window = tk.Toplevel(parent)
+        self.window.title("Importar clientes")
+        self.window.geometry("560x420")
+        self.window.transient(parent)
+        self.window.configure(bg=Colors.SURFACE)
+
+        self.path_var = tk.StringVar()
+        self.admin_var = tk.StringVar(value=admin_dni or "")
+        self.status_var = tk.StringVar(value="Seleccione un archivo .csv o .xlsx")
+
+        self.create_widgets()
+
+    def create_widgets(self):
+        tk.Label(self.window, text="Importar clientes", font=Fonts.HEADING,
+                 bg=Colors.SURFACE, fg=Colors.TEXT).pack(pady=(15, 5))
+        tk.Label(self.window, text="Columnas: " + ", ".join(COLUMNS), font=Fonts.SMALL,
+                 bg=Colors.SURFACE, fg=Colors.TEXT_SECONDARY, wraplength=520, justify=tk.LEFT).pack(padx=20)
+
+        file_frame = tk.Frame(self.window, bg=Colors.SURFACE)
+        file_frame.pack(fill=tk.X, padx=20, pady=10)
+        tk.Entry(file_frame, textvariable=self.path_var, font=Fonts.BODY, relief=tk.SOLID, bd=1).pack(
+            side=tk.LEFT, fill=tk.X, expand=True)
+        tk.Button(file_frame, text="Examinar...", font=Fonts.SMALL, command=self.choose_file).pack(side=tk.LEFT, padx=(5, 0))
+
+        admin_frame = tk.Frame(self.window, bg=Colors.SURFACE)
+        admin_frame.pack(fill=tk.X, padx=20)
+        tk.Label(admin_frame, text="DNI administrador (por defecto)", font=Fonts.BODY,
+                 bg=Colors.SURFACE, fg=Colors.TEXT).pack(side=tk.LEFT)
+        tk.Entry(admin_frame, textvariable=self.admin_var, font=Fonts.BODY, relief=tk.SOLID, bd=1, width=12).pack(
+            side=tk.LEFT, padx=10)
+
+        self.import_btn = tk.Button(self.window, text="Importar", font=Fonts.BUTTON, bg=Colors.SUCCESS, fg="white",
+                                    relief=tk.RAISED, bd=0, padx=15, pady=5, cursor="hand2", command=self.start_import)
+        self.import_btn.pack(pady=10)
+
+        tk.Label(self.window, textvariable=self.status_var, font=Fonts.BODY,
+                 bg=Colors.SURFACE, fg=Colors.TEXT).pack()
+
+        self.result_text = tk.Text(self.window, font=Fonts.SMALL, height=10, relief=tk.SOLID, bd=1)
+        self.result_text.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
+
+    def choose_file(self):
+        path = filedialog.askopenfilename(
+            parent=self.window,
+            filetypes=[("CSV / Excel", "*.csv *.xlsx"), ("CSV files", "*.csv"), ("Excel workbook", "*.xlsx")]
+        )
+        if path:
+            self.path_var.set(path)
+
+    def start_import(self):
+        path = self.path_var.get().strip()
+        if not path:
+            messagebox.showwarning("Importar", "Seleccione un archivo", parent=self.window)
+            return
+        self.import_btn.config(state=tk.DISABLED)
+        self.result_text.delete("1.0", tk.END)
+        self.status_var.set("Importando...")
+
+        admin = self.admin_var.get().strip() or None
+        self._worker = threading.Thread(target=self._run_import, args=(path, admin), daemon=True)
+        self._worker.start()
+        self.window.after(100, self._poll)
+
+    def _run_import(self, path, admin):
+        """Corre fuera del hilo de Tk: sólo se comunica a través de la cola."""
+        try:
+            summary = import_file(self.db, path, default_admin=admin,
+                                  progress=lambda fase, n: self._events.put(("progreso", (fase, n))))
+            self._events.put(("fin", summary))
+        except Exception as e:
+            self._events.put(("error", e))
+
+    def _poll(self):
+        if not self.window.winfo_exists():
+            return
+        try:
+            while True:
+                kind, payload = self._events.get_nowait()
+                if kind == "progreso":
+                    fase, n = payload
+                    self.status_var.set(f"{fase.capitalize()}: {n:,} filas")
+                elif kind == "fin":
+                    self._show_summary(payload)
+                    return
+                elif kind == "error":
+                    self.status_var.set("Error en la importación")
+                    self.import_btn.config(state=tk.NORMAL)
+                    messagebox.showerror("Error BD", f"No se pudo importar:\n{payload}", parent=self.window)
+                    return
+        except queue.Empty:
+            pass
+        self.window.after(100, self._poll)
+
+    def _show_summary(self, summary):
+        self.import_btn.config(state=tk.NORMAL)
+        total = sum(summary["insertados"].values())
+        self.status_var.set(f"Importación terminada: {total:,} clientes insertados")
+        lines = [
+            f"Filas leídas: {summary['leidas']:,}",
+            f"Filas válidas: {summary['validas']:,}",
+            f"Filas con errores: {summary['total_errores']:,}",
+            f"Omitidas (ya existentes / repetidas / admin inexistente): {summary['omitidos']:,}",
+        ]
+        lines += [f"  {tipo}: {n:,}" for tipo, n in summary["insertados"].items()]
+        lines += [f"Línea {linea}: {msg}" for linea, msg in summary["errores"]]
+        self.result_text.insert("1.0", "\n".join(lines))
+        if callable(self.on_finished):
+            self.on_finished()
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Importador masivo de clientes desde CSV/XLSX.
+
+Lee el archivo en streaming, valida DNI/RUC igual que el formulario de clientes
+y las fechas de contrato (en un pool de procesos para archivos grandes), carga las filas válidas con
+COPY FROM STDIN a una tabla temporal de staging y desde ahí las fusiona con
+ClienteMinorista / ClienteMayorista / ClienteCorporativo y sus tablas
+Datos*/Contrato, todo en una sola transacción.
+
+Uso:
+    python importer.py clientes.csv --admin 12345678
+"""
+
+import argparse
+import csv
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+
+from query_cache import tables_in
+from validators import TIPOS_CLIENTE, normalizar_fecha, validar_cliente
+
+# Columnas de staging (y del archivo de entrada)
+COLUMNS = [
+    "tipo", "codigo", "nombre", "direccion", "telefono", "correo", "preferencias",
+    "dni_contacto", "dni_administrador", "descripcion", "fecha_inicio", "fecha_vencimiento", "estado",
+]
+
+# Encabezados alternativos aceptados (los mismos rótulos que usa el formulario)
+HEADER_ALIASES = {
+    "dni": "codigo",
+    "ruc": "codigo",
+    "nombre_apellido": "nombre",
+    "razon_social": "nombre",
+    "direccion_fiscal": "direccion",
+    "telefono_contacto": "telefono",
+    "dni_admin": "dni_administrador",
+    "fecha_venc": "fecha_vencimiento",
+}
+
+# Archivos más grandes que esto se validan en paralelo
+PARALLEL_THRESHOLD_BYTES = 5 * 1024 * 1024
+
+_STAGING_DDL = f"""
+CREATE TEMP TABLE stg_clientes (
+    linea integer,
+    {", ".join(f"{c} text" for c in COLUMNS)}
+) ON COMMIT DROP
+"""
+
+# Cada merge inserta los clientes nuevos (ignorando los que ya existen y los de
+# administradores inexistentes) y luego sus filas dependientes, en una sentencia.
+_MERGE_SQL = {
+    "minorista": """
+        WITH nuevos AS (
+            INSERT INTO ClienteMinorista (DNI, Nombre_Apellido, Direccion, Telefono, Correo, Preferencias, DNI_administrador)
+            SELECT DISTINCT ON (s.codigo) s.codigo, s.nombre, s.direccion, s.telefono, s.correo, s.preferencias, s.dni_administrador
+            FROM stg_clientes s
+            JOIN Administrador a ON a.DNI = s.dni_administrador
+            WHERE s.tipo = 'minorista'
+            ORDER BY s.codigo, s.linea
+            ON CONFLICT DO NOTHING
+            RETURNING DNI
+        )
+        SELECT count(*) AS total FROM nuevos
+    """,
+    "mayorista": """
+        WITH nuevos AS (
+            INSERT INTO ClienteMayorista (RUC, Razon_Social, Direccion_Fiscal, DNI_administrador)
+            SELECT DISTINCT ON (s.codigo) s.codigo, s.nombre, s.direccion, s.dni_administrador
+            FROM stg_clientes s
+            JOIN Administrador a ON a.DNI = s.dni_administrador
+            WHERE s.tipo = 'mayorista'
+            ORDER BY s.codigo, s.linea
+            ON CONFLICT DO NOTHING
+            RETURNING RUC
+        ), datos AS (
+            INSERT INTO DatosClienteMayorista (RUC_Mayorista, Telefono, Correo)
+            SELECT DISTINCT ON (s.codigo) s.codigo, s.telefono, s.correo
+            FROM stg_clientes s
+            JOIN nuevos n ON n.RUC = s.codigo
+            WHERE s.tipo = 'mayorista' AND (s.telefono IS NOT NULL OR s.correo IS NOT NULL)
+            ORDER BY s.codigo, s.linea
+            RETURNING 1
+        )
+        SELECT count(*) AS total FROM nuevos
+    """,
+    "corporativo": """
+        WITH nuevos AS (
+            INSERT INTO ClienteCorporativo (RUC, Razon_Social, Correo, DNI_contacto, DNI_administrador)
+            SELECT DISTINCT ON (s.codigo) s.codigo, s.nombre, s.correo, s.dni_contacto, s.dni_administrador
+            FROM stg_clientes s
+            JOIN Administrador a ON a.DNI = s.dni_administrador
+            WHERE s.tipo = 'corporativo'
+            ORDER BY s.codigo, s.linea
+            ON CONFLICT DO NOTHING
+            RETURNING RUC
+        ), datos AS (
+            INSERT INTO DatosClienteCorporativo (RUC_Corporativo, Telefono, Direccion_Fiscal)
+            SELECT DISTINCT ON (s.codigo) s.codigo, s.telefono, s.direccion
+            FROM stg_clientes s
+            JOIN nuevos n ON n.RUC = s.codigo
+            WHERE s.tipo = 'corporativo' AND (s.telefono IS NOT NULL OR s.direccion IS NOT NULL)
+            ORDER BY s.codigo, s.linea
+            RETURNING 1
+        ), contratos AS (
+            -- un archivo puede traer varias filas (contratos) por RUC
+            INSERT INTO Contrato (Descripcion, Fecha_inicio, Fecha_vencimiento, Estado, RUC_Corporativo)
+            SELECT s.descripcion, s.fecha_inicio::date, s.fecha_vencimiento::date, s.estado, s.codigo
+            FROM stg_clientes s
+            JOIN nuevos n ON n.RUC = s.codigo
+            WHERE s.tipo = 'corporativo'
+              AND (s.descripcion IS NOT NULL OR s.fecha_inicio IS NOT NULL
+                   OR s.fecha_vencimiento IS NOT NULL OR s.estado IS NOT NULL)
+            RETURNING 1
+        )
+        SELECT count(*) AS total FROM nuevos
+    """,
+}
+
+
+# ---------- Lectura ----------
+
+def _normalize_header(name):
+    key = str(name or "").strip().lower().replace(" ", "_").replace("-", "_")
+    return HEADER_ALIASES.get(key, key)
+
+
+def _cell(value):
+    """Convierte una celda de Excel a texto (los números enteros no llevan '.0')."""
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value).strip()
+
+
+def read_rows(path):
+    """Generador de dicts (columnas de COLUMNS) a partir de un CSV o XLSX, sin cargarlo entero."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".xlsx", ".xlsm"):
+        import openpyxl  # dependencia opcional, sólo para Excel
+        wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = wb.active.iter_rows(values_only=True)
+            headers = [_normalize_header(h) for h in next(rows, [])]
+            for values in rows:
+                if values is None or all(v is None for v in values):
+                    continue
+                yield {h: _cell(v) for h, v in zip(headers, values)}
+        finally:
+            wb.close()
+    else:
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            reader = csv.reader(f)
+            headers = [_normalize_header(h) for h in next(reader, [])]
+            for values in reader:
+                if not any(values):
+                    continue
+                yield {h: v.strip() for h, v in zip(headers, values)}
+
+
+# ---------- Validación ----------
+
+def validate_chunk(chunk, default_admin=None):
+    """
+    Valida un bloque de (linea, fila). Función de módulo para poder ejecutarse en
+    otro proceso. Devuelve (validas, errores) con filas ya normalizadas.
+    """
+    validas = []
+    errores = []
+    for linea, row in chunk:
+        tipo = (row.get("tipo") or "").strip().lower()
+        admin = row.get("dni_administrador") or default_admin
+        error = validar_cliente(tipo, row.get("codigo"), row.get("dni_contacto"), admin)
+        if error:
+            errores.append((linea, error))
+            continue
+        clean = {c: (row.get(c) or "").strip() for c in COLUMNS}
+        if tipo == "corporativo":
+            # el merge convierte las fechas del contrato con ::date: una mal escrita
+            # abortaría toda la importación sin decir en qué línea
+            for campo in ("fecha_inicio", "fecha_vencimiento"):
+                fecha = normalizar_fecha(clean[campo])
+                if fecha is None:
+                    error = f"{campo}: fecha inválida '{clean[campo]}' (use AAAA-MM-DD o DD/MM/AAAA)"
+                    break
+                clean[campo] = fecha
+            if error:
+                errores.append((linea, error))
+                continue
+        clean["tipo"] = tipo
+        clean["dni_administrador"] = admin.strip()
+        validas.append((linea, clean))
+    return validas, errores
+
+
+def _chunks(rows, size):
+    chunk = []
+    # línea 1 = encabezados
+    for linea, row in enumerate(rows, start=2):
+        chunk.append((linea, row))
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# ---------- Carga ----------
+
+def _copy_chunk(cur, validas):
+    """Escribe el bloque como CSV en memoria y lo envía con COPY FROM STDIN."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for linea, row in validas:
+        # campo vacío sin comillas = NULL en COPY ... (FORMAT csv)
+        writer.writerow([linea] + [row[c] or None for c in COLUMNS])
+    buf.seek(0)
+    cur.copy_expert(f"COPY stg_clientes (linea, {', '.join(COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buf)
+
+
+def import_file(db, path, default_admin=None, chunk_size=50000, workers=None, progress=None,
+                max_errors_reported=1000):
+    """
+    Importa el archivo y devuelve un resumen:
+    {'leidas', 'validas', 'errores': [(linea, mensaje)], 'total_errores', 'insertados': {tipo: n}, 'omitidos'}.
+    'omitidos' son filas válidas que no se insertaron: código ya existente, repetido
+    en el archivo o administrador inexistente.
+    progress(fase, filas) se llama tras cada bloque ('validando') y al fusionar ('fusionando').
+    """
+    if workers is None and os.path.getsize(path) > PARALLEL_THRESHOLD_BYTES:
+        workers = os.cpu_count() or 2
+    summary = {"leidas": 0, "validas": 0, "errores": [], "total_errores": 0, "insertados": {}, "omitidos": 0}
+
+    def handle(result):
+        validas, errores = result
+        summary["validas"] += len(validas)
+        room = max_errors_reported - len(summary["errores"])
+        if room > 0:
+            summary["errores"].extend(errores[:room])
+        summary["total_errores"] += len(errores)
+        if validas:
+            _copy_chunk(cur, validas)
+        if progress:
+            progress("validando", summary["leidas"])
+
+    with db.connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(_STAGING_DDL)
+            chunks = _chunks(read_rows(path), chunk_size)
+            if workers and workers > 1:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    pending = []
+                    for chunk in chunks:
+                        summary["leidas"] += len(chunk)
+                        pending.append(pool.submit(validate_chunk, chunk, default_admin))
+                        # acotar la memoria: no más bloques en vuelo que workers*2
+                        while len(pending) >= workers * 2:
+                            handle(pending.pop(0).result())
+                    for fut in pending:
+                        handle(fut.result())
+            else:
+                for chunk in chunks:
+                    summary["leidas"] += len(chunk)
+                    handle(validate_chunk(chunk, default_admin))
+
+            if progress:
+                progress("fusionando", summary["validas"])
+            cur.execute("ANALYZE stg_clientes")
+            for tipo in TIPOS_CLIENTE:
+                cur.execute(_MERGE_SQL[tipo])
+                summary["insertados"][tipo] = cur.fetchone()[0]
+        conn.commit()
+    # el COPY y la fusión no pasan por execute(): avisar a la caché de resultados
+    db.invalidate_cache(tables_in(" ".join(_MERGE_SQL.values())))
+
+    summary["omitidos"] = summary["validas"] - sum(summary["insertados"].values())
+    return summary
+
+
+def main(argv=None):
+    from db_cli import add_connection_args, db_from_args
+
+    parser = argparse.ArgumentParser(description="Importa clientes desde CSV/XLSX usando COPY.")
+    parser.add_argument("archivo", help="ruta del .csv o .xlsx (columnas: " + ", ".join(COLUMNS) + ")")
+    parser.add_argument("--admin", help="DNI del administrador para filas sin dni_administrador")
+    parser.add_argument("--chunk-size", type=int, default=50000)
+    parser.add_argument("--workers", type=int, help="procesos de validación (por defecto según tamaño)")
+    add_connection_args(parser)
+    args = parser.parse_args(argv)
+
+    db = db_from_args(args)
+    try:
+        summary = import_file(
+            db, args.archivo, default_admin=args.admin, chunk_size=args.chunk_size, workers=args.workers,
+            progress=lambda fase, n: print(f"{fase}: {n} filas", flush=True),
+        )
+    finally:
+        db.close()
+
+    print(f"Leídas: {summary['leidas']}  válidas: {summary['validas']}  "
+          f"con errores: {summary['total_errores']}  omitidas: {summary['omitidos']}")
+    for tipo, n in summary["insertados"].items():
+        print(f"  {tipo}: {n} insertados")
+    for linea, msg in summary["errores"][:20]:
+        print(f"  línea {linea}: {msg}")
+    return 0 if not summary["total_errores"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,171 @@
+"""
+Copia local (SQLite) del listado de clientes con sincronización incremental
+
+Al abrir la pestaña Clientes se muestra al instante lo que hay en el archivo
+local (por páginas, como el listado de la BD) y en segundo plano se traen sólo
+los clientes que cambiaron desde la última sincronización (ver
+client_changes.py). La primera vez, si la BD no tiene la migración 005 o si
+pasó más de RETENTION_DAYS desde la última sincronización (los cambios viejos
+se purgan), se recarga el listado entero.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+from psycopg2 import errors
+
+import client_changes
+
+# Debe ser menor que los días que conserva cliente_cambios (client_changes.prune, 60)
+RETENTION_DAYS = 30
+
+# Versión del esquema del archivo (PRAGMA user_version); si cambia, el archivo
+# se rehace y la próxima sincronización es completa
+SCHEMA_VERSION = 2
+
+# (tipo, codigo): el mismo RUC puede ser cliente mayorista y corporativo
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS clientes (
+    tipo TEXT NOT NULL,
+    codigo TEXT NOT NULL,
+    nombre TEXT,
+    telefono TEXT,
+    correo TEXT,
+    PRIMARY KEY (tipo, codigo)
+);
+CREATE TABLE IF NOT EXISTS meta (clave TEXT PRIMARY KEY, valor);
+"""
+
+_COLUMNS = ("codigo", "nombre", "telefono", "correo", "tipo")
+
+
+def default_path(db):
+    """~/.registro_clientes/clientes_<host>_<puerto>_<bd>.sqlite (una copia por servidor y BD)."""
+    kw = db._connect_kwargs
+    name = "_".join(str(kw.get(k) or "") for k in ("host", "port", "database"))
+    name = "".join(c if c.isalnum() or c in "-." else "_" for c in name)
+    return os.path.join(os.path.expanduser("~"), ".registro_clientes", f"clientes_{name}.sqlite")
+
+
+class LocalClientCache:
+    """
+    Listado de clientes en un archivo SQLite. load() lee la copia local (no
+    toca Postgres); sync() la pone al día y puede correr en otro hilo.
+    """
+
+    def __init__(self, db, path=None):
+        self.db = db
+        self.path = path or default_path(db)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._lock = threading.Lock()        # acceso a la conexión SQLite
+        self._sync_lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock:
+            if self._conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                self._conn.executescript("DROP TABLE IF EXISTS clientes; DROP TABLE IF EXISTS meta;")
+            self._conn.executescript(_SCHEMA)
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _meta(self, clave, default=None):
+        row = self._conn.execute("SELECT valor FROM meta WHERE clave = ?", (clave,)).fetchone()
+        return row[0] if row else default
+
+    def _set_meta(self, clave, valor):
+        self._conn.execute("INSERT OR REPLACE INTO meta (clave, valor) VALUES (?, ?)", (clave, valor))
+
+    def synced_at(self):
+        """Hora (epoch) de la última sincronización, o None si nunca se sincronizó."""
+        with self._lock:
+            return self._meta("sincronizado_en")
+
+    def load(self, tipo=None):
+        """Filas como las de get_all_clients, ordenadas por (tipo, codigo)."""
+        return self._select(tipo)
+
+    def load_page(self, after=None, limit=500, tipo=None):
+        """
+        Como DBController.get_clients_page (sin búsqueda) pero de la copia local:
+        `limit` filas desde después de after = (tipo, codigo), por la PK.
+        """
+        return self._select(tipo, after, limit)
+
+    def _select(self, tipo=None, after=None, limit=None):
+        q = "SELECT codigo, nombre, telefono, correo, tipo FROM clientes"
+        conds, params = [], []
+        if tipo and tipo.lower() != "todos":
+            conds.append("lower(tipo) = lower(?)")
+            params.append(tipo)
+        if after is not None:
+            conds.append("(tipo, codigo) > (?, ?)")
+            params += [after[0], str(after[1])]
+        if conds:
+            q += " WHERE " + " AND ".join(conds)
+        q += " ORDER BY tipo, codigo"
+        if limit is not None:
+            q += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(q, params).fetchall()
+        return [dict(zip(_COLUMNS, r)) for r in rows]
+
+    def _store(self, rows):
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO clientes (codigo, nombre, telefono, correo, tipo) VALUES (?, ?, ?, ?, ?)",
+            [tuple(str(r[c]) if c == "codigo" else r[c] for c in _COLUMNS) for r in rows])
+
+    def sync(self, full=False):
+        """
+        Pone al día la copia local. Devuelve {"completa": bool, "cambiados": n,
+        "borrados": n}; cambiados + borrados == 0 si no hubo nada nuevo.
+        """
+        # una sincronización a la vez; el archivo sólo se bloquea al escribir,
+        # así load() no espera a la red
+        with self._sync_lock:
+            with self._lock:
+                xmin = self._meta("xmin")
+                synced_at = self._meta("sincronizado_en")
+            if synced_at is None or time.time() - synced_at > RETENTION_DAYS * 86400:
+                full = True
+            # la marca se toma antes de leer: lo que se confirme después se relee la próxima vez
+            new_xmin = client_changes.current_xmin(self.db)
+            if not full:
+                try:
+                    changed, full = client_changes.changes_since(self.db, xmin)
+                except errors.UndefinedTable:
+                    # BD sin la migración 005: no hay registro de cambios, se recarga todo
+                    full = True
+
+            if full:
+                # sin la caché de DBController: la marca new_xmin es de ahora
+                rows = self.db.get_all_clients(cache=False)
+                with self._lock, self._conn:
+                    self._conn.execute("DELETE FROM clientes")
+                    self._store(rows)
+                    self._set_meta("xmin", new_xmin)
+                    self._set_meta("sincronizado_en", time.time())
+                return {"completa": True, "cambiados": len(rows), "borrados": 0}
+
+            changed = set(changed)
+            rows = self.db.get_clients_by_codes(codigo for _, codigo in changed) if changed else []
+            # el código puede existir con otro tipo que no cambió: sólo los pares anotados
+            rows = [r for r in rows if (r["tipo"], str(r["codigo"])) in changed]
+            present = {(r["tipo"], str(r["codigo"])) for r in rows}
+            gone = [pair for pair in changed if pair not in present]
+            with self._lock, self._conn:
+                self._store(rows)
+                self._conn.executemany("DELETE FROM clientes WHERE tipo = ? AND codigo = ?", gone)
+                self._set_meta("xmin", new_xmin)
+                self._set_meta("sincronizado_en", time.time())
+            return {"completa": False, "cambiados": len(rows), "borrados": len(gone)}
+
+    def remove(self, clients):
+        """Quita de la copia local los pares (tipo, codigo) dados (p.ej. recién borrados en esta sesión)."""
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM clientes WHERE tipo = ? AND codigo = ?",
+                                   [(tipo, str(codigo)) for tipo, codigo in clients])
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
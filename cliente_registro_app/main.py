@@ -5,12 +5,36 @@ Sistema de Registro de Clientes
 Aplicación principal con arquitectura MVC
 """
 
+import logging
 import tkinter as tk
+from psycopg2 import errors
 from tkinter import ttk, messagebox
 from login_view import LoginView
 from home_view import HomeView
 from styles import Colors, Fonts
 from db_controller import DBController
+from report_views import ReportRefresher
+from async_db_controller import AsyncDBController, TkAsyncBridge
+from task_runner import TaskRunner
+import client_changes
+from local_cache import LocalClientCache
+from change_feed import ClientChangeFeed
+
+# Hilos que toman conexiones del pool (una cada uno a la vez). El pool tiene una
+# más para el hilo de Tk, que así nunca espera (ni congela la ventana) por una
+TASK_WORKERS = 4          # TaskRunner: consultas y exportaciones de las vistas
+ASYNC_WORKERS = 2         # AsyncDBController: refresco de reportes desde la vista
+BACKGROUND_THREADS = 2    # ReportRefresher e importación masiva (ImportView)
+POOL_SIZE = TASK_WORKERS + ASYNC_WORKERS + BACKGROUND_THREADS + 1
+
+# Hasta esta cantidad de clientes la búsqueda se filtra en memoria (SearchIndex):
+# el índice se arma en menos de medio segundo y no se consulta la BD en cada tecla
+LOCAL_SEARCH_MAX_CLIENTS = 20000
+
+# Cada cuánto se purga el registro de cambios de clientes (client_changes.prune)
+PRUNE_CHANGES_MS = 24 * 3600 * 1000
+
+logger = logging.getLogger(__name__)
 
 class ClientRegistrationApp:
     """Clase principal de la aplicación"""
@@ -22,12 +46,53 @@ class ClientRegistrationApp:
         self.root.geometry("1200x700")
         self.root.resizable(True, True)
         
-        # Conexión BD
+        # Conexión BD (pool: las vistas y los workers en segundo plano consultan a la vez;
+        # caché de resultados para el listado de clientes y los reportes)
         try:
-            self.db = DBController()
+            self.db = DBController(pooled=True, min_size=1, max_size=POOL_SIZE, cache_size=256)
         except Exception as e:
             messagebox.showerror("Error BD", f"No se pudo conectar a la BD: {e}")
             raise
+
+        # Refresco en segundo plano de las vistas materializadas de reportes sucias
+        self.report_refresher = ReportRefresher(self.db, interval=300, log=logger.info).start()
+
+        # Acceso asíncrono a la BD: el loop de asyncio avanza dentro del mainloop de Tk
+        self.async_bridge = TkAsyncBridge(self.root)
+        self.async_db = AsyncDBController(self.db, max_workers=ASYNC_WORKERS)
+
+        # Consultas y exportaciones de las vistas en segundo plano (ver POOL_SIZE)
+        self.tasks = TaskRunner(self.root, max_workers=TASK_WORKERS)
+
+        # True: el listado de clientes se trae entero y la búsqueda se filtra en memoria
+        # (instalaciones con pocos clientes); False: búsqueda en la BD. Se cuenta en
+        # segundo plano (mientras tanto se busca en la BD); las vistas de clientes
+        # que se abran después usan el resultado
+        self.local_client_search = False
+        self.tasks.submit(self.db.count_clients, key="contar_clientes",
+                          on_done=self._set_local_client_search,
+                          on_error=lambda e: logger.warning("No se pudo contar los clientes, se busca en la BD: %s", e))
+
+        # al iniciar y después una vez por día se purga el registro de cambios de clientes
+        self._prune_client_changes()
+
+        # Copia local (SQLite) del listado de clientes: la pestaña Clientes la muestra
+        # al instante y sólo se traen de la BD los clientes que cambiaron
+        try:
+            self.client_cache = LocalClientCache(self.db)
+        except Exception as e:
+            logger.warning("Sin copia local de clientes: %s", e)
+            self.client_cache = None
+        else:
+            self.tasks.submit(self.client_cache.sync, key="sync_clientes", on_error=lambda e: None)
+
+        # Avisos (LISTEN/NOTIFY) de clientes cambiados en otras sesiones: las vistas
+        # abiertas aplican sólo esos cambios y la copia local se pone al día
+        self.change_feed = ClientChangeFeed(self.db, self.async_bridge).start()
+        if self.client_cache is not None:
+            self.change_feed.add_listener(
+                lambda changes: self.tasks.submit(self.client_cache.sync, key="sync_clientes_aviso",
+                                                  on_error=lambda e: None))
         
         # Configurar estilo
         self.setup_styles()
@@ -42,6 +107,19 @@ class ClientRegistrationApp:
         # Iniciar con la vista de login (pasamos db)
         self.show_login()
     
+    def _prune_client_changes(self):
+        """Purga cliente_cambios en el TaskRunner (ver local_cache.RETENTION_DAYS) y se reprograma."""
+        def failed(e):
+            # BD sin la migración 005: no hay registro de cambios que purgar
+            if not isinstance(e, errors.UndefinedTable):
+                logger.warning("No se pudo purgar el registro de cambios de clientes: %s", e)
+
+        self.tasks.submit(client_changes.prune, self.db, key="purgar_cambios", on_error=failed)
+        self.root.after(PRUNE_CHANGES_MS, self._prune_client_changes)
+
+    def _set_local_client_search(self, total):
+        self.local_client_search = total <= LOCAL_SEARCH_MAX_CLIENTS
+
     def setup_styles(self):
         """Configurar estilos ttk globales"""
         style = ttk.Style()
@@ -92,7 +170,16 @@ class ClientRegistrationApp:
     def run(self):
         """Iniciar la aplicación"""
         self.root.mainloop()
+        self.change_feed.stop()
+        self.tasks.shutdown()
+        self.report_refresher.stop()
+        # primero se cancelan las corrutinas pendientes, después se liberan sus hilos
+        self.async_bridge.close()
+        self.async_db.shutdown()
+        if self.client_cache is not None:
+            self.client_cache.close()
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
     app = ClientRegistrationApp()
     app.run()   
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Migraciones de esquema (índices) y asesor de índices.
+
+    python migrations.py migrate          # aplica las migraciones pendientes
+    python migrations.py refresh          # refresca las vistas de reportes sucias
+    python migrations.py prune-changes    # purga el registro de cambios de clientes viejo
+    python migrations.py status           # lista aplicadas / pendientes
+    python migrations.py advise           # EXPLAIN de las consultas de la app
+
+Las migraciones se registran en la tabla schema_migrations. Los índices se crean
+con CREATE INDEX CONCURRENTLY (sin bloquear escrituras), por eso cada sentencia
+corre en autocommit. Si una falla a mitad de camino puede quedar un índice
+INVALID: hay que borrarlo (DROP INDEX) antes de volver a migrar.
+"""
+
+import argparse
+import re
+
+from db_controller import DBController
+from report_queries import REPORT_QUERIES
+from change_feed import migration_statements as change_feed_statements
+from client_changes import migration_statements as client_change_statements
+from report_views import migration_statements as report_view_statements
+
+# (versión, descripción, sentencias) en orden de aplicación
+MIGRATIONS = [
+    ("001_indices_fk", "Índices sobre las FK que usan los JOIN y filtros de la app", [
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_minorista_admin ON ClienteMinorista (DNI_administrador)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_mayorista_admin ON ClienteMayorista (DNI_administrador)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_corporativo_admin ON ClienteCorporativo (DNI_administrador)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_corporativo_contacto ON ClienteCorporativo (DNI_contacto)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_datos_mayorista_ruc ON DatosClienteMayorista (RUC_Mayorista)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_datos_corporativo_ruc ON DatosClienteCorporativo (RUC_Corporativo)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_contrato_ruc ON Contrato (RUC_Corporativo)",
+    ]),
+    ("002_indices_reportes", "Índices parciales y de expresión para los reportes", [
+        # reportes 8 y 9: contratos activos por cliente
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_contrato_activo_ruc ON Contrato (RUC_Corporativo) "
+        "WHERE Estado = 'Activo'",
+        # reporte 1: EXTRACT(MONTH FROM Fecha_inicio) IN (12, 1) (la expresión debe coincidir)
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_contrato_mes_inicio ON Contrato ((EXTRACT(MONTH FROM Fecha_inicio)))",
+        # reporte 3: agrupación por año de inicio
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_contrato_anio_inicio ON Contrato ((EXTRACT(YEAR FROM Fecha_inicio)))",
+    ]),
+    ("003_vistas_reportes", "Vistas materializadas de los reportes y triggers de refresco",
+     report_view_statements()),
+    ("004_busqueda_trigram", "Búsqueda aproximada sin acentos (pg_trgm + unaccent) por nombre y código", [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        "CREATE EXTENSION IF NOT EXISTS unaccent",
+        # unaccent() es STABLE y no sirve en un índice: se envuelve con el diccionario
+        # fijo en una función IMMUTABLE (la consulta debe usar la misma expresión)
+        """
+        CREATE OR REPLACE FUNCTION normalizar_busqueda(text) RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+        AS $$ SELECT lower(public.unaccent('public.unaccent'::regdictionary, $1)) $$
+        """,
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_minorista_nombre_trgm ON ClienteMinorista "
+        "USING gin (normalizar_busqueda(Nombre_Apellido) gin_trgm_ops)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_mayorista_nombre_trgm ON ClienteMayorista "
+        "USING gin (normalizar_busqueda(Razon_Social) gin_trgm_ops)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_corporativo_nombre_trgm ON ClienteCorporativo "
+        "USING gin (normalizar_busqueda(Razon_Social) gin_trgm_ops)",
+        # búsqueda por prefijo de código (LIKE '2012%'): el índice de la PK no sirve para LIKE
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_minorista_dni_prefijo ON ClienteMinorista (DNI bpchar_pattern_ops)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_mayorista_ruc_prefijo ON ClienteMayorista (RUC bpchar_pattern_ops)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_corporativo_ruc_prefijo ON ClienteCorporativo (RUC bpchar_pattern_ops)",
+    ]),
+    ("005_registro_cambios_clientes", "Registro de cambios de clientes para la sincronización incremental",
+     client_change_statements()),
+    ("006_aviso_cambios_clientes", "NOTIFY con los clientes cambiados para las vistas abiertas",
+     change_feed_statements()),
+]
+
+_TRACKING_DDL = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version text PRIMARY KEY,
+    descripcion text,
+    aplicado_en timestamptz NOT NULL DEFAULT now()
+)
+"""
+
+
+def applied_versions(db):
+    db.execute(_TRACKING_DDL)
+    return {r["version"] for r in db.fetchall("SELECT version FROM schema_migrations")}
+
+
+def migrate(db, log=print):
+    """Aplica en orden las migraciones pendientes; devuelve las versiones aplicadas."""
+    done = applied_versions(db)
+    aplicadas = []
+    with db.connection() as conn:
+        conn.commit()            # cerrar la transacción de lectura que pudiera estar abierta
+        conn.autocommit = True   # CREATE INDEX CONCURRENTLY no admite transacción
+        try:
+            with conn.cursor() as cur:
+                for version, descripcion, statements in MIGRATIONS:
+                    if version in done:
+                        continue
+                    log(f"Aplicando {version}: {descripcion}")
+                    for sql in statements:
+                        cur.execute(sql)
+                    cur.execute("INSERT INTO schema_migrations (version, descripcion) VALUES (%s, %s)",
+                                (version, descripcion))
+                    aplicadas.append(version)
+        finally:
+            conn.autocommit = False
+    return aplicadas
+
+
+# ---------- Asesor de índices ----------
+
+def _app_queries(db):
+    """(nombre, sql, params) de las consultas de DBController y de los reportes."""
+    queries = []
+    for name, sql in DBController._PREPARED_QUERIES.items():
+        # $1, $2... -> %s con valores de ejemplo (el plan no depende del valor exacto)
+        n = len(re.findall(r"\$\d+", sql))
+        queries.append((f"DBController.{name}", re.sub(r"\$\d+", "%s", sql), ("00000000000",) * n))
+    q, params = db._clients_query()
+    queries.append(("DBController.get_all_clients", q, params))
+    q, params = db._clients_query(term="perez")
+    queries.append(("DBController.get_all_clients(term)", q, params))
+    q, params = db._search_query("perez")
+    queries.append(("DBController.search_clients", q, params))
+    for name, info in REPORT_QUERIES.items():
+        queries.append((f"Reporte {name}", info["query"].strip().rstrip(";"), ()))
+    return queries
+
+
+def _seq_scans(plan):
+    """Recorre el árbol del plan y devuelve los nodos Seq Scan."""
+    found = []
+    if plan.get("Node Type") == "Seq Scan":
+        found.append(plan)
+    for child in plan.get("Plans", []):
+        found.extend(_seq_scans(child))
+    return found
+
+
+def advise(db, min_rows=10000):
+    """
+    Hace EXPLAIN (sin ejecutar) de cada consulta de la app y marca los Seq Scan
+    sobre tablas con al menos min_rows filas estimadas (pg_class.reltuples).
+    Devuelve una lista de dicts: consulta, tabla, filas, filtro.
+    """
+    sizes = {r["relname"]: r["reltuples"] for r in db.fetchall(
+        "SELECT relname, reltuples::bigint AS reltuples FROM pg_class WHERE relkind IN ('r', 'p', 'm')")}
+    findings = []
+    for name, sql, params in _app_queries(db):
+        try:
+            row = db.fetchone("EXPLAIN (FORMAT JSON) " + sql, params)
+        except Exception as e:
+            findings.append({"consulta": name, "tabla": None, "filas": None, "filtro": f"Error: {e}"})
+            continue
+        plan = row["QUERY PLAN"][0]["Plan"]
+        for node in _seq_scans(plan):
+            table = node.get("Relation Name")
+            rows = sizes.get(table, 0)
+            if rows >= min_rows:
+                findings.append({"consulta": name, "tabla": table, "filas": rows, "filtro": node.get("Filter")})
+    return findings
+
+
+def main(argv=None):
+    from db_cli import add_connection_args, db_from_args
+    import client_changes
+    from report_views import ReportRefresher
+
+    parser = argparse.ArgumentParser(description="Migraciones de índices y asesor de consultas.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("migrate", help="aplicar migraciones pendientes")
+    sub.add_parser("status", help="ver migraciones aplicadas y pendientes")
+    ref = sub.add_parser("refresh", help="refrescar las vistas materializadas de los reportes")
+    ref.add_argument("--all", action="store_true", help="refrescar también las que no están sucias")
+    prn = sub.add_parser("prune-changes", help="borrar cambios de clientes viejos (cliente_cambios)")
+    prn.add_argument("--days", type=int, default=60, help="días que se conservan (por defecto 60)")
+    adv = sub.add_parser("advise", help="marcar Seq Scan sobre tablas grandes")
+    adv.add_argument("--min-rows", type=int, default=10000)
+    add_connection_args(parser)
+    args = parser.parse_args(argv)
+
+    db = db_from_args(args)
+    try:
+        if args.command == "migrate":
+            aplicadas = migrate(db)
+            print(f"{len(aplicadas)} migraciones aplicadas" if aplicadas else "Nada que aplicar")
+        elif args.command == "status":
+            done = applied_versions(db)
+            for version, descripcion, _ in MIGRATIONS:
+                print(f"[{'x' if version in done else ' '}] {version}  {descripcion}")
+        elif args.command == "refresh":
+            refreshed = ReportRefresher(db).refresh(force=args.all)
+            print("Vistas refrescadas: " + ", ".join(refreshed) if refreshed else "Ninguna vista sucia")
+        elif args.command == "prune-changes":
+            client_changes.prune(db, args.days)
+            print(f"Cambios de más de {args.days} días borrados")
+        else:
+            findings = advise(db, args.min_rows)
+            for f in findings:
+                if f["tabla"] is None:
+                    print(f"{f['consulta']}: {f['filtro']}")
+                else:
+                    print(f"{f['consulta']}: Seq Scan en {f['tabla']} (~{f['filas']:,} filas)"
+                          + (f" filtro {f['filtro']}" if f["filtro"] else ""))
+            if not findings:
+                print("Sin Seq Scan sobre tablas grandes")
+            return 1 if findings else 0
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
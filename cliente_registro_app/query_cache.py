@@ -0,0 +1,94 @@
+"""
+Caché de resultados de consultas (LRU con TTL) que usa DBController
+
+Cada entrada recuerda las tablas que lee su SQL; una escritura sobre cualquiera
+de ellas invalida la entrada. Es thread-safe: el pool atiende varios hilos.
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+
+# Nombres que siguen a FROM/JOIN/INTO/UPDATE/TABLE/VIEW/TRUNCATE. Puede tomar algún
+# nombre que no es tabla (EXTRACT(... FROM columna)): sólo agrega una etiqueta de más.
+_TABLE_RE = re.compile(
+    r"\b(?:FROM|JOIN|INTO|UPDATE|TABLE|VIEW|TRUNCATE)\s+(?:(?:ONLY|CONCURRENTLY)\s+)?([A-Za-z_][\w.]*)",
+    re.IGNORECASE)
+
+
+def tables_in(sql):
+    """Tablas (en minúsculas, sin esquema) que menciona el SQL."""
+    return {name.rsplit(".", 1)[-1].lower() for name in _TABLE_RE.findall(sql)}
+
+
+class QueryCache:
+    """LRU de hasta max_entries resultados; cada uno vence a los `ttl` segundos."""
+
+    def __init__(self, max_entries=256, default_ttl=30):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._entries = OrderedDict()    # key -> (vence, tablas, valor)
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._invalidated_at = {}         # tabla -> generación de su última invalidación
+        self._cleared_at = -1
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def generation(self):
+        """Marca a pasar a put(): si una tabla se invalida después, no se guarda."""
+        with self._lock:
+            return self._generation
+
+    def get(self, key):
+        """(True, valor) si hay una entrada vigente; (False, None) si no."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[2]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value, tables, ttl=None, since=None):
+        with self._lock:
+            # una escritura ocurrió mientras se leía: el resultado puede estar viejo
+            if since is not None and (self._cleared_at > since or
+                                      any(self._invalidated_at.get(t, -1) > since for t in tables)):
+                return
+            expires = time.monotonic() + (self.default_ttl if ttl is None else ttl)
+            self._entries[key] = (expires, frozenset(tables), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, tables):
+        """Descarta las entradas que leen alguna de `tables`; devuelve cuántas."""
+        tables = set(tables)
+        if not tables:
+            return 0
+        with self._lock:
+            self._generation += 1
+            for t in tables:
+                self._invalidated_at[t] = self._generation
+            stale = [k for k, (_, deps, _) in self._entries.items() if deps & tables]
+            for k in stale:
+                del self._entries[k]
+            self.invalidations += len(stale)
+            return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._cleared_at = self._generation
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses,
+                    "entradas": len(self._entries), "invalidadas": self.invalidations}
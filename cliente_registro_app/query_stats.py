@@ -0,0 +1,151 @@
+"""
+Estadísticas de latencia por consulta (las registra DBController)
+
+Cada sentencia se agrupa por su "huella": el SQL con los literales y parámetros
+reemplazados por ?, de modo que get_client_by_code('123...') y ('456...') cuentan
+como la misma consulta. Por huella se guardan llamadas, filas y un histograma de
+latencias (buckets geométricos) del que salen p50/p95/p99. Las sentencias que
+superan slow_ms quedan además en un registro de consultas lentas.
+"""
+
+import json
+import logging
+import math
+import re
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+_COMMENTS_RE = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"(?<![\w$])-?\d+(?:\.\d+)?\b")
+_PARAM_RE = re.compile(r"%s|%\(\w+\)s|\$\d+")
+_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACES_RE = re.compile(r"\s+")
+
+
+def fingerprint(sql):
+    """SQL normalizado: sin comentarios, literales/parámetros -> ?, listas -> (...)."""
+    if isinstance(sql, bytes):
+        sql = sql.decode("utf-8", "replace")
+    sql = _COMMENTS_RE.sub(" ", sql)
+    sql = _STRING_RE.sub("?", sql)
+    sql = _PARAM_RE.sub("?", sql)
+    sql = _NUMBER_RE.sub("?", sql)
+    sql = _LIST_RE.sub("(...)", sql)   # VALUES (?,?,?),(?,?,?) / IN (?, ?) de largo variable
+    sql = re.sub(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+", "(...)", sql)
+    return _SPACES_RE.sub(" ", sql).strip().rstrip(";")
+
+
+class LatencyHistogram:
+    """Buckets geométricos (x1.25) desde 0.05 ms: error relativo < 25% en los percentiles."""
+
+    BASE_MS = 0.05
+    FACTOR = 1.25
+    BUCKETS = 80      # hasta ~0.05 * 1.25^80 ms (unos 15 minutos)
+
+    def __init__(self):
+        self.counts = [0] * self.BUCKETS
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def _bucket(self, ms):
+        if ms <= self.BASE_MS:
+            return 0
+        return min(self.BUCKETS - 1, int(math.log(ms / self.BASE_MS, self.FACTOR)) + 1)
+
+    def record(self, ms):
+        self.counts[self._bucket(ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, p):
+        """Límite superior del bucket donde cae el percentil p (0-100)."""
+        if not self.count:
+            return 0.0
+        target = math.ceil(self.count * p / 100)
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                return min(self.BASE_MS * self.FACTOR ** i, self.max_ms)
+        return self.max_ms
+
+
+class _QueryEntry:
+    def __init__(self, entry_id, fingerprint):
+        self.id = entry_id
+        self.fingerprint = fingerprint
+        self.rows = 0
+        self.histogram = LatencyHistogram()
+
+
+class QueryStats:
+    """Acumula estadísticas por huella; thread-safe (lo usan todas las conexiones del pool)."""
+
+    def __init__(self, slow_ms=500, slow_log_size=200):
+        self.slow_ms = slow_ms
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._slow = deque(maxlen=slow_log_size)
+        self.since = time.time()
+
+    def record(self, sql, seconds, rows=0):
+        ms = seconds * 1000
+        fp = fingerprint(sql)
+        with self._lock:
+            entry = self._entries.get(fp)
+            if entry is None:
+                entry = self._entries[fp] = _QueryEntry(len(self._entries) + 1, fp)
+            entry.histogram.record(ms)
+            entry.rows += max(rows or 0, 0)
+            if self.slow_ms is not None and ms >= self.slow_ms:
+                text = sql.decode("utf-8", "replace") if isinstance(sql, bytes) else sql
+                self._slow.append({"cuando": time.time(), "ms": round(ms, 1), "filas": rows,
+                                   "sql": _SPACES_RE.sub(" ", text).strip()[:2000]})
+                logger.warning("Consulta lenta (%.0f ms): %s", ms, fp[:200])
+
+    def snapshot(self):
+        """Una fila por huella, de mayor a menor tiempo total."""
+        with self._lock:
+            rows = []
+            for e in self._entries.values():
+                h = e.histogram
+                rows.append({
+                    "id": e.id,
+                    "consulta": e.fingerprint,
+                    "llamadas": h.count,
+                    "filas": e.rows,
+                    "total_ms": round(h.total_ms, 1),
+                    "media_ms": round(h.total_ms / h.count, 2) if h.count else 0.0,
+                    "p50_ms": round(h.percentile(50), 2),
+                    "p95_ms": round(h.percentile(95), 2),
+                    "p99_ms": round(h.percentile(99), 2),
+                    "max_ms": round(h.max_ms, 2),
+                })
+        rows.sort(key=lambda r: r["total_ms"], reverse=True)
+        return rows
+
+    def slow_queries(self):
+        with self._lock:
+            return list(self._slow)
+
+    def reset(self):
+        with self._lock:
+            self._entries.clear()
+            self._slow.clear()
+            self.since = time.time()
+
+    def export_json(self, path, extra=None):
+        """Vuelca consultas y consultas lentas (y `extra`, p.ej. stats de caché) a un JSON."""
+        data = {"desde": self.since, "exportado": time.time(), "umbral_lento_ms": self.slow_ms,
+                "consultas": self.snapshot(), "lentas": self.slow_queries()}
+        if extra:
+            data.update(extra)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2, default=str)
+        return data
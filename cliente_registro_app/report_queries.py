@@ -0,0 +1,195 @@
+"""
+Catálogo de consultas de los reportes (lo usan ReportsView y las herramientas de BD)
+
+Cada reporte puede leerse de una vista materializada (ver report_views.py):
+    view    nombre de la vista materializada
+    key     columnas que identifican una fila (índice único para REFRESH CONCURRENTLY);
+            None = el reporte no tiene clave natural y se numera con una columna "fila"
+    order   ORDER BY al leer la vista (None = orden original, por "fila")
+    tables  tablas de origen (en minúsculas, como TG_TABLE_NAME) que la ensucian
+"""
+
+REPORT_QUERIES = {
+    "1. Clientes nuevos por fechas festivas": {
+        "query": """
+            SELECT c.Id_contrato, c.Descripcion, c.Fecha_inicio,
+                   CASE WHEN EXTRACT(MONTH FROM c.Fecha_inicio) IN (12, 1)
+                        THEN 'Campaña Festiva' ELSE 'Otro Periodo' END AS periodo,
+                   cc.Razon_Social AS cliente_corporativo
+            FROM Contrato c
+            LEFT JOIN ClienteCorporativo cc ON cc.RUC = c.RUC_Corporativo
+            WHERE EXTRACT(MONTH FROM c.Fecha_inicio) IN (12, 1);
+        """,
+        "columns": ["Id Contrato", "Descripción", "Fecha Inicio", "Periodo", "Cliente Corporativo"],
+        "view": "mv_reporte_01",
+        "key": ["id_contrato"],
+        "order": "id_contrato",
+        "tables": ["contrato", "clientecorporativo"]
+    },
+
+    "2. Ranking de regiones activas": {
+        "query": """
+            SELECT tipo_cliente,
+                   SPLIT_PART(Direccion_Fiscal, '-', 2) AS ciudad,
+                   COUNT(*) AS cantidad_clientes
+            FROM (
+                SELECT 'Corporativo' AS tipo_cliente, Direccion_Fiscal FROM DatosClienteCorporativo
+                UNION ALL
+                SELECT 'Mayorista', Direccion_Fiscal FROM ClienteMayorista
+            ) AS direcciones
+            GROUP BY tipo_cliente, ciudad
+            ORDER BY cantidad_clientes DESC;
+        """,
+        "columns": ["Tipo Cliente", "Ciudad", "Cantidad Clientes"],
+        "view": "mv_reporte_02",
+        "key": ["tipo_cliente", "ciudad"],
+        "order": "cantidad_clientes DESC",
+        "tables": ["datosclientecorporativo", "clientemayorista"]
+    },
+
+    "3. Crecimiento anual de clientes": {
+        "query": """
+            SELECT EXTRACT(YEAR FROM Fecha_inicio) AS anio,
+                   COUNT(Id_contrato) AS nuevos_clientes
+            FROM Contrato
+            GROUP BY anio
+            ORDER BY anio;
+        """,
+        "columns": ["Año", "Nuevos Clientes"],
+        "view": "mv_reporte_03",
+        "key": ["anio"],
+        "order": "anio",
+        "tables": ["contrato"]
+    },
+
+    "4. Preferencias de clientes minoristas": {
+        "query": """
+            SELECT Preferencias, COUNT(*) AS cantidad
+            FROM ClienteMinorista
+            GROUP BY Preferencias
+            ORDER BY cantidad DESC;
+        """,
+        "columns": ["Preferencias", "Cantidad"],
+        "view": "mv_reporte_04",
+        "key": ["preferencias"],
+        "order": "cantidad DESC",
+        "tables": ["clienteminorista"]
+    },
+
+    "5. Clientes sin contrato completo": {
+        "query": """
+            SELECT 
+                'Corporativo' AS tipo_cliente,
+                cc.Razon_Social AS nombre_cliente,
+                CASE WHEN c.Id_contrato IS NULL THEN 'Sin Contrato' ELSE 'Con Contrato' END AS estado_contrato,
+                CASE WHEN dcc.Direccion_Fiscal IS NULL OR dcc.Telefono IS NULL THEN 'Datos incompletos' ELSE 'Datos completos' END AS estado_datos
+            FROM ClienteCorporativo cc
+            LEFT JOIN Contrato c ON cc.RUC = c.RUC_Corporativo
+            LEFT JOIN DatosClienteCorporativo dcc ON cc.RUC = dcc.RUC_Corporativo
+
+            UNION ALL
+
+            SELECT
+                'Mayorista' AS tipo_cliente,
+                cm.Razon_Social AS nombre_cliente,
+                'Sin Contrato' AS estado_contrato,
+                CASE WHEN dcm.Telefono IS NULL OR dcm.Correo IS NULL THEN 'Datos incompletos' ELSE 'Datos completos' END AS estado_datos
+            FROM ClienteMayorista cm
+            LEFT JOIN DatosClienteMayorista dcm ON cm.RUC = dcm.RUC_Mayorista;
+        """,
+        "columns": ["Tipo Cliente", "Nombre", "Estado Contrato", "Estado Datos"],
+        "view": "mv_reporte_05",
+        "key": None,
+        "order": None,
+        "tables": ["clientecorporativo", "contrato", "datosclientecorporativo", "clientemayorista", "datosclientemayorista"]
+    },
+
+    "6. Cobertura de clientes corporativos y mayoristas": {
+        "query": """
+            SELECT tipo_cliente, nombre_cliente,
+                   COUNT(DISTINCT TRIM(ciudad)) AS cantidad_ciudades
+            FROM (
+                SELECT 'Mayorista' AS tipo_cliente, cm.Razon_Social AS nombre_cliente, SPLIT_PART(cm.Direccion_Fiscal, '-', 2) AS ciudad FROM ClienteMayorista cm
+                UNION ALL
+                SELECT 'Corporativo', cc.Razon_Social, SPLIT_PART(dcc.Direccion_Fiscal, '-', 2) FROM ClienteCorporativo cc JOIN DatosClienteCorporativo dcc ON cc.RUC = dcc.RUC_Corporativo
+            ) AS cobertura
+            GROUP BY tipo_cliente, nombre_cliente
+            ORDER BY cantidad_ciudades DESC;
+        """,
+        "columns": ["Tipo Cliente", "Cliente", "Ciudades Cubiertas"],
+        "view": "mv_reporte_06",
+        "key": ["tipo_cliente", "nombre_cliente"],
+        "order": "cantidad_ciudades DESC",
+        "tables": ["clientemayorista", "clientecorporativo", "datosclientecorporativo"]
+    },
+
+    "7. Distribución de correos electrónicos": {
+        "query": """
+            SELECT 'Cliente Minorista' AS tipo, COUNT(Correo) AS total FROM ClienteMinorista
+            UNION ALL
+            SELECT 'Cliente Mayorista', COUNT(Correo) FROM DatosClienteMayorista
+            UNION ALL
+            SELECT 'Cliente Corporativo', COUNT(Correo) FROM ClienteCorporativo;
+        """,
+        "columns": ["Tipo Cliente", "Cantidad Correos"],
+        "view": "mv_reporte_07",
+        "key": None,
+        "order": None,
+        "tables": ["clienteminorista", "datosclientemayorista", "clientecorporativo"]
+    },
+
+    "8. Contratos activos por cliente corporativo": {
+        "query": """
+            SELECT cc.Razon_Social AS cliente, COUNT(c.Id_contrato) AS total_activos
+            FROM ClienteCorporativo cc
+            LEFT JOIN Contrato c ON cc.RUC = c.RUC_Corporativo
+            WHERE c.Estado = 'Activo'
+            GROUP BY cc.Razon_Social
+            ORDER BY total_activos DESC
+            LIMIT 10;
+        """,
+        "columns": ["Cliente Corporativo", "Contratos Activos"],
+        "view": "mv_reporte_08",
+        "key": ["cliente"],
+        "order": "total_activos DESC",
+        "tables": ["clientecorporativo", "contrato"]
+    },
+
+    "9. Administradores con más clientes corporativos activos": {
+        "query": """
+            SELECT a.DNI, a.Nombre_Apellido AS administrador, COUNT(DISTINCT cc.RUC) AS clientes_activos
+            FROM Administrador a
+            LEFT JOIN ClienteCorporativo cc ON a.DNI = cc.DNI_administrador
+            LEFT JOIN Contrato c ON cc.RUC = c.RUC_Corporativo
+            WHERE c.Estado = 'Activo'
+            GROUP BY a.DNI, a.Nombre_Apellido
+            ORDER BY clientes_activos DESC;
+        """,
+        "columns": ["DNI", "Administrador", "Clientes Activos"],
+        "view": "mv_reporte_09",
+        "key": ["dni"],
+        "order": "clientes_activos DESC",
+        "tables": ["administrador", "clientecorporativo", "contrato"]
+    },
+
+    "10. Ranking de administradores según clientes gestionados": {
+        "query": """
+            SELECT a.DNI, a.Nombre_Apellido AS administrador, COUNT(todos.DNI) AS cantidad
+            FROM Administrador a
+            LEFT JOIN (
+                SELECT DNI_administrador AS DNI FROM ClienteMinorista
+                UNION ALL
+                SELECT DNI_administrador FROM ClienteMayorista
+                UNION ALL
+                SELECT DNI_administrador FROM ClienteCorporativo
+            ) todos ON a.DNI = todos.DNI
+            GROUP BY a.DNI, a.Nombre_Apellido
+            ORDER BY cantidad DESC;
+        """,
+        "columns": ["DNI", "Administrador", "Clientes Gestionados"],
+        "view": "mv_reporte_10",
+        "key": ["dni"],
+        "order": "cantidad DESC",
+        "tables": ["administrador", "clienteminorista", "clientemayorista", "clientecorporativo"]
+    }
+}
@@ -0,0 +1,155 @@
+"""
+Vistas materializadas de los reportes y su refresco incremental
+
+Cada reporte de REPORT_QUERIES con "view" se guarda en una vista materializada.
+Los triggers de las tablas de origen sólo marcan la vista como "sucia" en
+report_refresh_state; ReportRefresher refresca (REFRESH ... CONCURRENTLY, sin
+bloquear lecturas) las vistas sucias cada cierto intervalo o a pedido.
+"""
+
+import threading
+
+from report_queries import REPORT_QUERIES
+
+_STATE_DDL = """
+CREATE TABLE IF NOT EXISTS report_refresh_state (
+    vista text PRIMARY KEY,
+    tablas text[] NOT NULL,
+    sucia boolean NOT NULL DEFAULT false,
+    actualizado_en timestamptz
+)
+"""
+
+# Un trigger por sentencia: marca todas las vistas que dependen de la tabla modificada.
+# El filtro NOT sucia evita reescribir la fila (y el bloqueo) en cada escritura.
+_TRIGGER_FN = """
+CREATE OR REPLACE FUNCTION marcar_reportes_sucios() RETURNS trigger AS $$
+BEGIN
+    UPDATE report_refresh_state SET sucia = true
+    WHERE NOT sucia AND TG_TABLE_NAME = ANY(tablas);
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+
+def _definition(info):
+    sql = info["query"].strip().rstrip(";")
+    if info["key"] is None:
+        # sin clave natural: se numeran las filas en el orden original del reporte
+        return f"SELECT row_number() OVER () AS fila, q.* FROM ({sql}) q"
+    return sql
+
+
+def source_tables():
+    tables = []
+    for info in REPORT_QUERIES.values():
+        tables += [t for t in info.get("tables", []) if t not in tables]
+    return tables
+
+
+def migration_statements():
+    """Sentencias de la migración que crea las vistas, el estado y los triggers."""
+    statements = [_STATE_DDL, _TRIGGER_FN]
+    for info in REPORT_QUERIES.values():
+        view = info.get("view")
+        if not view:
+            continue
+        key = ", ".join(info["key"] or ["fila"])
+        statements += [
+            f"CREATE MATERIALIZED VIEW IF NOT EXISTS {view} AS {_definition(info)} WITH DATA",
+            f"CREATE UNIQUE INDEX IF NOT EXISTS {view}_key ON {view} ({key})",
+            "INSERT INTO report_refresh_state (vista, tablas, actualizado_en) VALUES "
+            f"('{view}', ARRAY{info['tables']!r}, now()) "
+            "ON CONFLICT (vista) DO UPDATE SET tablas = EXCLUDED.tablas",
+        ]
+    for table in source_tables():
+        statements += [
+            f"DROP TRIGGER IF EXISTS trg_reportes_sucios ON {table}",
+            f"CREATE TRIGGER trg_reportes_sucios AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table} "
+            "FOR EACH STATEMENT EXECUTE FUNCTION marcar_reportes_sucios()",
+        ]
+    return statements
+
+
+def view_query(info):
+    """SELECT sobre la vista materializada del reporte, en el orden del reporte."""
+    return f"SELECT * FROM {info['view']} ORDER BY {info['order'] or 'fila'}"
+
+
+def strip_row_number(rows):
+    """Quita la columna "fila" que agregan las vistas sin clave natural."""
+    for r in rows:
+        r.pop("fila", None)
+    return rows
+
+
+def freshness(db, view):
+    """(actualizado_en, sucia) de la vista, o None si no está registrada."""
+    row = db.fetchone("SELECT actualizado_en, sucia FROM report_refresh_state WHERE vista = %s", (view,))
+    return (row["actualizado_en"], row["sucia"]) if row else None
+
+
+class ReportRefresher:
+    """Refresca las vistas sucias en un hilo propio cada `interval` segundos."""
+
+    def __init__(self, db, interval=300, log=None):
+        self.db = db
+        self.interval = interval
+        self.log = log or (lambda msg: None)
+        self._lock = threading.Lock()     # un refresco a la vez (hilo y botón de la vista)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def refresh(self, view=None, force=False):
+        """
+        Refresca `view` (o todas) si está sucia o si force=True.
+        Devuelve la lista de vistas refrescadas.
+        """
+        with self._lock:
+            sql = "SELECT vista FROM report_refresh_state"
+            conditions, params = [], []
+            if view:
+                conditions.append("vista = %s")
+                params.append(view)
+            if not force:
+                conditions.append("sucia")
+            if conditions:
+                sql += " WHERE " + " AND ".join(conditions)
+            refreshed = []
+            for r in self.db.fetchall(sql, params):
+                name = r["vista"]
+                # limpiar la marca antes de refrescar: una escritura durante el refresco
+                # vuelve a ensuciarla y se toma en la próxima pasada
+                started = self.db.fetchone("SELECT clock_timestamp() AS t")["t"]
+                self.db.execute("UPDATE report_refresh_state SET sucia = false WHERE vista = %s", (name,))
+                try:
+                    self.db.execute(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {name}")
+                except Exception:
+                    self.db.execute("UPDATE report_refresh_state SET sucia = true WHERE vista = %s", (name,))
+                    raise
+                self.db.execute("UPDATE report_refresh_state SET actualizado_en = %s WHERE vista = %s",
+                                (started, name))
+                refreshed.append(name)
+            return refreshed
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                refreshed = self.refresh()
+                if refreshed:
+                    self.log(f"Vistas refrescadas: {', '.join(refreshed)}")
+            except Exception as e:
+                self.log(f"No se pudieron refrescar las vistas: {e}")
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="report-refresher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
@@ -3,9 +3,18 @@ Vista del Módulo de Reportes conectada a la BD
 """
 # reports_view.py
 import csv
+import logging
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
+import psycopg2
+from psycopg2 import errors
+from change_feed import changed_tables
+from query_cache import tables_in
+from report_queries import REPORT_QUERIES
+from report_views import freshness, strip_row_number, view_query
 from styles import Colors, Fonts
+from task_runner import run_task
+from virtual_tree import VirtualTreeview
 
 # matplotlib para gráficos y exportar a PDF (tabla como figura)
 import matplotlib
@@ -20,29 +29,49 @@ try:
 except Exception:
     _HAS_OPENPYXL = False
 
+logger = logging.getLogger(__name__)
+
 
 class ReportsView:
     """Vista del módulo de reportes (con export Excel/PDF y gráficos embebidos)."""
 
-    def __init__(self, parent, db_controller, back_callback=None):
+    def __init__(self, parent, db_controller, back_callback=None, refresher=None, async_db=None, bridge=None,
+                 tasks=None, change_feed=None):
         """
         parent: frame donde se incrusta la vista (HomeView pasa content_area)
         db_controller: instancia de DBController (tiene fetchall)
         back_callback: función opcional a llamar al pulsar INICIO (normalmente HomeView.show_inicio)
+        refresher: ReportRefresher opcional de la app (botón "Actualizar datos")
+        async_db / bridge: AsyncDBController y TkAsyncBridge de la app; si están, el
+            refresco corre fuera del hilo de Tk
+        tasks: TaskRunner de la app; si está, las consultas y exportaciones corren en
+            segundo plano (si no, en el hilo de Tk como antes)
+        change_feed: ClientChangeFeed de la app; si está, el reporte en pantalla se
+            recarga cuando otra sesión cambia clientes de las tablas que lee
         """
         self.parent = parent
         self.db = db_controller
         self.back_callback = back_callback
+        self.refresher = refresher
+        self.async_db = async_db
+        self.bridge = bridge
+        self.tasks = tasks
+        self.change_feed = change_feed
 
         # Estado actual (columnas/filas) para exportar/graficar
         self.current_columns = []
         self.current_rows = []
+        self.current_query = None   # SQL del reporte cargado (para exportar en streaming)
 
         # Frame principal
         self.main_frame = tk.Frame(parent, bg=Colors.SURFACE)
         self.main_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
 
         self.create_widgets()
+        if self.change_feed is not None:
+            self.change_feed.add_listener(self._on_client_changes)
+            self.main_frame.bind(
+                '<Destroy>', lambda e: self.change_feed.remove_listener(self._on_client_changes), add="+")
         # No cargamos un reporte por defecto automáticamente: el usuario elegirá.
         # Pero si quieres que cargue el 3ro por defecto, descomenta la siguiente línea:
         # self.load_report_data()
@@ -152,6 +181,18 @@ class ReportsView:
                               bg=Colors.BACKGROUND, fg=Colors.TEXT, command=self.show_graph_window, cursor="hand2")
         graph_btn.pack(side=tk.LEFT, padx=8)
 
+        if self.refresher is not None:
+            tk.Button(buttons_frame, text="Actualizar datos", font=Fonts.BUTTON,
+                      bg=Colors.BACKGROUND, fg=Colors.TEXT, command=self.refresh_report_view,
+                      cursor="hand2").pack(side=tk.LEFT, padx=8)
+
+        # Antigüedad de los datos (vista materializada o consulta en vivo)
+        self.freshness_label = tk.Label(right_panel, text="", font=Fonts.SMALL,
+                                        bg=Colors.SURFACE, fg=Colors.TEXT_SECONDARY, anchor=tk.W)
+        self.freshness_label.pack(fill=tk.X)
+        if self.tasks is not None:
+            self.tasks.busy_indicator(buttons_frame).pack(side=tk.RIGHT)
+
         # Treeview (con scrollbar)
         table_frame = tk.Frame(right_panel, bg=Colors.SURFACE)
         table_frame.pack(fill=tk.BOTH, expand=True, pady=(6,0))
@@ -162,7 +203,8 @@ class ReportsView:
         hsb = ttk.Scrollbar(table_frame, orient="horizontal")
         hsb.pack(side=tk.BOTTOM, fill=tk.X)
 
-        self.tree = ttk.Treeview(table_frame, show="headings", yscrollcommand=vsb.set, xscrollcommand=hsb.set)
+        # sólo se crean items para las filas visibles (ver virtual_tree.py)
+        self.tree = VirtualTreeview(table_frame, show="headings", yscrollcommand=vsb.set, xscrollcommand=hsb.set)
         self.tree.pack(fill=tk.BOTH, expand=True)
 
         vsb.config(command=self.tree.yview)
@@ -226,67 +268,143 @@ class ReportsView:
             messagebox.showerror("Error", "No existe consulta para el reporte seleccionado.")
             return
 
-        sql = qinfo["query"]
         columns = qinfo["columns"]
 
+        def show(result):
+            sql, rows, fresh = result
+            self._show_freshness(fresh)
+            self.current_columns = columns
+            self.current_rows = rows
+            self.current_query = sql
+            self.update_tree(columns, rows, key=qinfo.get("key"))
+
+        # al cambiar de reporte se descarta la carga anterior que siga en curso
+        run_task(self.tasks, "reporte", self._fetch_report, qinfo, on_done=show,
+                 on_error=lambda e: messagebox.showerror("Error BD", f"No se pudo ejecutar la consulta:\n{e}"))
+
+    def _fetch_report(self, qinfo):
+        """(sql, filas, frescura) del reporte. Corre fuera del hilo de Tk: no toca widgets."""
+        # Primero la vista materializada; si no existe (migración 003 sin aplicar) en vivo
+        if qinfo.get("view"):
+            try:
+                fresh = freshness(self.db, qinfo["view"])
+                if fresh is not None:
+                    sql = view_query(qinfo)
+                    return sql, strip_row_number(self.db.fetchall(sql, cache_ttl=300)), fresh
+            except errors.UndefinedTable:
+                pass   # BD sin la migración 003: no es un error, se usa la consulta en vivo
+            except psycopg2.Error:
+                logger.exception("No se pudo leer la vista %s; se usa la consulta en vivo", qinfo["view"])
+        sql = qinfo["query"]
+        return sql, self.db.fetchall(sql, cache_ttl=60), None
+
+    def _show_freshness(self, fresh):
+        if fresh is None:
+            self.freshness_label.config(text="Datos en vivo")
+            return
+        refreshed_at, dirty = fresh
+        text = "Datos al " + (refreshed_at.astimezone().strftime("%d/%m/%Y %H:%M") if refreshed_at else "-")
+        if dirty:
+            text += " (hay cambios pendientes de actualizar)"
+        self.freshness_label.config(text=text)
+
+    def refresh_report_view(self):
+        """Refresca ya la vista del reporte seleccionado y lo vuelve a cargar."""
+        sel = self.report_listbox.curselection()
+        if not sel:
+            return
+        qinfo = self.get_queries().get(self.reports_list[sel[0]])
+        if not qinfo or not qinfo.get("view"):
+            self.load_report_data()
+            return
+        if self.bridge is not None and self.async_db is not None:
+            self.freshness_label.config(text="Actualizando datos...")
+            self.bridge.spawn(self._refresh_async(qinfo["view"]), on_error=self._refresh_failed)
+            return
         try:
-            rows = self.db.fetchall(sql)
+            self.refresher.refresh(qinfo["view"], force=True)
         except Exception as e:
-            messagebox.showerror("Error BD", f"No se pudo ejecutar la consulta:\n{e}")
+            self._refresh_failed(e)
             return
+        self.load_report_data()
 
-        self.current_columns = columns
-        self.current_rows = rows
+    async def _refresh_async(self, view):
+        await self.async_db.run(self.refresher.refresh, view, force=True)
+        if self.main_frame.winfo_exists():   # el usuario pudo cambiar de vista mientras tanto
+            self.load_report_data()
 
-        self.update_tree(columns, rows)
+    def _on_client_changes(self, changes):
+        """Avisos del ChangeFeed: recarga el reporte cargado si lee alguna tabla cambiada."""
+        sel = self.report_listbox.curselection()
+        if not sel or self.current_query is None:
+            return
+        qinfo = self.get_queries().get(self.reports_list[sel[0]])
+        if not qinfo:
+            return
+        # la caché ya se descartó (ChangeFeed); las vistas materializadas quedan
+        # sucias por sus triggers y la recarga lo indica junto a la fecha
+        tables = changed_tables(changes)
+        if tables is None or tables & set(qinfo.get("tables") or tables_in(qinfo["query"])):
+            self.load_report_data()
+
+    def _refresh_failed(self, e):
+        messagebox.showerror("Error BD", f"No se pudo actualizar el reporte:\n{e}")
 
     # -----------------------------
     # ACTUALIZAR TREEVIEW
     # -----------------------------
-    def update_tree(self, columns, rows):
-        # limpiar
-        for r in self.tree.get_children():
-            self.tree.delete(r)
-
-        # configurar columnas
-        self.tree["columns"] = columns
-        for col in columns:
-            self.tree.heading(col, text=col)
-            self.tree.column(col, width=150, anchor=tk.W)
-
-        # insertar filas
-        for r in rows:
-            # convertir dict a valores en orden
-            vals = tuple(r.get(k) if k in r else next(iter(r.values())) for k in r.keys()) if isinstance(r, dict) else tuple(r)
-            # mejor: usar r.values() asumiendo que fetchall retorna RealDictCursor -> dict with keys in query order
-            try:
-                vals = tuple(r.values())
-            except Exception:
-                vals = tuple(r)
-            self.tree.insert("", tk.END, values=vals)
+    def update_tree(self, columns, rows, key=None):
+        """
+        Muestra las filas (dicts de fetchall). Con el mismo reporte en pantalla
+        (recarga, filtro rápido) se reconcilia por la clave del reporte: sólo
+        cambian las filas distintas y se conservan desplazamiento y selección.
+        key: columnas clave del reporte (None = se identifican por posición).
+        """
+        if tuple(self.tree["columns"]) != tuple(columns):
+            # otro reporte: configurar columnas
+            self.tree["columns"] = columns
+            for col in columns:
+                self.tree.heading(col, text=col)
+                self.tree.column(col, width=150, anchor=tk.W)
+            self.tree.key = (lambda r: "|".join(str(r.get(c)) for c in key)) if key else None
+            self.tree.set_rows(rows)
+            return
+        self.tree.update_rows(rows)
 
     # -----------------------------
     # DESCARGAR CSV
     # -----------------------------
     def download_report(self):
-        rows = [self.tree.item(r)["values"] for r in self.tree.get_children()]
-        if not rows:
-            messagebox.showwarning("Descarga", "No hay datos para exportar.")
-            return
+        # Sin filtro rápido exportamos directo desde la BD con un cursor server-side,
+        # así el CSV no depende de lo que quepa en memoria / en la tabla.
+        stream = self.current_query is not None and not self.quick_search.get().strip()
+        rows = None
+        if not stream:
+            rows = [tuple(r.values()) for r in self.tree.source.rows]
+            if not rows:
+                messagebox.showwarning("Descarga", "No hay datos para exportar.")
+                return
 
         file_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV files", "*.csv")])
         if not file_path:
             return
 
-        try:
-            with open(file_path, "w", newline="", encoding="utf-8") as f:
-                writer = csv.writer(f)
-                writer.writerow(self.current_columns)
+        run_task(self.tasks, None, self._write_csv, file_path, list(self.current_columns),
+                 self.current_query if stream else None, rows,
+                 on_done=lambda _: messagebox.showinfo("Descarga", f"Reporte guardado en:\n{file_path}"),
+                 on_error=lambda e: messagebox.showerror("Error", f"No se pudo guardar CSV:\n{e}"))
+
+    def _write_csv(self, file_path, columns, query, rows):
+        with open(file_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            if query is not None:
+                for batch in self.db.iter_rows(query, batch_size=1000):
+                    # las vistas sin clave natural traen "fila" además de las columnas del reporte
+                    writer.writerows(list(r.values()) for r in strip_row_number(batch))
+            else:
                 for row in rows:
                     writer.writerow(row)
-            messagebox.showinfo("Descarga", f"Reporte guardado en:\n{file_path}")
-        except Exception as e:
-            messagebox.showerror("Error", f"No se pudo guardar CSV:\n{e}")
 
     # -----------------------------
     # EXPORTAR EXCEL (openpyxl)
@@ -305,29 +423,29 @@ class ReportsView:
         if not path:
             return
 
-        try:
-            wb = openpyxl.Workbook()
-            ws = wb.active
-            ws.title = "Reporte"
-
-            # encabezados
-            for i, h in enumerate(self.current_columns, start=1):
-                ws.cell(row=1, column=i, value=h)
-
-            for r_idx, row in enumerate(self.current_rows, start=2):
-                # si row es dict
-                if isinstance(row, dict):
-                    values = list(row.values())
-                else:
-                    values = list(row)
-                for c_idx, val in enumerate(values, start=1):
-                    ws.cell(row=r_idx, column=c_idx, value=val)
-
-            wb.save(path)
-            messagebox.showinfo("Éxito", f"Reporte exportado a Excel:\n{path}")
+        run_task(self.tasks, None, self._write_excel, path, list(self.current_columns), list(self.current_rows),
+                 on_done=lambda _: messagebox.showinfo("Éxito", f"Reporte exportado a Excel:\n{path}"),
+                 on_error=lambda e: messagebox.showerror("Error Excel", f"No se pudo exportar: {e}"))
 
-        except Exception as e:
-            messagebox.showerror("Error Excel", f"No se pudo exportar: {e}")
+    def _write_excel(self, path, columns, rows):
+        wb = openpyxl.Workbook()
+        ws = wb.active
+        ws.title = "Reporte"
+
+        # encabezados
+        for i, h in enumerate(columns, start=1):
+            ws.cell(row=1, column=i, value=h)
+
+        for r_idx, row in enumerate(rows, start=2):
+            # si row es dict
+            if isinstance(row, dict):
+                values = list(row.values())
+            else:
+                values = list(row)
+            for c_idx, val in enumerate(values, start=1):
+                ws.cell(row=r_idx, column=c_idx, value=val)
+
+        wb.save(path)
 
     # -----------------------------
     # EXPORTAR PDF (usando matplotlib -> figura con tabla)
@@ -341,31 +459,31 @@ class ReportsView:
         if not path:
             return
 
-        try:
-            # crear figura y tabla
-            fig = Figure(figsize=(11, 8.5))
-            ax = fig.add_subplot(111)
-            ax.axis('off')
+        run_task(self.tasks, None, self._write_pdf, path, list(self.current_columns), list(self.current_rows),
+                 on_done=lambda _: messagebox.showinfo("Éxito", f"PDF generado:\n{path}"),
+                 on_error=lambda e: messagebox.showerror("Error PDF", f"No se pudo exportar a PDF:\n{e}"))
 
-            # preparar datos
-            headers = self.current_columns
-            data = []
-            for row in self.current_rows:
-                if isinstance(row, dict):
-                    data.append([str(v) if v is not None else "" for v in row.values()])
-                else:
-                    data.append([str(v) if v is not None else "" for v in row])
-
-            # dibujar tabla
-            table = ax.table(cellText=data, colLabels=headers, loc='center', cellLoc='left')
-            table.auto_set_font_size(False)
-            table.set_fontsize(8)
-            table.scale(1, 1.2)
-
-            fig.savefig(path, bbox_inches='tight')
-            messagebox.showinfo("Éxito", f"PDF generado:\n{path}")
-        except Exception as e:
-            messagebox.showerror("Error PDF", f"No se pudo exportar a PDF:\n{e}")
+    def _write_pdf(self, path, headers, rows):
+        # crear figura y tabla (Figure sin pyplot: se puede armar fuera del hilo de Tk)
+        fig = Figure(figsize=(11, 8.5))
+        ax = fig.add_subplot(111)
+        ax.axis('off')
+
+        # preparar datos
+        data = []
+        for row in rows:
+            if isinstance(row, dict):
+                data.append([str(v) if v is not None else "" for v in row.values()])
+            else:
+                data.append([str(v) if v is not None else "" for v in row])
+
+        # dibujar tabla
+        table = ax.table(cellText=data, colLabels=headers, loc='center', cellLoc='left')
+        table.auto_set_font_size(False)
+        table.set_fontsize(8)
+        table.scale(1, 1.2)
+
+        fig.savefig(path, bbox_inches='tight')
 
     # -----------------------------
     # VENTANA DE GRÁFICOS (matplotlib embebido)
@@ -459,150 +577,7 @@ class ReportsView:
         canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
 
     # -----------------------------
-    # Diccionario de consultas (idéntico a tu SQL original)
+    # Diccionario de consultas (definido en report_queries.py)
     # -----------------------------
     def get_queries(self):
-        return {
-            "1. Clientes nuevos por fechas festivas": {
-                "query": """
-                    SELECT c.Id_contrato, c.Descripcion, c.Fecha_inicio,
-                           CASE WHEN EXTRACT(MONTH FROM c.Fecha_inicio) IN (12, 1)
-                                THEN 'Campaña Festiva' ELSE 'Otro Periodo' END AS periodo,
-                           cc.Razon_Social AS cliente_corporativo
-                    FROM Contrato c
-                    LEFT JOIN ClienteCorporativo cc ON cc.RUC = c.RUC_Corporativo
-                    WHERE EXTRACT(MONTH FROM c.Fecha_inicio) IN (12, 1);
-                """,
-                "columns": ["Id Contrato", "Descripción", "Fecha Inicio", "Periodo", "Cliente Corporativo"]
-            },
-
-            "2. Ranking de regiones activas": {
-                "query": """
-                    SELECT tipo_cliente,
-                           SPLIT_PART(Direccion_Fiscal, '-', 2) AS ciudad,
-                           COUNT(*) AS cantidad_clientes
-                    FROM (
-                        SELECT 'Corporativo' AS tipo_cliente, Direccion_Fiscal FROM DatosClienteCorporativo
-                        UNION ALL
-                        SELECT 'Mayorista', Direccion_Fiscal FROM ClienteMayorista
-                    ) AS direcciones
-                    GROUP BY tipo_cliente, ciudad
-                    ORDER BY cantidad_clientes DESC;
-                """,
-                "columns": ["Tipo Cliente", "Ciudad", "Cantidad Clientes"]
-            },
-
-            "3. Crecimiento anual de clientes": {
-                "query": """
-                    SELECT EXTRACT(YEAR FROM Fecha_inicio) AS anio,
-                           COUNT(Id_contrato) AS nuevos_clientes
-                    FROM Contrato
-                    GROUP BY anio
-                    ORDER BY anio;
-                """,
-                "columns": ["Año", "Nuevos Clientes"]
-            },
-
-            "4. Preferencias de clientes minoristas": {
-                "query": """
-                    SELECT Preferencias, COUNT(*) AS cantidad
-                    FROM ClienteMinorista
-                    GROUP BY Preferencias
-                    ORDER BY cantidad DESC;
-                """,
-                "columns": ["Preferencias", "Cantidad"]
-            },
-
-            "5. Clientes sin contrato completo": {
-                "query": """
-                    SELECT 
-                        'Corporativo' AS tipo_cliente,
-                        cc.Razon_Social AS nombre_cliente,
-                        CASE WHEN c.Id_contrato IS NULL THEN 'Sin Contrato' ELSE 'Con Contrato' END AS estado_contrato,
-                        CASE WHEN dcc.Direccion_Fiscal IS NULL OR dcc.Telefono IS NULL THEN 'Datos incompletos' ELSE 'Datos completos' END AS estado_datos
-                    FROM ClienteCorporativo cc
-                    LEFT JOIN Contrato c ON cc.RUC = c.RUC_Corporativo
-                    LEFT JOIN DatosClienteCorporativo dcc ON cc.RUC = dcc.RUC_Corporativo
-
-                    UNION ALL
-
-                    SELECT
-                        'Mayorista' AS tipo_cliente,
-                        cm.Razon_Social AS nombre_cliente,
-                        'Sin Contrato' AS estado_contrato,
-                        CASE WHEN dcm.Telefono IS NULL OR dcm.Correo IS NULL THEN 'Datos incompletos' ELSE 'Datos completos' END AS estado_datos
-                    FROM ClienteMayorista cm
-                    LEFT JOIN DatosClienteMayorista dcm ON cm.RUC = dcm.RUC_Mayorista;
-                """,
-                "columns": ["Tipo Cliente", "Nombre", "Estado Contrato", "Estado Datos"]
-            },
-
-            "6. Cobertura de clientes corporativos y mayoristas": {
-                "query": """
-                    SELECT tipo_cliente, nombre_cliente,
-                           COUNT(DISTINCT TRIM(ciudad)) AS cantidad_ciudades
-                    FROM (
-                        SELECT 'Mayorista' AS tipo_cliente, cm.Razon_Social AS nombre_cliente, SPLIT_PART(cm.Direccion_Fiscal, '-', 2) AS ciudad FROM ClienteMayorista cm
-                        UNION ALL
-                        SELECT 'Corporativo', cc.Razon_Social, SPLIT_PART(dcc.Direccion_Fiscal, '-', 2) FROM ClienteCorporativo cc JOIN DatosClienteCorporativo dcc ON cc.RUC = dcc.RUC_Corporativo
-                    ) AS cobertura
-                    GROUP BY tipo_cliente, nombre_cliente
-                    ORDER BY cantidad_ciudades DESC;
-                """,
-                "columns": ["Tipo Cliente", "Cliente", "Ciudades Cubiertas"]
-            },
-
-            "7. Distribución de correos electrónicos": {
-                "query": """
-                    SELECT 'Cliente Minorista' AS tipo, COUNT(Correo) AS total FROM ClienteMinorista
-                    UNION ALL
-                    SELECT 'Cliente Mayorista', COUNT(Correo) FROM DatosClienteMayorista
-                    UNION ALL
-                    SELECT 'Cliente Corporativo', COUNT(Correo) FROM ClienteCorporativo;
-                """,
-                "columns": ["Tipo Cliente", "Cantidad Correos"]
-            },
-
-            "8. Contratos activos por cliente corporativo": {
-                "query": """
-                    SELECT cc.Razon_Social AS cliente, COUNT(c.Id_contrato) AS total_activos
-                    FROM ClienteCorporativo cc
-                    LEFT JOIN Contrato c ON cc.RUC = c.RUC_Corporativo
-                    WHERE c.Estado = 'Activo'
-                    GROUP BY cc.Razon_Social
-                    ORDER BY total_activos DESC
-                    LIMIT 10;
-                """,
-                "columns": ["Cliente Corporativo", "Contratos Activos"]
-            },
-
-            "9. Administradores con más clientes corporativos activos": {
-                "query": """
-                    SELECT a.DNI, a.Nombre_Apellido AS administrador, COUNT(DISTINCT cc.RUC) AS clientes_activos
-                    FROM Administrador a
-                    LEFT JOIN ClienteCorporativo cc ON a.DNI = cc.DNI_administrador
-                    LEFT JOIN Contrato c ON cc.RUC = c.RUC_Corporativo
-                    WHERE c.Estado = 'Activo'
-                    GROUP BY a.DNI, a.Nombre_Apellido
-                    ORDER BY clientes_activos DESC;
-                """,
-                "columns": ["DNI", "Administrador", "Clientes Activos"]
-            },
-
-            "10. Ranking de administradores según clientes gestionados": {
-                "query": """
-                    SELECT a.DNI, a.Nombre_Apellido AS administrador, COUNT(todos.DNI) AS cantidad
-                    FROM Administrador a
-                    LEFT JOIN (
-                        SELECT DNI_administrador AS DNI FROM ClienteMinorista
-                        UNION ALL
-                        SELECT DNI_administrador FROM ClienteMayorista
-                        UNION ALL
-                        SELECT DNI_administrador FROM ClienteCorporativo
-                    ) todos ON a.DNI = todos.DNI
-                    GROUP BY a.DNI, a.Nombre_Apellido
-                    ORDER BY cantidad DESC;
-                """,
-                "columns": ["DNI", "Administrador", "Clientes Gestionados"]
-            }
-        }
+        return REPORT_QUERIES
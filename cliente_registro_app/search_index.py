@@ -0,0 +1,84 @@
+"""
+Índice en memoria para filtrar el listado de clientes mientras se teclea
+
+Se arma una vez por carga del listado. Por fila guarda una clave normalizada
+(código + nombre, en minúsculas y sin acentos) y un índice invertido de
+trigramas -> filas. Una búsqueda toma como candidatas las filas del trigrama
+menos frecuente del término y sólo a ésas les verifica la subcadena; si el
+término nuevo contiene al anterior (el usuario siguió escribiendo) se parte
+del resultado anterior en lugar de empezar de cero.
+
+El criterio es el mismo que el de la BD: subcadena en código o nombre, sin
+distinguir mayúsculas ni acentos ("perez" encuentra "Pérez").
+"""
+
+import unicodedata
+from collections import defaultdict
+
+_GRAM = 3
+
+
+def normalize(text):
+    """Minúsculas, sin acentos y con los espacios colapsados."""
+    text = str(text or "").lower()
+    if not text.isascii():
+        text = unicodedata.normalize("NFKD", text)
+        text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(text.split())
+
+
+def _grams(text):
+    return set([text[i:i + _GRAM] for i in range(len(text) - _GRAM + 1)])
+
+
+class SearchIndex:
+    """
+    rows: dicts del listado (p.ej. get_all_clients()); fields: claves a indexar.
+    search(term) devuelve las filas que contienen el término, en el orden original.
+    """
+
+    def __init__(self, rows, fields=("codigo", "nombre")):
+        self.rows = list(rows)
+        # "\n" separa los campos: un término (normalizado) nunca lo contiene
+        self._keys = ["\n".join(normalize(r.get(f)) for f in fields) for r in self.rows]
+        # trigrama -> filas que lo contienen (en orden, sin repetidos)
+        postings = defaultdict(list)
+        for i, key in enumerate(self._keys):
+            for g in _grams(key):
+                postings[g].append(i)
+        self._postings = dict(postings)
+        self._last_term = ""
+        self._last_ids = None
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _candidates(self, term):
+        """Filas a verificar: el menor entre el resultado anterior y el trigrama más raro."""
+        best = None
+        if self._last_ids is not None and self._last_term and self._last_term in term:
+            best = self._last_ids
+        if len(term) >= _GRAM:
+            for g in _grams(term):
+                posting = self._postings.get(g)
+                if posting is None:
+                    return ()
+                if best is None or len(posting) < len(best):
+                    best = posting
+        # término de 1-2 letras sin resultado previo: se recorren todas las filas
+        return range(len(self._keys)) if best is None else best
+
+    def search_ids(self, term):
+        """Posiciones (en self.rows) de las filas que contienen el término."""
+        term = normalize(term)
+        if not term:
+            ids = range(len(self.rows))
+        else:
+            keys = self._keys
+            ids = [i for i in self._candidates(term) if term in keys[i]]
+        self._last_term, self._last_ids = term, (ids if term else None)
+        return ids
+
+    def search(self, term):
+        rows = self.rows
+        return [rows[i] for i in self.search_ids(term)]
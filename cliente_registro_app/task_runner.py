@@ -0,0 +1,167 @@
+"""
+Ejecutor de tareas en segundo plano para las vistas de Tk
+
+Las vistas envían trabajos (consultas, exportaciones) con submit(); corren en
+un pool de hilos y el resultado vuelve al hilo de Tk por una cola que se lee
+con root.after. Un trabajo con `key` reemplaza al anterior con la misma clave:
+el viejo se cancela si no empezó y, si ya corría, su resultado se descarta.
+
+Las vistas lanzan sus trabajos con run_task(): sin TaskRunner (vista creada
+sin `tasks`, tests) el trabajo corre en el acto con los mismos callbacks.
+"""
+
+import itertools
+import queue
+import traceback
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+
+from styles import Colors, Fonts
+
+
+class Task:
+    """Trabajo enviado a TaskRunner (cancel() descarta su resultado)."""
+
+    def __init__(self, task_id, key, on_done, on_error):
+        self.id = task_id
+        self.key = key
+        self.on_done = on_done
+        self.on_error = on_error
+        self.future = None
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+        if self.future is not None:
+            self.future.cancel()
+
+
+class TaskRunner:
+    """Pool de hilos compartido por las vistas; entrega resultados en el hilo de Tk."""
+
+    def __init__(self, root, max_workers=4, poll_interval=50):
+        self.root = root
+        self.poll_interval = poll_interval
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tarea")
+        self._results = queue.Queue()    # (task, ok, valor) desde los hilos de trabajo
+        self._ids = itertools.count(1)
+        self._by_key = {}                # key -> Task vigente
+        self._pending = set()            # tareas aún sin entregar
+        self._listeners = []             # callbacks(cantidad_pendiente) del indicador
+        self._polling = False
+
+    def submit(self, fn, *args, on_done=None, on_error=None, key=None, **kwargs):
+        """
+        Corre fn(*args, **kwargs) en un hilo. on_done(resultado) u on_error(exc)
+        se llaman en el hilo de Tk (sin on_error se imprime el traceback).
+        """
+        if key is not None:
+            self.cancel(key)
+        task = Task(next(self._ids), key, on_done, on_error)
+        if key is not None:
+            self._by_key[key] = task
+        self._pending.add(task)
+        task.future = self._executor.submit(self._work, task, fn, args, kwargs)
+        self._notify()
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_interval, self._poll)
+        return task
+
+    def _work(self, task, fn, args, kwargs):
+        try:
+            self._results.put((task, True, fn(*args, **kwargs)))
+        except BaseException as e:
+            self._results.put((task, False, e))
+
+    def cancel(self, key):
+        task = self._by_key.pop(key, None)
+        if task is not None:
+            task.cancel()
+            if task.future.cancelled():   # no llegó a empezar: no habrá resultado
+                self._pending.discard(task)
+                self._notify()
+
+    def _poll(self):
+        try:
+            while True:
+                task, ok, value = self._results.get_nowait()
+                self._deliver(task, ok, value)
+        except queue.Empty:
+            pass
+        if self._pending:
+            self.root.after(self.poll_interval, self._poll)
+        else:
+            self._polling = False
+
+    def _deliver(self, task, ok, value):
+        self._pending.discard(task)
+        if task.key is not None and self._by_key.get(task.key) is task:
+            del self._by_key[task.key]
+        self._notify()
+        if task.cancelled:
+            return
+        try:
+            if ok:
+                if callable(task.on_done):
+                    task.on_done(value)
+            elif callable(task.on_error):
+                task.on_error(value)
+            else:
+                traceback.print_exception(type(value), value, value.__traceback__)
+        except tk.TclError:
+            pass   # la vista que pidió el trabajo ya se destruyó
+
+    # ---------- Indicador de actividad ----------
+
+    def busy_count(self):
+        return len(self._pending)
+
+    def add_listener(self, callback):
+        self._listeners.append(callback)
+        callback(self.busy_count())
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _notify(self):
+        count = self.busy_count()
+        for callback in list(self._listeners):
+            callback(count)
+
+    def busy_indicator(self, parent, bg=Colors.SURFACE):
+        """Label que muestra "Cargando..." mientras haya tareas pendientes."""
+        label = tk.Label(parent, text="", font=Fonts.SMALL, bg=bg, fg=Colors.TEXT_SECONDARY)
+
+        def update(count):
+            label.config(text=f"Cargando... ({count})" if count > 1 else "Cargando..." if count else "")
+
+        self.add_listener(update)
+        label.bind("<Destroy>", lambda e: self.remove_listener(update), add="+")
+        return label
+
+    def shutdown(self):
+        for task in list(self._pending):
+            task.cancel()
+        self._executor.shutdown(wait=False)
+
+
+def run_task(tasks, key, fn, *args, on_done=None, on_error=None, **kwargs):
+    """
+    tasks.submit(fn, ...) si hay TaskRunner; si tasks es None corre fn en el
+    hilo actual y llama on_done(resultado) u on_error(exc) igual que submit.
+    """
+    if tasks is not None:
+        return tasks.submit(fn, *args, on_done=on_done, on_error=on_error, key=key, **kwargs)
+    try:
+        result = fn(*args, **kwargs)
+    except Exception as e:
+        if callable(on_error):
+            on_error(e)
+        else:
+            traceback.print_exception(type(e), e, e.__traceback__)
+        return None
+    if callable(on_done):
+        on_done(result)
+    return None
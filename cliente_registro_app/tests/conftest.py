@@ -0,0 +1,47 @@
+"""
+Los módulos de la app se importan como en main.py (from db_controller import ...),
+así que la carpeta de la app va al path de los tests.
+
+Los tests que usan el fixture `db` necesitan una BD con el esquema de la app:
+se indica con REGISTRO_TEST_DATABASE (y REGISTRO_TEST_HOST/PORT/USER/PASSWORD);
+sin ella se saltan. Escriben clientes con códigos libres y los borran al terminar.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def db_kwargs():
+    database = os.environ.get("REGISTRO_TEST_DATABASE")
+    if not database:
+        pytest.skip("sin BD de prueba (REGISTRO_TEST_DATABASE)")
+    return dict(host=os.environ.get("REGISTRO_TEST_HOST", "localhost"),
+                port=os.environ.get("REGISTRO_TEST_PORT", "5432"),
+                user=os.environ.get("REGISTRO_TEST_USER", "postgres"),
+                password=os.environ.get("REGISTRO_TEST_PASSWORD", ""),
+                database=database)
+
+
+@pytest.fixture
+def db(db_kwargs):
+    from db_controller import DBController
+    db = DBController(pooled=True, max_size=4, **db_kwargs)
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def free_dnis(db):
+    """Bloque de DNIs libres (y sus RUC 10<dni>0); al terminar se borra lo que quedó."""
+    from benchmarks.cases import _ruc_bench, free_codes
+    dnis = free_codes(db)[:20]
+    yield dnis
+    rucs = [_ruc_bench(d) for d in dnis]
+    db.execute("DELETE FROM ClienteMinorista WHERE DNI = ANY(%s::bpchar[])", (dnis,))
+    db.execute("DELETE FROM ClienteMayorista WHERE RUC = ANY(%s::bpchar[])", (rucs,))
+    db.execute("DELETE FROM ClienteCorporativo WHERE RUC = ANY(%s::bpchar[])", (rucs,))
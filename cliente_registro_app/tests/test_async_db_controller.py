@@ -0,0 +1,49 @@
+import asyncio
+
+import pytest
+
+from async_db_controller import _ASYNC_METHODS, AsyncDBController
+from db_controller import DBController
+
+
+class FakeDB:
+    pool = None
+
+    def search_clients(self, term, tipo=None, limit=200):
+        return [{"codigo": "12345678", "nombre": term, "tipo": tipo}]
+
+    def get_clients_page(self, after=None, limit=500, tipo=None, term=None):
+        return [{"after": after, "limit": limit}]
+
+    def count_clients(self):
+        return 3
+
+    def iter_rows(self, query, params=None, itersize=2000, batch_size=None):
+        rows = [{"n": i} for i in range(5)]
+        for i in range(0, len(rows), batch_size):
+            yield rows[i:i + batch_size]
+
+
+@pytest.mark.parametrize("name", _ASYNC_METHODS)
+def test_async_methods_exist_in_db_controller(name):
+    assert callable(getattr(DBController, name))
+
+
+def test_helpers_run_as_coroutines():
+    adb = AsyncDBController(FakeDB())
+
+    async def main():
+        found = await adb.search_clients("perez", tipo="Minorista")
+        page = await adb.get_clients_page(("Minorista", "12345678"), limit=10)
+        total = await adb.count_clients()
+        batches = [batch async for batch in adb.iter_rows("SELECT 1", batch_size=2)]
+        return found, page, total, batches
+
+    found, page, total, batches = asyncio.run(main())
+    assert found == [{"codigo": "12345678", "nombre": "perez", "tipo": "Minorista"}]
+    assert page == [{"after": ("Minorista", "12345678"), "limit": 10}]
+    assert total == 3
+    assert [len(b) for b in batches] == [2, 2, 1]
+    adb.shutdown(wait=True)
+    with pytest.raises(RuntimeError):
+        adb._executor.submit(print)
@@ -0,0 +1,216 @@
+import pytest
+
+import client_view
+from client_view import ClientView
+from local_cache import LocalClientCache
+from search_index import SearchIndex
+from virtual_tree import ListSource
+
+RUC = "20123456789"
+
+
+class FakeTree:
+    def __init__(self, rows, selected):
+        self.source = ListSource(rows)
+        self.selected = selected
+
+    def selected_rows(self):
+        return list(self.selected)
+
+    def set_rows(self, rows, keep_position=False):
+        self.source = ListSource(rows)
+
+
+class FakeDB:
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.deleted = []
+
+    def delete_clients(self, clients):
+        results = {}
+        for pair in clients:
+            if pair in self.fail:
+                results[pair] = (False, "no se pudo")
+            else:
+                self.deleted.append(pair)
+                results[pair] = (True, "eliminado")
+        return results
+
+
+class FakeMessagebox:
+    def __init__(self):
+        self.errors = []
+
+    def askyesno(self, title, message):
+        return True
+
+    def showwarning(self, title, message):
+        pass
+
+    def showerror(self, title, message):
+        self.errors.append(message)
+
+
+@pytest.fixture
+def messages(monkeypatch):
+    box = FakeMessagebox()
+    monkeypatch.setattr(client_view, "messagebox", box)
+    return box
+
+
+def _client(tipo, codigo, nombre="x"):
+    return {"tipo": tipo, "codigo": codigo, "nombre": nombre, "telefono": None, "correo": None}
+
+
+def _view(rows, selected, db):
+    """ClientView sin ventana: sólo lo que usa delete_selected_clients."""
+    view = object.__new__(ClientView)
+    view.db = db
+    view.tree = FakeTree(rows, selected)
+    view.tasks = None
+    view.local_search = False
+    view._index = None
+    view.client_cache = None
+    return view
+
+
+def test_delete_keeps_same_code_of_other_type(messages):
+    rows = [_client("Corporativo", RUC), _client("Mayorista", RUC), _client("Minorista", "12345678")]
+    db = FakeDB()
+    view = _view(rows, [rows[0]], db)
+    view.delete_selected_clients()
+    assert db.deleted == [("Corporativo", RUC)]
+    assert [(r["tipo"], r["codigo"]) for r in view.tree.source.rows] == [
+        ("Mayorista", RUC), ("Minorista", "12345678")]
+    assert messages.errors == []
+
+
+def test_delete_reports_failures_per_client(messages):
+    rows = [_client("Corporativo", RUC), _client("Mayorista", RUC)]
+    db = FakeDB(fail={("Mayorista", RUC)})
+    view = _view(rows, rows, db)
+    view.delete_selected_clients()
+    assert [(r["tipo"], r["codigo"]) for r in view.tree.source.rows] == [("Mayorista", RUC)]
+    assert messages.errors == [f"{RUC} (Mayorista): no se pudo"]
+
+
+class FakeCache:
+    def __init__(self):
+        self.removed = []
+
+    def remove(self, clients):
+        self.removed += clients
+
+
+def test_delete_updates_local_index_and_cache(messages):
+    rows = [_client("Corporativo", RUC, "ACME"), _client("Mayorista", RUC, "ACME"),
+            _client("Minorista", "12345678", "Ana")]
+    view = _view(rows, [rows[0]], FakeDB())
+    view.local_search = True
+    view._index = SearchIndex(rows)
+    view.client_cache = FakeCache()
+    view.delete_selected_clients()
+    # la próxima tecla filtra el índice: el borrado no vuelve
+    assert [r["tipo"] for r in view._index.search("acme")] == ["Mayorista"]
+    assert len(view._index.search("")) == 2
+    assert view.client_cache.removed == [("Corporativo", RUC)]
+
+
+class PagingTree(FakeTree):
+    def __init__(self):
+        super().__init__([], [])
+
+    def update_rows(self, rows):
+        self.source = ListSource(rows)
+
+    def append_rows(self, rows):
+        self.source.rows.extend(rows)
+
+
+class PagingDB:
+    """get_clients_page por keyset y lo que usa LocalClientCache.sync."""
+
+    CLIENT_PAGE_SIZE = 2
+
+    def __init__(self, clients):
+        self.clients = sorted(clients, key=lambda c: (c["tipo"], c["codigo"]))
+        self.pages = []
+
+    def get_clients_page(self, after=None, limit=500, tipo=None, term=None):
+        self.pages.append(after)
+        return [c for c in self.clients if after is None or (c["tipo"], c["codigo"]) > after][:limit]
+
+    def fetchone(self, q, params=None):
+        return {"xmin": 1}
+
+    def fetchall(self, q, params=None):
+        return []
+
+    def get_all_clients(self, cache=True):
+        return list(self.clients)
+
+
+class FakeEntry:
+    def get(self):
+        return ""
+
+
+def _paging_view(db, cache=None):
+    view = object.__new__(ClientView)
+    view.db = db
+    view.tree = PagingTree()
+    view.tasks = None
+    view.local_search = False
+    view._index = None
+    view.client_cache = cache
+    view.search_term = FakeEntry()
+    view._search_after = None
+    view._applied_term = None
+    view._load_seq = 0
+    view._next_after = None
+    view._page_loading = False
+    view._paged_filter = None
+    view.selected_filter = "Todos"
+    return view
+
+
+CLIENTS = [_client("Minorista", "1234567" + str(i)) for i in range(3)] + [
+    _client("Corporativo", RUC), _client("Mayorista", RUC)]
+
+
+def _shown(view):
+    return [(r["tipo"], r["codigo"]) for r in view.tree.source.rows]
+
+
+def test_pages_from_db_on_scroll():
+    db = PagingDB(CLIENTS)
+    view = _paging_view(db)
+    view.load_data_from_db()
+    assert _shown(view) == [("Corporativo", RUC), ("Mayorista", RUC)]
+    view._load_next_page()
+    view._load_next_page()
+    assert _shown(view) == [(c["tipo"], c["codigo"]) for c in db.clients]
+    assert view._next_after is None
+    view._load_next_page()
+    assert db.pages == [None, ("Mayorista", RUC), ("Minorista", "12345671")]
+
+
+def test_pages_from_synced_cache_on_scroll(tmp_path):
+    db = PagingDB(CLIENTS)
+    cache = LocalClientCache(db, str(tmp_path / "c.sqlite"))
+    view = _paging_view(db, cache)
+    # primera vez: la primera página viene de la BD y, ya sincronizada la copia,
+    # se vuelve a pedir de ésta; las siguientes también salen de la copia
+    view.load_data_from_db()
+    assert db.pages == [None]
+    assert _shown(view) == [("Corporativo", RUC), ("Mayorista", RUC)]
+    view._load_next_page()
+    view._load_next_page()
+    assert _shown(view) == [(c["tipo"], c["codigo"]) for c in db.clients]
+    assert db.pages == [None]
+
+    # recarga con la copia al día: la BD no se pagina y se conserva lo cargado
+    view.load_data_from_db()
+    assert db.pages == [None]
+    assert len(view.tree.source.rows) == len(CLIENTS)
+    cache.close()
@@ -0,0 +1,42 @@
+from datetime import date
+
+from benchmarks.datagen import _CopyStream, corporativo_rows, dni, mayorista_rows, ruc
+
+
+def test_copy_stream_escapes_values():
+    stream = _CopyStream([(1, None, "a\tb"), ("c\\d", "e\nf", "g\rh")])
+    assert stream.read() == b"1\t\\N\ta\\tb\nc\\\\d\te\\nf\tg\\rh\n"
+    assert stream.count == 2
+    assert stream.read() == b""
+
+
+def test_copy_stream_reads_in_chunks():
+    rows = [(i, f"nombre {i}", "Pérez") for i in range(2500)]
+    expected = "".join(f"{i}\tnombre {i}\tPérez\n" for i in range(2500)).encode("utf-8")
+    stream = _CopyStream(iter(rows))
+    chunks = []
+    while True:
+        chunk = stream.read(4096)
+        if not chunk:
+            break
+        assert len(chunk) <= 4096
+        chunks.append(chunk)
+    assert b"".join(chunks) == expected
+    assert stream.count == 2500
+
+
+def test_codes_are_unique_and_valid():
+    dnis = {dni(i) for i in range(5000)}
+    rucs = {ruc(i) for i in range(5000)}
+    assert len(dnis) == len(rucs) == 5000
+    assert all(len(d) == 8 and d.isdigit() for d in dnis)
+    assert all(len(r) == 11 and r.isdigit() for r in rucs)
+
+
+def test_generators_are_deterministic():
+    # generate() recorre cada generador una vez por tabla: la misma semilla
+    # tiene que dar las mismas filas
+    today = date(2025, 1, 1)
+    assert list(mayorista_rows(50, 3, 7)) == list(mayorista_rows(50, 3, 7))
+    assert list(corporativo_rows(50, 50, 3, 7, today)) == list(corporativo_rows(50, 50, 3, 7, today))
+    assert list(mayorista_rows(50, 3, 7)) != list(mayorista_rows(50, 3, 8))
@@ -0,0 +1,100 @@
+from benchmarks.cases import _ruc_bench
+
+
+def _exists(db, table, pk, codigo):
+    return db.fetchone(f"SELECT 1 AS ok FROM {table} WHERE {pk} = %s", (codigo,)) is not None
+
+
+def test_delete_clients_only_touches_the_given_type(db, free_dnis):
+    ruc = _ruc_bench(free_dnis[0])
+    db.insert_mayorista(ruc, "Prueba S.A.C.", "Av. Prueba 1", None, "999999999", "m@example.com")
+    db.insert_corporativo(ruc, "Prueba S.A.C.", "c@example.com", None, None, telefono="988888888")
+
+    assert db.delete_clients([("Corporativo", ruc)]) == {
+        ("Corporativo", ruc): (True, "Cliente corporativo eliminado correctamente.")}
+    assert _exists(db, "ClienteMayorista", "RUC", ruc)
+    assert not _exists(db, "ClienteCorporativo", "RUC", ruc)
+    # en cascada se van sus datos, no los del mayorista
+    assert _exists(db, "DatosClienteMayorista", "RUC_Mayorista", ruc)
+    assert not _exists(db, "DatosClienteCorporativo", "RUC_Corporativo", ruc)
+
+
+def test_delete_clients_results_per_pair(db, free_dnis):
+    dni, ausente = free_dnis[:2]
+    ruc = _ruc_bench(free_dnis[2])
+    db.insert_minorista(dni, "Prueba", "Av. Prueba 1", "999999999", "p@example.com", "", None)
+    db.insert_mayorista(ruc, "Prueba S.A.C.", "Av. Prueba 1", None)
+
+    results = db.delete_clients([("minorista", dni), ("Minorista", ausente), ("Mayorista", ruc),
+                                 ("Corporativo", ruc), ("Minorista", "123"), ("Proveedor", ruc),
+                                 ("Mayorista", ruc)])
+    assert list(results) == [("minorista", dni), ("Minorista", ausente), ("Mayorista", ruc),
+                             ("Corporativo", ruc), ("Minorista", "123"), ("Proveedor", ruc)]
+    assert results[("minorista", dni)] == (True, "Cliente minorista eliminado correctamente.")
+    assert results[("Minorista", ausente)] == (False, "El DNI no pertenece a un cliente minorista.")
+    assert results[("Mayorista", ruc)] == (True, "Cliente mayorista eliminado correctamente.")
+    assert results[("Corporativo", ruc)] == (False, "El RUC no pertenece a un cliente corporativo.")
+    assert results[("Minorista", "123")] == (False, "El DNI debe tener 8 dígitos numéricos")
+    assert results[("Proveedor", ruc)] == (False, "Tipo de cliente no reconocido")
+    assert not _exists(db, "ClienteMinorista", "DNI", dni)
+    assert not _exists(db, "ClienteMayorista", "RUC", ruc)
+
+
+def test_internal_statements_are_not_in_query_stats(db_kwargs, free_dnis):
+    from db_controller import DBController
+    db = DBController(pooled=True, max_size=2, health_check_after=0, **db_kwargs)
+    try:
+        dni = free_dnis[0]
+        record = (dni, "Prueba", "Av. Prueba 1", "999999999", "p@example.com", "", None)
+        # el DNI repetido hace fallar el lote: se reintenta fila por fila con SAVEPOINT
+        assert db.insert_minorista_many([record, record])[0] == 1
+        assert db.get_client_by_code(dni)["codigo"] == dni
+        assert db.get_client_by_code(dni)["codigo"] == dni
+        db.delete_clients([("Minorista", dni)])
+
+        consultas = [r["consulta"] for r in db.stats.snapshot()]
+        assert any(c.startswith("EXECUTE cliente_minorista") for c in consultas)
+        assert any(c.startswith("INSERT INTO ClienteMinorista") for c in consultas)
+        assert "SELECT ?" not in consultas   # chequeo de vida del pool
+        assert not [c for c in consultas if c.split()[0] in ("PREPARE", "SAVEPOINT", "RELEASE", "ROLLBACK")]
+    finally:
+        db.close()
+
+
+def test_clients_page_query_keyset_per_branch():
+    from db_controller import DBController
+    db = object.__new__(DBController)
+    q, params = db._clients_page_query(after=("Mayorista", "20123456789"), limit=10)
+    branches = q.split(" UNION ALL ")
+    # Corporativo < Mayorista: esa rama ya se leyó entera
+    assert len(branches) == 2 and "ClienteCorporativo" not in q
+    assert "RUC > %s" in branches[0] and "DNI > %s" not in branches[1]
+    assert params == ("20123456789", 10, 10, 10)
+
+    assert db._clients_page_query(after=("Minorista", "12345678"), tipo="Mayorista") == (None, ())
+    q, params = db._clients_page_query(tipo="corporativo", term="50%", limit=5)
+    assert "UNION ALL" not in q and "ClienteCorporativo" in q
+    assert params == ("%50\\%%", "%50\\%%", 5, 5)
+
+
+def test_get_clients_page_walks_every_client_in_order(db, free_dnis):
+    marca = f"Keyset {free_dnis[0]}"
+    dnis, rucs = free_dnis[:3], [_ruc_bench(d) for d in free_dnis[:3]]
+    for dni in dnis:
+        db.insert_minorista(dni, marca, "Av. Prueba 1", "999999999", "p@example.com", "", None)
+    for ruc in rucs[:2]:
+        db.insert_mayorista(ruc, marca, "Av. Prueba 1", None)
+    db.insert_corporativo(rucs[0], marca, "c@example.com", None, None)
+
+    seen, after = [], None
+    while True:
+        page = db.get_clients_page(after, limit=2, term=marca)
+        seen += [(r["tipo"], r["codigo"]) for r in page]
+        if len(page) < 2:
+            break
+        after = seen[-1]
+    expected = sorted([("Minorista", d) for d in dnis] + [("Mayorista", r) for r in rucs[:2]]
+                      + [("Corporativo", rucs[0])])
+    assert seen == expected
+    assert [r["codigo"] for r in db.get_clients_page(("Mayorista", rucs[0]), limit=2, tipo="Mayorista",
+                                                      term=marca)] == [rucs[1]]
@@ -0,0 +1,182 @@
+import threading
+import time
+
+import psycopg2
+import pytest
+from psycopg2 import extensions
+
+from db_pool import ConnectionPool, PoolTimeout
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql):
+        self.conn.checks += 1
+        if self.conn.dead:
+            self.conn.closed = 2
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+
+
+class FakeConn:
+    def __init__(self, n):
+        self.n = n
+        self.closed = 0
+        self.dead = False      # el servidor cortó la conexión (se nota al usarla)
+        self.checks = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def rollback(self):
+        pass
+
+    def get_transaction_status(self):
+        return extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+class Connector:
+    def __init__(self):
+        self.opened = []
+
+    def __call__(self):
+        conn = FakeConn(len(self.opened))
+        self.opened.append(conn)
+        return conn
+
+
+def _pool(**kw):
+    kw.setdefault("recycle_interval", 0)
+    connect = Connector()
+    return ConnectionPool(connect, **kw), connect
+
+
+def _age(pool, seconds):
+    """Hace que las conexiones ociosas parezcan devueltas hace `seconds`."""
+    pool._idle = type(pool._idle)((conn, since - seconds) for conn, since in pool._idle)
+
+
+def test_reuses_idle_connections():
+    pool, connect = _pool(min_size=1, max_size=3)
+    a = pool.getconn()
+    b = pool.getconn()
+    pool.putconn(a)
+    pool.putconn(b)
+    assert pool.getconn() is b      # LIFO
+    assert len(connect.opened) == 2
+    assert pool.stats() == {"abiertas": 2, "ociosas": 1, "max_size": 3}
+
+
+def test_dead_connection_is_replaced_after_health_check():
+    pool, connect = _pool(min_size=1, max_size=2, health_check_after=10)
+    conn = pool.getconn()
+    pool.putconn(conn)
+    conn.dead = True
+    # recién devuelta no se verifica
+    assert pool.getconn() is conn and conn.checks == 0
+    pool.putconn(conn)
+    _age(pool, 11)
+    fresh = pool.getconn()
+    assert fresh is not conn and conn.closed and conn.checks == 1
+    assert pool.stats()["abiertas"] == 1
+
+
+def test_closed_connection_is_discarded_on_return():
+    pool, connect = _pool(min_size=0, max_size=1)
+    conn = pool.getconn()
+    conn.closed = 2
+    pool.putconn(conn)
+    assert pool.stats()["abiertas"] == 0
+    assert pool.getconn() is connect.opened[-1] and len(connect.opened) == 2
+
+
+def test_health_check_does_not_hold_the_lock():
+    pool, connect = _pool(min_size=1, max_size=2, health_check_after=-1)
+    entered, release = threading.Event(), threading.Event()
+
+    class SlowCursor(FakeCursor):
+        def execute(self, sql):
+            entered.set()
+            release.wait(5)
+
+    connect.opened[0].cursor = lambda: SlowCursor(connect.opened[0])
+    t = threading.Thread(target=pool.getconn)
+    t.start()
+    assert entered.wait(5)
+    # mientras la otra verifica su conexión, ésta abre una nueva sin esperar
+    assert pool.getconn() is connect.opened[1]
+    release.set()
+    t.join(5)
+
+
+def test_timeout_when_pool_is_full():
+    pool, _ = _pool(min_size=0, max_size=1, timeout=0.05)
+    pool.getconn()
+    with pytest.raises(PoolTimeout):
+        pool.getconn()
+
+
+def test_waiting_borrower_gets_returned_connection():
+    pool, connect = _pool(min_size=0, max_size=1, timeout=5)
+    conn = pool.getconn()
+    threading.Timer(0.05, pool.putconn, (conn,)).start()
+    assert pool.getconn() is conn
+    assert len(connect.opened) == 1
+
+
+def test_recycle_idle_respects_min_size():
+    pool, connect = _pool(min_size=1, max_size=3, max_idle=60)
+    conns = [pool.getconn() for _ in range(3)]
+    for conn in conns:
+        pool.putconn(conn)
+    _age(pool, 61)
+    pool.recycle_idle()
+    assert pool.stats()["abiertas"] == 1
+    assert sum(1 for c in conns if c.closed) == 2
+
+
+def test_recycle_thread_closes_idle_connections():
+    pool, connect = _pool(min_size=0, max_size=2, max_idle=0.05, recycle_interval=0.02)
+    pool.putconn(pool.getconn())
+    deadline = time.monotonic() + 5
+    while pool.stats()["abiertas"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert pool.stats()["abiertas"] == 0
+    assert connect.opened[0].closed
+    pool.closeall()
+    assert pool._stop.is_set()
+
+
+def test_closed_pool_refuses_connections():
+    pool, connect = _pool(min_size=2, max_size=2)
+    pool.closeall()
+    assert all(c.closed for c in connect.opened)
+    with pytest.raises(psycopg2.InterfaceError):
+        pool.getconn()
+
+
+def test_db_reconnects_after_backend_is_terminated(db):
+    conn = db.pool.getconn()
+    pid = conn.get_backend_pid()
+    db.pool.putconn(conn)
+    other = psycopg2.connect(**db._connect_kwargs)
+    try:
+        with other.cursor() as cur:
+            cur.execute("SELECT pg_terminate_backend(%s)", (pid,))
+        other.commit()
+    finally:
+        other.close()
+    time.sleep(0.1)
+    # la conexión caída se descarta y la consulta se reintenta con una nueva
+    row = db.fetchone("SELECT pg_backend_pid() AS pid")
+    assert row["pid"] != pid
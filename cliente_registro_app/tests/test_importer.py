@@ -0,0 +1,67 @@
+from importer import validate_chunk
+from validators import normalizar_fecha
+
+
+def _corporativo(**kw):
+    row = {"tipo": "Corporativo", "codigo": "20123456789", "nombre": "ACME SAC",
+           "dni_contacto": "12345678", "dni_administrador": "87654321",
+           "fecha_inicio": "2024-01-15", "fecha_vencimiento": "15/01/2025"}
+    row.update(kw)
+    return row
+
+
+def test_normalizar_fecha():
+    assert normalizar_fecha("2024-02-29") == "2024-02-29"
+    assert normalizar_fecha(" 05/03/2024 ") == "2024-03-05"
+    assert normalizar_fecha("") == ""
+    assert normalizar_fecha(None) == ""
+    assert normalizar_fecha("31/02/2024") is None
+    assert normalizar_fecha("2024-13-01") is None
+    assert normalizar_fecha("mañana") is None
+
+
+def test_validate_chunk_normalizes_rows():
+    chunk = [(2, {"tipo": " Minorista ", "codigo": "12345678", "nombre": " Ana "}),
+             (3, _corporativo())]
+    validas, errores = validate_chunk(chunk, default_admin="87654321")
+    assert errores == []
+    assert [linea for linea, _ in validas] == [2, 3]
+    minorista, corporativo = validas[0][1], validas[1][1]
+    assert minorista["tipo"] == "minorista"
+    assert minorista["nombre"] == "Ana"
+    assert minorista["dni_administrador"] == "87654321"
+    # las fechas quedan en ISO para el ::date del merge
+    assert corporativo["fecha_inicio"] == "2024-01-15"
+    assert corporativo["fecha_vencimiento"] == "2025-01-15"
+
+
+def test_validate_chunk_reports_invalid_codes_per_line():
+    chunk = [(2, {"tipo": "minorista", "codigo": "123", "dni_administrador": "87654321"}),
+             (3, {"tipo": "mayorista", "codigo": "20123456789"}),
+             (4, {"tipo": "proveedor", "codigo": "20123456789", "dni_administrador": "87654321"})]
+    validas, errores = validate_chunk(chunk)
+    assert validas == []
+    assert [linea for linea, _ in errores] == [2, 3, 4]
+    assert "DNI" in errores[0][1]
+    assert "administrador" in errores[1][1]
+
+
+def test_validate_chunk_rejects_invalid_contract_dates():
+    chunk = [(2, _corporativo(fecha_inicio="31/02/2024")),
+             (3, _corporativo(fecha_vencimiento="2025-1-xx")),
+             (4, _corporativo(fecha_inicio="", fecha_vencimiento=""))]
+    validas, errores = validate_chunk(chunk)
+    assert [linea for linea, _ in errores] == [2, 3]
+    assert errores[0][1].startswith("fecha_inicio: fecha inválida '31/02/2024'")
+    assert errores[1][1].startswith("fecha_vencimiento:")
+    # sin contrato: las fechas vacías son válidas
+    assert [linea for linea, _ in validas] == [4]
+    assert validas[0][1]["fecha_inicio"] == ""
+
+
+def test_validate_chunk_ignores_dates_of_other_types():
+    chunk = [(2, {"tipo": "mayorista", "codigo": "20123456789", "dni_administrador": "87654321",
+                  "fecha_inicio": "no aplica"})]
+    validas, errores = validate_chunk(chunk)
+    assert errores == []
+    assert len(validas) == 1
@@ -0,0 +1,144 @@
+import sqlite3
+
+from psycopg2 import errors
+
+import local_cache
+from local_cache import LocalClientCache
+
+RUC = "20123456789"
+
+
+class FakeDB:
+    """Lo que usan LocalClientCache y client_changes de DBController."""
+
+    def __init__(self, clients):
+        self.clients = list(clients)
+        self.changes = []          # (tipo, codigo) anotados desde la última marca
+        self.has_changes = True    # False: BD sin la migración 005
+        self.full_loads = 0
+
+    def fetchone(self, q, params=None):
+        return {"xmin": 1}
+
+    def fetchall(self, q, params=None):
+        if not self.has_changes:
+            raise errors.UndefinedTable()
+        changes, self.changes = self.changes, []
+        return [{"tipo": t, "codigo": c, "truncado": False} for t, c in changes]
+
+    def get_all_clients(self, cache=True):
+        self.full_loads += 1
+        return list(self.clients)
+
+    def get_clients_by_codes(self, codes):
+        codes = {str(c) for c in codes}
+        return [c for c in self.clients if c["codigo"] in codes]
+
+
+def _client(tipo, codigo, nombre):
+    return {"codigo": codigo, "nombre": nombre, "telefono": None, "correo": None, "tipo": tipo}
+
+
+def _names(cache):
+    return {(r["tipo"], r["codigo"]): r["nombre"] for r in cache.load()}
+
+
+def test_same_code_in_two_types(tmp_path):
+    db = FakeDB([_client("Mayorista", RUC, "May"), _client("Corporativo", RUC, "Corp")])
+    cache = LocalClientCache(db, str(tmp_path / "c.sqlite"))
+    assert cache.sync() == {"completa": True, "cambiados": 2, "borrados": 0}
+    assert _names(cache) == {("Mayorista", RUC): "May", ("Corporativo", RUC): "Corp"}
+    assert [r["tipo"] for r in cache.load("corporativo")] == ["Corporativo"]
+
+    # cambia sólo el corporativo: el mayorista con el mismo RUC no se toca
+    db.clients[1]["nombre"] = "Corp 2"
+    db.clients[0]["nombre"] = "May sin anotar"
+    db.changes = [("Corporativo", RUC)]
+    assert cache.sync() == {"completa": False, "cambiados": 1, "borrados": 0}
+    assert _names(cache) == {("Mayorista", RUC): "May", ("Corporativo", RUC): "Corp 2"}
+
+    # se borra el mayorista: el corporativo se queda
+    del db.clients[0]
+    db.changes = [("Mayorista", RUC)]
+    assert cache.sync() == {"completa": False, "cambiados": 0, "borrados": 1}
+    assert _names(cache) == {("Corporativo", RUC): "Corp 2"}
+    assert db.full_loads == 1
+    cache.close()
+
+
+def test_remove_only_the_given_pairs(tmp_path):
+    db = FakeDB([_client("Mayorista", RUC, "May"), _client("Corporativo", RUC, "Corp"),
+                 _client("Minorista", "12345678", "Ana")])
+    cache = LocalClientCache(db, str(tmp_path / "c.sqlite"))
+    cache.sync()
+    cache.remove([("Corporativo", RUC), ("Minorista", "87654321")])
+    assert _names(cache) == {("Mayorista", RUC): "May", ("Minorista", "12345678"): "Ana"}
+    cache.close()
+
+
+def test_load_page_by_keyset(tmp_path):
+    db = FakeDB([_client("Minorista", "12345678", "Ana"), _client("Corporativo", RUC, "Corp"),
+                 _client("Mayorista", RUC, "May"), _client("Minorista", "87654321", "Luis")])
+    cache = LocalClientCache(db, str(tmp_path / "c.sqlite"))
+    cache.sync()
+    pages, after = [], None
+    while True:
+        page = cache.load_page(after, 1)
+        if not page:
+            break
+        pages.append(page)
+        after = (page[-1]["tipo"], page[-1]["codigo"])
+    assert [r for page in pages for r in page] == cache.load()
+    assert [r["tipo"] for r in cache.load_page(("Corporativo", RUC), 10)] == ["Mayorista", "Minorista", "Minorista"]
+    assert [r["codigo"] for r in cache.load_page(("Minorista", "12345678"), 10, tipo="minorista")] == ["87654321"]
+    cache.close()
+
+
+def test_delta_sync_adds_new_clients(tmp_path):
+    db = FakeDB([_client("Minorista", "12345678", "Ana")])
+    cache = LocalClientCache(db, str(tmp_path / "c.sqlite"))
+    cache.sync()
+    db.clients.append(_client("Minorista", "87654321", "Luis"))
+    db.changes = [("Minorista", "87654321")]
+    assert cache.sync() == {"completa": False, "cambiados": 1, "borrados": 0}
+    assert [r["codigo"] for r in cache.load()] == ["12345678", "87654321"]
+    cache.close()
+
+
+def test_full_sync_without_change_log(tmp_path):
+    db = FakeDB([_client("Minorista", "12345678", "Ana")])
+    cache = LocalClientCache(db, str(tmp_path / "c.sqlite"))
+    cache.sync()
+    db.has_changes = False
+    assert cache.sync()["completa"] is True
+    assert db.full_loads == 2
+    cache.close()
+
+
+def test_full_sync_after_retention(tmp_path, monkeypatch):
+    db = FakeDB([_client("Minorista", "12345678", "Ana")])
+    cache = LocalClientCache(db, str(tmp_path / "c.sqlite"))
+    cache.sync()
+    later = cache.synced_at() + local_cache.RETENTION_DAYS * 86400 + 1
+    monkeypatch.setattr(local_cache.time, "time", lambda: later)
+    assert cache.sync()["completa"] is True
+    cache.close()
+
+
+def test_old_schema_is_rebuilt(tmp_path):
+    path = str(tmp_path / "c.sqlite")
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE clientes (codigo TEXT PRIMARY KEY, nombre TEXT, telefono TEXT, correo TEXT, tipo TEXT);
+        CREATE TABLE meta (clave TEXT PRIMARY KEY, valor);
+        INSERT INTO clientes VALUES ('20123456789', 'May', NULL, NULL, 'Mayorista');
+        INSERT INTO meta VALUES ('sincronizado_en', 1e12);
+    """)
+    conn.commit()
+    conn.close()
+    db = FakeDB([_client("Mayorista", RUC, "May"), _client("Corporativo", RUC, "Corp")])
+    cache = LocalClientCache(db, path)
+    assert cache.load() == [] and cache.synced_at() is None
+    assert cache.sync()["completa"] is True
+    assert len(cache.load()) == 2
+    cache.close()
@@ -0,0 +1,65 @@
+from query_cache import QueryCache, tables_in
+
+
+def test_tables_in():
+    sql = ("SELECT c.* FROM public.ClienteCorporativo c "
+           "LEFT JOIN DatosClienteCorporativo d ON d.RUC_Corporativo = c.RUC")
+    assert tables_in(sql) == {"clientecorporativo", "datosclientecorporativo"}
+    assert tables_in("UPDATE ClienteMinorista SET Nombre_Apellido = %s") == {"clienteminorista"}
+    assert tables_in("TRUNCATE ONLY Contrato") == {"contrato"}
+
+
+def test_get_put_and_stats():
+    cache = QueryCache()
+    assert cache.get("q") == (False, None)
+    cache.put("q", [1, 2], {"contrato"})
+    assert cache.get("q") == (True, [1, 2])
+    assert cache.stats() == {"hits": 1, "misses": 1, "entradas": 1, "invalidadas": 0}
+
+
+def test_entries_expire():
+    cache = QueryCache(default_ttl=30)
+    cache.put("q", 1, {"contrato"}, ttl=0)
+    assert cache.get("q") == (False, None)
+    assert cache.stats()["entradas"] == 0
+
+
+def test_lru_evicts_least_recently_used():
+    cache = QueryCache(max_entries=2)
+    cache.put("a", 1, set())
+    cache.put("b", 2, set())
+    cache.get("a")
+    cache.put("c", 3, set())
+    assert cache.get("b") == (False, None)
+    assert cache.get("a") == (True, 1)
+    assert cache.get("c") == (True, 3)
+
+
+def test_invalidate_drops_entries_reading_the_tables():
+    cache = QueryCache()
+    cache.put("contratos", 1, {"contrato", "clientecorporativo"})
+    cache.put("minoristas", 2, {"clienteminorista"})
+    assert cache.invalidate({"contrato"}) == 1
+    assert cache.get("contratos") == (False, None)
+    assert cache.get("minoristas") == (True, 2)
+    assert cache.invalidate(()) == 0
+
+
+def test_put_skips_results_read_before_an_invalidation():
+    cache = QueryCache()
+    since = cache.generation()
+    cache.invalidate({"contrato"})          # escritura mientras se leía
+    cache.put("contratos", 1, {"contrato"}, since=since)
+    cache.put("minoristas", 2, {"clienteminorista"}, since=since)
+    assert cache.get("contratos") == (False, None)
+    assert cache.get("minoristas") == (True, 2)
+
+
+def test_put_skips_results_read_before_a_clear():
+    cache = QueryCache()
+    since = cache.generation()
+    cache.clear()
+    cache.put("q", 1, {"contrato"}, since=since)
+    assert cache.get("q") == (False, None)
+    cache.put("q", 1, {"contrato"}, since=cache.generation())
+    assert cache.get("q") == (True, 1)
@@ -0,0 +1,57 @@
+from query_stats import LatencyHistogram, QueryStats, fingerprint
+
+
+def test_fingerprint_replaces_literals_and_parameters():
+    assert (fingerprint("SELECT * FROM ClienteMinorista WHERE DNI = '12345678' -- uno\n LIMIT 10;")
+            == "SELECT * FROM ClienteMinorista WHERE DNI = ? LIMIT ?")
+    assert fingerprint("SELECT 'it''s', -3.5") == "SELECT ?, ?"
+    assert fingerprint(b"SELECT col1 FROM t2 /* c */ WHERE y = $1") == "SELECT col1 FROM t2 WHERE y = ?"
+
+
+def test_fingerprint_collapses_variable_lists():
+    assert (fingerprint("SELECT * FROM t WHERE a IN (%s, %s, %s) AND b = %(b)s")
+            == fingerprint("SELECT * FROM t WHERE a IN (%s, %s) AND b = %(b)s")
+            == "SELECT * FROM t WHERE a IN (...) AND b = ?")
+    assert fingerprint("INSERT INTO t VALUES (1,2),(3,4),(5,6)") == "INSERT INTO t VALUES (...)"
+
+
+def test_fingerprint_keeps_identifiers_with_digits():
+    assert fingerprint("SELECT col1, t2.x FROM t2") == "SELECT col1, t2.x FROM t2"
+
+
+def test_histogram_percentiles():
+    h = LatencyHistogram()
+    for ms in range(1, 101):
+        h.record(ms)
+    assert h.count == 100
+    assert h.max_ms == 100
+    # límite superior del bucket: a lo sumo 25% por encima del valor real
+    assert 50 <= h.percentile(50) <= 50 * LatencyHistogram.FACTOR
+    assert 99 <= h.percentile(99) <= 100
+    assert LatencyHistogram().percentile(50) == 0.0
+
+
+def test_record_groups_by_fingerprint():
+    stats = QueryStats(slow_ms=None)
+    stats.record("SELECT * FROM t WHERE id = 1", 0.010, rows=1)
+    stats.record("SELECT * FROM t WHERE id = 2", 0.030, rows=1)
+    stats.record("DELETE FROM t", 0.001, rows=-1)
+    snap = stats.snapshot()
+    assert [r["consulta"] for r in snap] == ["SELECT * FROM t WHERE id = ?", "DELETE FROM t"]
+    assert snap[0]["llamadas"] == 2
+    assert snap[0]["filas"] == 2
+    assert snap[0]["total_ms"] == 40.0
+    assert snap[1]["filas"] == 0
+    assert stats.slow_queries() == []
+
+
+def test_slow_queries_are_logged():
+    stats = QueryStats(slow_ms=100)
+    stats.record("SELECT pg_sleep(0.2)", 0.2)
+    stats.record("SELECT 1", 0.001)
+    slow = stats.slow_queries()
+    assert len(slow) == 1
+    assert slow[0]["sql"] == "SELECT pg_sleep(0.2)"
+    assert slow[0]["ms"] == 200.0
+    stats.reset()
+    assert stats.snapshot() == [] and stats.slow_queries() == []
@@ -0,0 +1,39 @@
+import logging
+
+import psycopg2
+from psycopg2 import errors
+
+from reports_view import ReportsView
+
+QINFO = {"view": "mv_reporte", "query": "SELECT 1 AS en_vivo", "columns": ["en_vivo"]}
+
+
+class FakeDB:
+    def __init__(self, view_error):
+        self.view_error = view_error
+
+    def fetchone(self, query, params=None):
+        raise self.view_error
+
+    def fetchall(self, query, params=None, cache_ttl=None):
+        return [{"en_vivo": 1}]
+
+
+def _view(view_error):
+    view = object.__new__(ReportsView)
+    view.db = FakeDB(view_error)
+    return view
+
+
+def test_missing_view_falls_back_without_logging(caplog):
+    with caplog.at_level(logging.DEBUG, logger="reports_view"):
+        sql, rows, fresh = _view(errors.UndefinedTable("no existe"))._fetch_report(QINFO)
+    assert (sql, rows, fresh) == (QINFO["query"], [{"en_vivo": 1}], None)
+    assert caplog.records == []
+
+
+def test_view_failure_is_logged_and_falls_back(caplog):
+    with caplog.at_level(logging.DEBUG, logger="reports_view"):
+        sql, rows, fresh = _view(psycopg2.OperationalError("conexión perdida"))._fetch_report(QINFO)
+    assert sql == QINFO["query"] and fresh is None
+    assert [r.levelno for r in caplog.records] == [logging.ERROR]
@@ -0,0 +1,49 @@
+from search_index import SearchIndex, normalize
+
+ROWS = [
+    {"codigo": "12345678", "nombre": "José Pérez", "tipo": "Minorista"},
+    {"codigo": "20123456789", "nombre": "Comercial PEREZ SAC", "tipo": "Mayorista"},
+    {"codigo": "20987654321", "nombre": "Industrias  Andinas", "tipo": "Corporativo"},
+    {"codigo": "87654321", "nombre": None, "tipo": "Minorista"},
+]
+
+
+def _search(index, term):
+    return [r["codigo"] for r in index.search(term)]
+
+
+def test_normalize():
+    assert normalize("  José   PÉREZ ") == "jose perez"
+    assert normalize(None) == ""
+    assert normalize(12345678) == "12345678"
+
+
+def test_search_ignores_case_and_accents():
+    index = SearchIndex(ROWS)
+    assert _search(index, "perez") == ["12345678", "20123456789"]
+    assert _search(index, "PÉREZ") == ["12345678", "20123456789"]
+    assert _search(index, "industrias andinas") == ["20987654321"]
+
+
+def test_search_by_code_substring():
+    index = SearchIndex(ROWS)
+    assert _search(index, "4567") == ["12345678", "20123456789"]
+    assert _search(index, "654321") == ["20987654321", "87654321"]
+
+
+def test_short_and_empty_terms():
+    index = SearchIndex(ROWS)
+    assert len(_search(index, "")) == len(ROWS)
+    assert _search(index, "sa") == ["20123456789"]
+    assert _search(index, "xyz") == []
+
+
+def test_terms_do_not_match_across_fields():
+    # "8 jos" sólo existiría uniendo el final del código con el nombre
+    assert _search(SearchIndex(ROWS), "8 jos") == []
+
+
+def test_incremental_search_matches_fresh_index():
+    index = SearchIndex(ROWS)
+    for term in ("p", "pe", "per", "pere", "perez", "perez s", "pere", "a", "an", "and"):
+        assert _search(index, term) == _search(SearchIndex(ROWS), term), term
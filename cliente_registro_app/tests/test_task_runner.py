@@ -0,0 +1,31 @@
+from task_runner import run_task
+
+
+class FakeRunner:
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, fn, *args, on_done=None, on_error=None, key=None, **kwargs):
+        self.submitted.append((key, fn, args, kwargs))
+        return "tarea"
+
+
+def test_run_task_submits_to_the_runner():
+    runner = FakeRunner()
+    assert run_task(runner, "clientes", max, 1, 2, on_done=print, key_func=None) == "tarea"
+    assert runner.submitted == [("clientes", max, (1, 2), {"key_func": None})]
+
+
+def test_run_task_without_runner_runs_inline():
+    done, failed = [], []
+    assert run_task(None, "clientes", sorted, [3, 1], reverse=True,
+                    on_done=done.append, on_error=failed.append) is None
+    assert done == [[3, 1]] and failed == []
+
+    run_task(None, None, int, "x", on_done=done.append, on_error=failed.append)
+    assert done == [[3, 1]] and isinstance(failed[0], ValueError)
+
+
+def test_run_task_without_callbacks_prints_the_error(capsys):
+    run_task(None, None, int, "x")
+    assert "ValueError" in capsys.readouterr().err
@@ -0,0 +1,138 @@
+import pytest
+
+from client_view import _client_key, merge_clients
+from virtual_tree import ListSource, TreeReconciler, VirtualTreeview
+
+
+class FakeTree:
+    """Los items de primer nivel de un Treeview, con los mismos errores que Tk."""
+
+    def __init__(self):
+        self.order = []
+        self.values = {}
+
+    def insert(self, parent, index, iid, values):
+        if iid in self.values:
+            raise ValueError(f"Item {iid} already exists")
+        self.order.insert(index, iid)
+        self.values[iid] = values
+
+    def delete(self, iid):
+        self.order.remove(iid)
+        del self.values[iid]
+
+    def item(self, iid, values):
+        self.values[iid] = values
+
+    def move(self, iid, parent, index):
+        self.order.remove(iid)
+        self.order.insert(index, iid)
+
+
+def _items(*pairs):
+    return [(iid, (iid, value)) for iid, value in pairs]
+
+
+def test_reconciler_applies_minimal_operations():
+    tree = FakeTree()
+    window = TreeReconciler(tree)
+    first = _items(("a", 1), ("b", 2), ("c", 3))
+    assert window.apply(first) == {"insertados": 3, "actualizados": 0, "borrados": 0, "movidos": 0}
+    assert window.apply(first) == {"insertados": 0, "actualizados": 0, "borrados": 0, "movidos": 0}
+
+    ops = window.apply(_items(("c", 3), ("a", 10), ("d", 4)))
+    assert ops == {"insertados": 1, "actualizados": 1, "borrados": 1, "movidos": 1}
+    assert tree.order == window.order == ["c", "a", "d"]
+    assert tree.values == {"c": ("c", 3), "a": ("a", 10), "d": ("d", 4)}
+
+
+@pytest.mark.parametrize("states", [
+    ["abc", "cba", "", "bd", "dcba", "abcd"],
+    ["abcdef", "fedcba", "bdf", "aebfc", "f"],
+])
+def test_reconciler_tracks_tree_order(states):
+    tree = FakeTree()
+    window = TreeReconciler(tree)
+    for state in states:
+        window.apply(_items(*((iid, 0) for iid in state)))
+        assert tree.order == list(state)
+
+
+def _view(rows, key):
+    """VirtualTreeview sin ventana: sólo el estado que usan _iid/_position."""
+    view = object.__new__(VirtualTreeview)
+    view.key = key
+    view.source = ListSource(rows)
+    view._positions = None
+    view.refresh = lambda: None
+    return view
+
+
+def _client(tipo, codigo, nombre="x"):
+    return {"tipo": tipo, "codigo": codigo, "nombre": nombre}
+
+
+def test_repeated_keys_get_unique_iids():
+    # el mismo RUC en dos tipos y una fila repetida por un LEFT JOIN
+    rows = [_client("Corporativo", "20123456789"), _client("Corporativo", "20123456789"),
+            _client("Mayorista", "20123456789"), _client("Minorista", "12345678")]
+    view = _view(rows, _client_key)
+    iids = [view._iid(i, r) for i, r in enumerate(rows)]
+    assert iids == ["Corporativo|20123456789", "Corporativo|20123456789#1",
+                    "Mayorista|20123456789", "Minorista|12345678"]
+    # cada iid vuelve a su posición (selección y ancla del desplazamiento)
+    assert [view._position(iid) for iid in iids] == [0, 1, 2, 3]
+    assert view._position("Corporativo|20123456789#2") is None
+    assert view._position("Mayorista|99999999999") is None
+
+
+def test_append_rows_keeps_first_position_of_a_key():
+    rows = [_client("Mayorista", "20123456789")]
+    view = _view(rows, _client_key)
+    assert view._position("Mayorista|20123456789") == 0
+    view.append_rows([_client("Mayorista", "20123456789"), _client("Mayorista", "20999999999")])
+    assert view._iid(1, view.source.rows[1]) == "Mayorista|20123456789#1"
+    assert view._position("Mayorista|20123456789") == 0
+    assert view._position("Mayorista|20999999999") == 2
+
+
+def test_rows_without_key_use_positions():
+    view = _view([(1,), (2,)], None)
+    assert view._iid(1, (2,)) == "#1"
+    assert view._position("#1") == 1
+    assert view._position("#2") is None
+
+
+def test_merge_clients_keeps_types_apart():
+    rows = [_client("Corporativo", "20123456789", "Corp"), _client("Mayorista", "20123456789", "May"),
+            _client("Minorista", "12345678", "Ana")]
+    merged = merge_clients(rows, {("Mayorista", "20123456789")},
+                           [_client("Mayorista", "20123456789", "May 2")])
+    assert [r["nombre"] for r in merged] == ["Corp", "May 2", "Ana"]
+    # borrado: el corporativo con el mismo RUC se queda
+    merged = merge_clients(rows, {("Mayorista", "20123456789")}, [])
+    assert [r["nombre"] for r in merged] == ["Corp", "Ana"]
+
+
+def test_merge_clients_replaces_repeated_rows_together():
+    rows = [_client("Corporativo", "20123456789", "a"), _client("Corporativo", "20123456789", "b"),
+            _client("Minorista", "12345678")]
+    fresh = [_client("Corporativo", "20123456789", "c")]
+    merged = merge_clients(rows, {("Corporativo", "20123456789")}, fresh)
+    assert [r["nombre"] for r in merged] == ["c", "x"]
+
+
+def test_merge_clients_places_additions():
+    rows = [_client("Corporativo", "20100000000"), _client("Minorista", "10000000")]
+    fresh = [_client("Mayorista", "20500000000"), _client("Minorista", "90000000")]
+    changed = {("Mayorista", "20500000000"), ("Minorista", "90000000")}
+    merged = merge_clients(rows, changed, fresh)
+    assert [(r["tipo"], r["codigo"]) for r in merged] == [
+        ("Corporativo", "20100000000"), ("Mayorista", "20500000000"),
+        ("Minorista", "10000000"), ("Minorista", "90000000")]
+    # más allá de la última página cargada: llega con su página
+    merged = merge_clients(rows, changed, fresh, until=("Minorista", "10000000"))
+    assert [r["codigo"] for r in merged] == ["20100000000", "20500000000", "10000000"]
+    # con búsqueda: al final, sólo si contienen el término
+    merged = merge_clients(rows, changed, fresh, term="9000")
+    assert [r["codigo"] for r in merged] == ["20100000000", "10000000", "90000000"]
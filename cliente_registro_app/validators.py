@@ -0,0 +1,69 @@
+"""
+Validaciones de datos de clientes compartidas por el formulario y el importador
+"""
+
+from datetime import datetime
+
+TIPOS_CLIENTE = ("minorista", "mayorista", "corporativo")
+
+
+def _es_numero(valor, largo):
+    return len(valor) == largo and valor.isdigit()
+
+
+def validar_codigo(tipo, codigo):
+    """DNI (8 dígitos) para minoristas, RUC (11 dígitos) para mayoristas/corporativos."""
+    codigo = (codigo or "").strip()
+    if tipo == "minorista":
+        if not _es_numero(codigo, 8):
+            return "El DNI debe tener 8 dígitos numéricos"
+    elif tipo in ("mayorista", "corporativo"):
+        if not _es_numero(codigo, 11):
+            return "El RUC debe tener 11 dígitos numéricos"
+    else:
+        return "Tipo de cliente no reconocido"
+    return None
+
+
+def validar_dni_contacto(dni_contacto):
+    """El DNI del contacto es opcional, pero si viene debe tener 8 dígitos."""
+    dni_contacto = (dni_contacto or "").strip()
+    if dni_contacto and not _es_numero(dni_contacto, 8):
+        return "El DNI del contacto debe tener 8 dígitos"
+    return None
+
+
+def validar_dni_admin(dni_admin):
+    dni_admin = (dni_admin or "").strip()
+    if not dni_admin:
+        return "Debe proporcionar DNI del administrador"
+    if not _es_numero(dni_admin, 8):
+        return "DNI administrador inválido (8 dígitos)"
+    return None
+
+
+# Formatos de fecha aceptados (el de Excel/ISO y el habitual al tipear)
+FORMATOS_FECHA = ("%Y-%m-%d", "%d/%m/%Y")
+
+
+def normalizar_fecha(valor):
+    """Fecha en AAAA-MM-DD o DD/MM/AAAA -> 'AAAA-MM-DD' ('' si viene vacía, None si no es válida)."""
+    valor = (valor or "").strip()
+    if not valor:
+        return ""
+    for formato in FORMATOS_FECHA:
+        try:
+            return datetime.strptime(valor, formato).date().isoformat()
+        except ValueError:
+            continue
+    return None
+
+
+def validar_cliente(tipo, codigo, dni_contacto=None, dni_admin=None):
+    """Devuelve el primer mensaje de error encontrado, o None si el registro es válido."""
+    error = validar_codigo(tipo, codigo)
+    if not error and tipo == "corporativo":
+        error = validar_dni_contacto(dni_contacto)
+    if not error:
+        error = validar_dni_admin(dni_admin)
+    return error
@@ -0,0 +1,364 @@
+"""
+Treeview virtual para tablas grandes (listado de clientes, reportes)
+
+Un ttk.Treeview con una fila de Tk por registro tarda decenas de segundos y
+cientos de MB con 300k filas. VirtualTreeview sólo crea los items que entran
+en pantalla y, al desplazarse, les cambia los valores; la barra de
+desplazamiento se calcula sobre el total de filas del origen de datos.
+
+El origen de datos es cualquier objeto con __len__() y get(inicio, fin) que
+devuelva la lista de filas de ese tramo; ListSource son filas ya en memoria
+(p.ej. el resultado de fetchall).
+
+La selección se guarda por clave de fila (o por posición lógica si no hay
+clave), así que sobrevive al desplazamiento; selected_rows() devuelve las
+filas del origen.
+"""
+
+from tkinter import ttk
+
+
+class ListSource:
+    """Origen de datos en memoria."""
+
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def get(self, start, stop):
+        return self.rows[start:stop]
+
+
+class TreeReconciler:
+    """
+    Lleva los items de primer nivel de un ttk.Treeview a una lista deseada de
+    (iid, valores) con el mínimo de llamadas a Tk: borra los que ya no están,
+    inserta los nuevos, actualiza los valores que cambiaron y mueve los que
+    quedaron fuera de lugar. Los items que no cambian no se tocan, así que
+    conservan selección y foco.
+    """
+
+    def __init__(self, tree):
+        self.tree = tree
+        self.order = []      # iids en el orden en que están en el Treeview
+        self.values = {}     # iid -> valores mostrados
+
+    def apply(self, items):
+        """items: lista de (iid, valores) con iids únicos. Devuelve las operaciones hechas."""
+        tree = self.tree
+        ops = {"insertados": 0, "actualizados": 0, "borrados": 0, "movidos": 0}
+        wanted = {iid for iid, _ in items}
+        for iid in self.order:
+            if iid not in wanted:
+                tree.delete(iid)
+                del self.values[iid]
+                ops["borrados"] += 1
+        order = [iid for iid in self.order if iid in wanted]
+
+        for pos, (iid, values) in enumerate(items):
+            if iid not in self.values:
+                tree.insert("", pos, iid=iid, values=values)
+                order.insert(pos, iid)
+                ops["insertados"] += 1
+            else:
+                if self.values[iid] != values:
+                    tree.item(iid, values=values)
+                    ops["actualizados"] += 1
+                if order[pos] != iid:
+                    tree.move(iid, "", pos)
+                    order.remove(iid)
+                    order.insert(pos, iid)
+                    ops["movidos"] += 1
+            self.values[iid] = values
+        self.order = order
+        return ops
+
+
+class VirtualTreeview(ttk.Treeview):
+    """
+    Treeview que muestra un origen de datos de cualquier tamaño con tantos
+    items como filas visibles. values(fila) -> tupla de celdas (por defecto
+    tuple(fila.values()) para dicts). buffer: filas extra que se piden al
+    origen alrededor de la ventana visible.
+
+    key(fila) -> identificador de la fila (p.ej. tipo y código de cliente); si
+    una clave se repite, sus demás apariciones se identifican también por posición.
+    Con clave, update_rows() reemplaza los datos conservando el desplazamiento
+    y la selección, y sólo se tocan los items de las filas que cambiaron. Sin
+    clave las filas se identifican por su posición.
+
+    on_near_end(): se llama al dibujar cuando la ventana visible llega a menos
+    de `buffer` filas del final (carga de la página siguiente, ver append_rows).
+
+    yview()/yscrollcommand funcionan como en un Treeview normal, así que se
+    conecta igual a un ttk.Scrollbar.
+    """
+
+    def __init__(self, master=None, values=None, key=None, buffer=50, on_near_end=None, **kw):
+        self._yscrollcommand = kw.pop("yscrollcommand", None)
+        super().__init__(master, **kw)
+        self._to_values = values or (lambda row: tuple(row.values()) if isinstance(row, dict) else tuple(row))
+        self.key = key
+        self.buffer = buffer
+        self.on_near_end = on_near_end
+        self.source = ListSource()
+        self._top = 0               # índice lógico de la primera fila visible
+        self._window = TreeReconciler(self)
+        self._window_rows = {}      # iid -> fila de las visibles
+        self._selected = {}         # iid -> fila, de todas las seleccionadas (visibles o no)
+        self._positions = None      # iid -> índice lógico (se arma al necesitarlo)
+        self._row_height = None
+        self._header_height = 0
+        self._cache_start = 0
+        self._cache = []
+
+        self.bind("<Configure>", lambda e: self.refresh(), add="+")
+        self.bind("<<TreeviewSelect>>", self._on_select, add="+")
+        self.bind("<ButtonPress-1>", self._on_press, add="+")
+        self.bind("<MouseWheel>", self._on_wheel)
+        self.bind("<Button-4>", lambda e: self._scroll_units(-3))
+        self.bind("<Button-5>", lambda e: self._scroll_units(3))
+        for key_name, delta in (("<Up>", -1), ("<Down>", 1), ("<Prior>", "-page"), ("<Next>", "page"),
+                                ("<Home>", "home"), ("<End>", "end")):
+            self.bind(key_name, lambda e, d=delta: self._on_key(d))
+
+    # ---------- Configuración / scroll ----------
+
+    def configure(self, cnf=None, **kw):
+        if cnf is None and not kw:
+            return super().configure()
+        if isinstance(cnf, dict) and "yscrollcommand" in cnf:
+            cnf = dict(cnf)
+            self._yscrollcommand = cnf.pop("yscrollcommand")
+        if "yscrollcommand" in kw:
+            self._yscrollcommand = kw.pop("yscrollcommand")
+        if cnf or kw:
+            return super().configure(cnf, **kw)
+        return None
+
+    config = configure
+
+    def yview(self, *args):
+        """Como Treeview.yview, pero sobre el total de filas del origen."""
+        total = len(self.source)
+        if not args:
+            if not total:
+                return 0.0, 1.0
+            return self._top / total, min(1.0, (self._top + self._page_size()) / total)
+        if args[0] == "moveto":
+            self._scroll_to(int(float(args[1]) * total))
+        elif args[0] == "scroll":
+            amount, what = int(args[1]), args[2]
+            self._scroll_to(self._top + amount * (self._page_size() if what == "pages" else 1))
+        return None
+
+    def _page_size(self):
+        """Filas que entran en la altura actual (o la opción height antes de dibujarse)."""
+        if self._row_height is None and self._window.order:
+            bbox = self.bbox(self._window.order[0])
+            if bbox:
+                self._row_height = bbox[3]
+                self._header_height = bbox[1]
+        height = self.winfo_height()
+        if self._row_height and height > 1:
+            return max(1, (height - self._header_height) // self._row_height)
+        return max(1, int(self.cget("height")))
+
+    def _scroll_to(self, top):
+        top = max(0, min(top, len(self.source) - self._page_size()))
+        if top != self._top:
+            self._top = top
+            self.refresh()
+
+    def _scroll_units(self, amount):
+        self._scroll_to(self._top + amount)
+        return "break"
+
+    def _on_wheel(self, event):
+        # Windows: múltiplos de 120; macOS: pasos de 1
+        step = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        return self._scroll_units(-3 * step)
+
+    # ---------- Datos ----------
+
+    def _iid(self, index, row):
+        # "#n" no choca con las claves: sin clave todas las filas usan esa forma
+        if not self.key:
+            return f"#{index}"
+        iid = str(self.key(row))
+        # clave repetida (p.ej. un LEFT JOIN que duplica la fila): Tk no admite dos
+        # items con el mismo iid, así que las demás apariciones llevan la posición
+        first = self._position(iid)
+        return iid if first is None or first == index else f"{iid}#{index}"
+
+    def _index_positions(self, rows, start=0):
+        positions = self._positions
+        for i, r in enumerate(rows, start):
+            positions.setdefault(str(self.key(r)), i)   # la primera aparición de cada clave
+
+    def _position(self, iid):
+        """Índice lógico de la fila con ese iid (None si no está en el origen)."""
+        if not self.key:
+            index = int(iid[1:])
+            return index if index < len(self.source) else None
+        if self._positions is None:
+            self._positions = {}
+            self._index_positions(self.source.get(0, len(self.source)))
+        index = self._positions.get(iid)
+        if index is None and "#" in iid:
+            # aparición repetida de una clave: "<clave>#<posición>"
+            base, _, n = iid.rpartition("#")
+            if base in self._positions and n.isdigit() and int(n) < len(self.source):
+                row = self.source.get(int(n), int(n) + 1)[0]
+                if str(self.key(row)) == base:
+                    index = int(n)
+        return index
+
+    def _replace_source(self, source):
+        self.source = source
+        self._cache_start, self._cache = 0, []
+        self._positions = None
+
+    def set_source(self, source, keep_position=False):
+        """
+        Muestra otro origen y limpia la selección; keep_position=True conserva
+        el desplazamiento (p.ej. tras borrar filas) en lugar de volver arriba.
+        """
+        self._replace_source(source)
+        self._selected = {}
+        if not keep_position:
+            self._top = 0
+        self.refresh()
+
+    def set_rows(self, rows, keep_position=False):
+        self.set_source(ListSource(rows), keep_position)
+
+    def update_rows(self, rows):
+        """
+        Reemplaza las filas por una versión nueva (p.ej. el mismo listado
+        recargado): la fila que estaba arriba sigue arriba y las seleccionadas
+        siguen seleccionadas si siguen existiendo. Si la fila de arriba ya no
+        está (otra búsqueda), se vuelve al principio.
+        """
+        anchor = self._window.order[0] if self._window.order else None
+        self._replace_source(ListSource(rows))
+        if self.key:
+            top = self._position(anchor) if anchor is not None else None
+            self._top = top if top is not None else 0
+            selected = {}
+            for iid in self._selected:
+                index = self._position(iid)
+                if index is not None:
+                    selected[iid] = rows[index]
+            self._selected = selected
+        else:
+            self._selected = {iid: rows[int(iid[1:])] for iid in self._selected if int(iid[1:]) < len(rows)}
+        self.refresh()
+
+    def append_rows(self, rows):
+        """Agrega filas al final del origen en memoria (p.ej. la página siguiente)."""
+        start = len(self.source.rows)
+        self.source.rows.extend(rows)
+        if self._positions is not None:
+            self._index_positions(rows, start)
+        self.refresh()
+
+    def _rows(self, start, stop):
+        """Filas [start, stop) del origen, pidiendo además `buffer` filas alrededor."""
+        cache_stop = self._cache_start + len(self._cache)
+        if not (self._cache_start <= start and stop <= cache_stop):
+            self._cache_start = max(0, start - self.buffer)
+            self._cache = self.source.get(self._cache_start, stop + self.buffer)
+        offset = start - self._cache_start
+        return self._cache[offset:offset + stop - start]
+
+    def refresh(self):
+        """Vuelve a dibujar la ventana visible (llamar tras modificar el origen)."""
+        total = len(self.source)
+        page = self._page_size()
+        self._top = max(0, min(self._top, total - page))
+        # una fila más para la que queda cortada abajo
+        rows = self._rows(self._top, min(total, self._top + page + 1))
+
+        self._window_rows = {}
+        items = []
+        for n, row in enumerate(rows):
+            iid = self._iid(self._top + n, row)
+            self._window_rows[iid] = row
+            items.append((iid, self._to_values(row)))
+        self._window.apply(items)
+
+        wanted = [iid for iid in self._window.order if iid in self._selected]
+        if set(wanted) != set(self.selection()):
+            self.selection_set(wanted)
+        if self._yscrollcommand:
+            first, last = self.yview()
+            self._yscrollcommand(first, last)
+        if self.on_near_end is not None and self._top + page + self.buffer >= total:
+            self.on_near_end()
+
+    def invalidate(self):
+        """Descarta las filas pedidas al origen (cambió su contenido) y redibuja."""
+        self._cache_start, self._cache = 0, []
+        self._positions = None
+        self.refresh()
+
+    # ---------- Selección ----------
+
+    def _on_press(self, event):
+        # clic sin Ctrl/Shift: la selección nueva reemplaza también la de fuera de pantalla
+        if not event.state & 0x0005:
+            self._selected = {}
+
+    def _on_select(self, event=None):
+        window = self._window_rows
+        selected = {iid: row for iid, row in self._selected.items() if iid not in window}
+        for iid in self.selection():
+            if iid in window:
+                selected[iid] = window[iid]
+        self._selected = selected
+
+    def _on_key(self, delta):
+        total = len(self.source)
+        if not total:
+            return "break"
+        order = self._window.order
+        focus = self.focus()
+        current = self._top + order.index(focus) if focus in order else self._top
+        page = self._page_size()
+        target = {"page": current + page, "-page": current - page,
+                  "home": 0, "end": total - 1}.get(delta, current + delta if isinstance(delta, int) else current)
+        target = max(0, min(target, total - 1))
+        self.see_index(target)
+        iid = self._window.order[target - self._top]
+        self._selected = {iid: self._window_rows[iid]}
+        self.refresh()
+        self.focus(iid)
+        return "break"
+
+    def see_index(self, index):
+        """Desplaza lo necesario para que la fila lógica `index` quede visible."""
+        page = self._page_size()
+        if index < self._top:
+            self._scroll_to(index)
+        elif index >= self._top + page:
+            self._scroll_to(index - page + 1)
+
+    def selected_rows(self):
+        """Filas seleccionadas en el orden del origen (si se conoce)."""
+        items = list(self._selected.items())
+        positions = [self._position(iid) for iid, _ in items]
+        if None not in positions:
+            items = [item for _, item in sorted(zip(positions, items), key=lambda p: p[0])]
+        return [row for _, row in items]
+
+    def index_at(self, y):
+        """Índice lógico de la fila en la coordenada y (None si no hay fila)."""
+        iid = self.identify_row(y)
+        order = self._window.order
+        return self._top + order.index(iid) if iid in order else None
+
+    def row_at(self, y):
+        return self._window_rows.get(self.identify_row(y))